@@ -1,23 +1,92 @@
 from django.contrib import admin
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchVector,
+)
+from django.db.models import Q
+from . import moderation
 from .models import (
+    COMMENT_SEARCH_CONFIG,
     Post,
     Comment,
+    QueuedEmail,
 )
+from .paginators import EstimatedCountPaginator
 
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'author', 'publish', 'status')
     list_filter = ('status', 'created', 'publish', 'author')
+    list_select_related = ('author',)
     search_fields = ('title', 'body')
     prepopulated_fields = {'slug': ('title',)}
     raw_id_fields = ('author',)
     date_hierarchy = 'publish'
     ordering = ('status', 'publish')
+    actions = ('publish_posts', 'unpublish_posts')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        """Search titles and bodies in the index of stored vectors."""
+        if not search_term:
+            return queryset, False
+        search_query = SearchQuery(search_term, search_type='websearch')
+        return queryset.filter(search_vector=search_query), False
+
+    @admin.action(description='Publish selected posts')
+    def publish_posts(self, request, queryset):
+        updated = moderation.set_post_status(queryset, 'published')
+        self.message_user(request, f'Published {updated} posts.')
+
+    @admin.action(description='Unpublish selected posts')
+    def unpublish_posts(self, request, queryset):
+        updated = moderation.set_post_status(queryset, 'draft')
+        self.message_user(request, f'Unpublished {updated} posts.')
 
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'post', 'created', 'active')
     list_filter = ('active', 'created', 'updated')
+    list_select_related = ('post',)
     search_fields = ('name', 'email', 'body')
+    raw_id_fields = ('post',)
+    # The newest comments first, in order of the primary key index.
+    ordering = ('-id',)
+    actions = ('approve_comments', 'deactivate_comments')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search names and bodies in the full-text index of comments and
+        emails equal to the search term, ignoring case.
+        """
+        if not search_term:
+            return queryset, False
+        search_query = SearchQuery(search_term, search_type='websearch',
+                                   config=COMMENT_SEARCH_CONFIG)
+        return queryset.annotate(search=SearchVector(
+            'name', 'body', config=COMMENT_SEARCH_CONFIG,
+        )).filter(Q(search=search_query)
+                  | Q(email__iexact=search_term.strip())), False
+
+    @admin.action(description='Approve selected comments')
+    def approve_comments(self, request, queryset):
+        updated = moderation.set_comments_active(queryset, True)
+        self.message_user(request, f'Approved {updated} comments.')
+
+    @admin.action(description='Deactivate selected comments')
+    def deactivate_comments(self, request, queryset):
+        updated = moderation.set_comments_active(queryset, False)
+        self.message_user(request, f'Deactivated {updated} comments.')
+
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'sender', 'client', 'recipient', 'status',
+                    'attempts', 'next_attempt', 'sent')
+    list_filter = ('status', 'created', 'sent')
+    search_fields = ('sender', 'recipient', 'subject')
@@ -5,6 +5,9 @@ class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
 
+    def ready(self):
+        from . import signals  # noqa: F401
+
 
 class TagConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
@@ -0,0 +1,143 @@
+"""
+Async variants of the read paths of the blog views, routed instead of
+the sync views when `BLOG_ASYNC_VIEWS` is enabled, as it is under ASGI.
+
+The post and the tag of a page are loaded with the async ORM. Its other,
+independent parts run concurrently on a pool of `BLOG_ASYNC_WORKERS`
+threads shared by all requests, each thread keeping its own database
+connection as long as `CONN_MAX_AGE` allows. Forms posted to the pages
+and searches are handled by the sync views.
+"""
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+)
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404
+from django.shortcuts import render
+from taggit.models import Tag
+
+from . import views
+from .forms import (
+    EmailPostForm,
+    CommentForm,
+)
+from .models import Post
+from .pagecache import (
+    cache_anonymous_page,
+    conditional_page,
+    post_list_namespaces,
+    post_detail_namespaces,
+)
+from .similarity import get_similar_posts
+from .templatetags.blog_tags import warm_sidebar
+
+# The sync views without their page cache, applied here already.
+_sync_post_list = sync_to_async(inspect.unwrap(views.post_list))
+_sync_post_detail = sync_to_async(inspect.unwrap(views.post_detail))
+
+# Bounds the connections opened by parts of pages, reused across requests.
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'BLOG_ASYNC_WORKERS', 8),
+    thread_name_prefix='blog-async')
+
+
+async def run_in_thread(function: Callable[[], Any]) -> Any:
+    """
+    Call `function` on a pooled worker thread, concurrently with other
+    calls. Connections of the thread are closed afterwards once unusable or
+    older than `CONN_MAX_AGE`, as at the end of a request.
+    """
+    def run():
+        try:
+            return function()
+        finally:
+            close_old_connections()
+
+    return await sync_to_async(
+        run, thread_sensitive=False, executor=_executor)()
+
+
+def _listed_posts(request, tag: Tag = None):
+    """Return the page of listed posts with their comments and tags."""
+    object_list = Post.published.for_listing()
+    count = None
+    if tag:
+        object_list, count = views.filter_by_tag(object_list, tag)
+
+    page, posts = views.paginate_posts(request, object_list, count=count)
+    posts.object_list = list(posts.object_list)
+    return page, posts
+
+
+@conditional_page(post_list_namespaces, 'sidebar')
+@cache_anonymous_page(post_list_namespaces)
+async def post_list(request, tag_slug: str = None):
+    """Async `views.post_list` for reading pages of posts."""
+    if request.method not in ('GET', 'HEAD') or 'query' in request.GET:
+        return await _sync_post_list(request, tag_slug=tag_slug)
+
+    tag = None
+    if tag_slug:
+        try:
+            tag = await Tag.objects.select_related('stats') \
+                                   .aget(slug=tag_slug)
+        except Tag.DoesNotExist:
+            raise Http404('No Tag matches the given query.')
+
+    (page, posts), forms, _ = await asyncio.gather(
+        run_in_thread(lambda: _listed_posts(request, tag)),
+        run_in_thread(views.list_forms),
+        run_in_thread(warm_sidebar))
+
+    context = {
+        'page': page,
+        'posts': posts,
+        'tag': tag,
+        'forms': forms,
+        'query': None,
+    }
+
+    return await sync_to_async(render)(
+        request, 'blog/post/list.html', context)
+
+
+@conditional_page(post_detail_namespaces, 'sidebar')
+@cache_anonymous_page(post_detail_namespaces)
+async def post_detail(request, year: str, month: str, day: str,
+                      post_slug: str):
+    """Async `views.post_detail` for reading a post."""
+    if request.method not in ('GET', 'HEAD'):
+        return await _sync_post_detail(
+            request, year=year, month=month, day=day, post_slug=post_slug)
+
+    try:
+        post = await Post.published.published_on(year, month, day) \
+                                   .aget(slug=post_slug)
+    except Post.DoesNotExist:
+        raise Http404('No Post matches the given query.')
+
+    comments, similar_posts, _ = await asyncio.gather(
+        run_in_thread(lambda: views.paginate_comments(post)),
+        run_in_thread(lambda: get_similar_posts(post)),
+        run_in_thread(warm_sidebar))
+
+    context = {
+        'post': post,
+        'comments': comments,
+        'forms': {
+            'comment_form': CommentForm,
+            'share_form': EmailPostForm,
+        },
+        'similar_posts': similar_posts,
+        'sent': False,
+    }
+
+    return await sync_to_async(render)(
+        request, 'blog/post/detail.html', context)
@@ -0,0 +1,387 @@
+"""
+Benchmarks of the blog hot paths.
+
+Every benchmark creates its synthetic data inside a transaction which is
+rolled back once it finishes, so it can be run against any database.
+Serving benchmarks are the exception: requests are handled on several
+threads, so they read the data already in the database, such as the
+fixtures.
+
+`benchmark_views` is the repeatable suite of the blog endpoints. Its
+report is JSON with sorted keys, so reports of two releases generated with
+the same options and seed can be diffed.
+
+`benchmark_comments` commits every comment like production does, so its
+posts are created and deleted afterwards instead of rolled back.
+"""
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+import django
+from django.conf import settings
+from django.db import (
+    connection,
+    transaction,
+)
+from django.db.models import Count
+from django.test import (
+    AsyncClient,
+    Client,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from taggit.models import Tag
+
+from . import synthetic
+from .ingest import CommentBuffer
+from .models import (
+    Post,
+    Comment,
+)
+
+SEARCH_TERMS = ('django', 'cache server', 'trigger', 'denormalization')
+
+
+def measure(function: Callable, repeat: int) -> dict:
+    """Call the function `repeat` times and return timings in ms."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return summarize(timings)
+
+
+def summarize(timings: list) -> dict:
+    """Return the median, 95th percentile and maximum of timings."""
+    timings = sorted(timings)
+
+    return {
+        'median': round(statistics.median(timings), 3),
+        'p95': round(timings[int(len(timings) * 0.95) - 1], 3),
+        'max': round(timings[-1], 3),
+    }
+
+
+def computed_search(query: str):
+    """Search the way it was done before vectors were stored."""
+    search_vector = SearchVector('title', weight='A') \
+        + SearchVector('body', weight='B')
+    search_query = SearchQuery(query)
+    return Post.published.annotate(
+        rank=SearchRank(search_vector, search_query)
+    ).filter(rank__gte=0.3).order_by('-rank')
+
+
+def stored_search(query: str):
+    return Post.published.search(query)
+
+
+def reversed_post_url(post: Post) -> str:
+    """Build a post URL the way it was done before the URL builder."""
+    return reverse('blog:post-detail', args=[
+        post.publish.year,
+        post.publish.strftime('%m'),
+        post.publish.strftime('%d'),
+        post.slug,
+    ])
+
+
+def benchmark_urls(count: int = 1000, repeat: int = 20) -> list:
+    """
+    Compare building URLs of `count` posts, as a long listing, a feed or a
+    sitemap page does, by `reverse()` and by the precompiled builder.
+    """
+    now = timezone.now()
+    posts = [Post(slug=f'synthetic-post-{number}',
+                  publish=now - timedelta(hours=number))
+             for number in range(count)]
+    builders = {'reverse': reversed_post_url,
+                'builder': Post.get_absolute_url}
+
+    return [
+        {'posts': count, 'url': name,
+         **measure(lambda: [build(post) for post in posts], repeat)}
+        for name, build in builders.items()
+    ]
+
+
+def default_paths() -> list:
+    """Return paths of the post list, the newest post and its tag."""
+    paths = ['/blog/']
+    post = Post.published.prefetch_related('tags').first()
+    if post:
+        paths.append(post.get_absolute_url())
+        paths.extend(f'/blog/tag/{tag.slug}/' for tag in post.tags.all()[:1])
+    return paths
+
+
+def _serve_wsgi(paths: list, requests: int, concurrency: int) -> list:
+    def fetch(number: int) -> tuple:
+        started = time.perf_counter()
+        response = Client().get(paths[number % len(paths)])
+        return response.status_code, time.perf_counter() - started
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        return list(executor.map(fetch, range(requests)))
+
+
+def _serve_asgi(paths: list, requests: int, concurrency: int) -> list:
+    async def serve():
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(number: int) -> tuple:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(paths[number % len(paths)])
+                return response.status_code, time.perf_counter() - started
+
+        return await asyncio.gather(*map(fetch, range(requests)))
+
+    return asyncio.run(serve())
+
+
+def benchmark_handler(handler: str, paths: list = None, requests: int = 500,
+                      concurrency: int = 10,
+                      page_cache: bool = False) -> dict:
+    """
+    Serve `requests` GETs of `paths`, `concurrency` at a time, through the
+    in-process WSGI or ASGI handler of the test clients, and return the
+    throughput and latencies. Pages are rendered by the views unless the
+    page cache is enabled.
+    """
+    paths = paths or default_paths()
+    serve = {'wsgi': _serve_wsgi, 'asgi': _serve_asgi}[handler]
+    timeout = settings.BLOG_PAGE_CACHE_TIMEOUT if page_cache else 0
+
+    # Test clients send requests to the "testserver" host.
+    with override_settings(BLOG_PAGE_CACHE_TIMEOUT=timeout,
+                           ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS,
+                                          'testserver']):
+        serve(paths, concurrency, concurrency)
+        started = time.perf_counter()
+        responses = serve(paths, requests, concurrency)
+        elapsed = time.perf_counter() - started
+
+    return {
+        'handler': handler,
+        'async_views': getattr(settings, 'BLOG_ASYNC_VIEWS', False),
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': sum(status != 200 for status, _ in responses),
+        'requests_per_second': round(requests / elapsed, 1),
+        **summarize([duration * 1000 for _, duration in responses]),
+    }
+
+
+def benchmark_serving(paths: list = None, requests: int = 500,
+                      concurrency: int = 10,
+                      page_cache: bool = False) -> list:
+    """
+    Compare the sync views served over WSGI with the async views served
+    over ASGI. Views are routed when URLs are loaded, so every handler is
+    benchmarked by a process of its own.
+    """
+    results = []
+    for handler in ('wsgi', 'asgi'):
+        command = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'),
+            'benchmark', 'handler', handler,
+            '--requests', str(requests), '--concurrency', str(concurrency),
+        ]
+        if paths:
+            command += ['--paths', *paths]
+        if page_cache:
+            command.append('--page-cache')
+
+        environment = {**os.environ,
+                       'BLOG_ASYNC_VIEWS': str(handler == 'asgi')}
+        output = subprocess.run(command, env=environment, check=True,
+                                capture_output=True, text=True).stdout
+        results.append(json.loads(output))
+
+    return results
+
+
+def benchmark_search(sizes: list, repeat: int = 20,
+                     per_page: int = 10) -> list:
+    """
+    Compare the latency of the first result page of searches computing
+    vectors at query time with searches using the stored, indexed vector.
+    """
+    searches = {'computed': computed_search, 'stored': stored_search}
+    results = []
+
+    with transaction.atomic():
+        author = synthetic.create_author('benchmark')
+        created = 0
+
+        for size in sorted(sizes):
+            synthetic.create_posts(author, size - created, start=created)
+            created = size
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE blog_post')
+
+            for name, search in searches.items():
+                for term in SEARCH_TERMS:
+                    timings = measure(
+                        lambda: list(search(term)[:per_page]), repeat)
+                    results.append({'posts': size, 'search': name,
+                                    'query': term, **timings})
+
+        transaction.set_rollback(True)
+
+    return results
+
+
+def _submit_comments(posts: list, count: int, submit: Callable,
+                     flush: Callable = None) -> dict:
+    timings = []
+    with CaptureQueriesContext(connection) as context:
+        started = time.perf_counter()
+        for number in range(count):
+            comment = Comment(post=posts[number % len(posts)],
+                              name='Reader', email='reader@example.com',
+                              body=f'Synthetic comment {number}.')
+            submitted = time.perf_counter()
+            submit(comment)
+            timings.append((time.perf_counter() - submitted) * 1000)
+        if flush:
+            flush()
+        elapsed = time.perf_counter() - started
+
+    return {
+        'comments': count,
+        'queries': len(context.captured_queries),
+        'comments_per_second': round(count / elapsed, 1),
+        **summarize(timings),
+    }
+
+
+def benchmark_comments(count: int = 2000, posts: int = 5,
+                       batch_size: int = 500) -> list:
+    """
+    Compare the sustained rate of comments on a few hot posts saved one by
+    one with comments inserted by a `CommentBuffer` in batches of
+    `batch_size`. Timings are of submitting a single comment.
+    """
+    author = synthetic.create_author('benchmark-comments')
+    synthetic.create_posts(author, posts)
+    hot_posts = list(Post.objects.filter(author=author))
+    buffer = CommentBuffer(max_size=batch_size * 2, batch_size=batch_size)
+
+    try:
+        return [
+            {'path': 'direct', **_submit_comments(
+                hot_posts, count, Comment.save)},
+            {'path': 'buffered', 'batch_size': batch_size,
+             **_submit_comments(hot_posts, count, buffer.add,
+                                buffer.flush)},
+        ]
+    finally:
+        author.delete()
+
+
+def view_paths(query: str = 'django') -> dict:
+    """
+    Return paths of the benchmarked endpoints, by name: the post list,
+    the most used tag, the newest post, a search, the feed and sitemaps.
+    """
+    paths = {
+        'list': reverse('blog:post-list'),
+        'search': f'{reverse("blog:post-list")}?query={query}',
+        'feed': reverse('blog:post-feed'),
+        'sitemap_index': reverse('django.contrib.sitemaps.views.index'),
+        'sitemap_section': reverse('django.contrib.sitemaps.views.sitemap',
+                                   args=['posts']),
+    }
+    tag = Tag.objects.annotate(posts=Count('taggit_taggeditem_items')) \
+                     .order_by('-posts', 'pk').first()
+    if tag:
+        paths['tag'] = reverse('blog:post-list-by-tag', args=[tag.slug])
+    post = Post.published.order_by('-publish').first()
+    if post:
+        paths['detail'] = post.get_absolute_url()
+    return paths
+
+
+def _benchmark_view(client: Client, path: str, repeat: int) -> dict:
+    # The first request warms caches shared by requests, like the sidebar.
+    client.get(path)
+    timings, query_counts, status_codes = [], set(), set()
+
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - started) * 1000)
+        query_counts.add(len(context.captured_queries))
+        status_codes.add(response.status_code)
+
+    return {
+        'path': path,
+        'status': sorted(status_codes),
+        'queries': max(query_counts),
+        **summarize(timings),
+    }
+
+
+def benchmark_views(posts: int = 0, repeat: int = 50, seed: int = 0,
+                    query: str = 'django', stdout=None, **generate) -> dict:
+    """
+    Measure latencies and query counts of the blog endpoints requested
+    through the test client. With `posts`, synthetic posts are generated
+    first, by `synthetic.generate_blog` given the other keyword arguments,
+    and rolled back afterwards; without, the data in the database is read.
+    Pages are rendered by the views, with the page cache disabled.
+    """
+    with transaction.atomic():
+        if posts:
+            synthetic.generate_blog(posts, seed=seed, stdout=stdout,
+                                    **generate)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        client = Client()
+        # Test clients send requests to the "testserver" host.
+        with override_settings(BLOG_PAGE_CACHE_TIMEOUT=0,
+                               ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS,
+                                              'testserver']):
+            views = {name: _benchmark_view(client, path, repeat)
+                     for name, path in view_paths(query).items()}
+
+        report = {
+            'meta': {
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'posts': Post.published.count(),
+                'generated_posts': posts,
+                'seed': seed,
+                'repeat': repeat,
+                'async_views': getattr(settings, 'BLOG_ASYNC_VIEWS', False),
+                'pagination': getattr(settings, 'BLOG_PAGINATION', 'pages'),
+            },
+            'views': views,
+        }
+        transaction.set_rollback(True)
+
+    return report
@@ -0,0 +1,182 @@
+"""
+Versioned cache for data shared by many blog pages.
+
+Values are stored under keys containing the version of their namespace.
+Invalidating a namespace bumps its version, so all values cached before
+become unreachable at once and simply expire from the backend.
+"""
+import threading
+import time
+from collections import (
+    Counter,
+    OrderedDict,
+)
+from typing import (
+    Any,
+    Callable,
+)
+
+from django.conf import settings
+from django.core.cache import caches
+
+_MISSING = object()
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the cache backend configured for the blog."""
+    return caches[getattr(settings, 'BLOG_CACHE_ALIAS', 'default')]
+
+
+def _version_key(namespace: str) -> str:
+    return f'blog:{namespace}:version'
+
+
+def record(namespace: str, outcome: str, count: int = 1) -> None:
+    """Count cache hits or misses in a namespace."""
+    with _stats_lock:
+        _stats[(namespace, outcome)] += count
+
+
+def get_version(namespace: str) -> int:
+    """Return the current version of a namespace."""
+    cache = get_cache()
+    version = cache.get(_version_key(namespace))
+
+    if version is None:
+        # A fresh version never collides with values left by an evicted one.
+        cache.add(_version_key(namespace), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(namespace))
+
+    return version
+
+
+def invalidate(*namespaces: str) -> None:
+    """Make every value cached in the given namespaces stale."""
+    cache = get_cache()
+
+    for namespace in namespaces:
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            cache.add(_version_key(namespace), time.time_ns(), timeout=None)
+
+
+def cached(namespace: str, key: str, producer: Callable[[], Any],
+           timeout: int = None) -> Any:
+    """
+    Return the value cached under `key` in `namespace`, calling `producer`
+    to compute and store it on a miss.
+    """
+    cache = get_cache()
+    cache_key = f'blog:{namespace}:{get_version(namespace)}:{key}'
+    value = cache.get(cache_key, _MISSING)
+
+    if value is _MISSING:
+        record(namespace, 'misses')
+        value = producer()
+        if timeout is None:
+            timeout = getattr(settings, 'BLOG_CACHE_TIMEOUT', 60 * 60)
+        cache.set(cache_key, value, timeout)
+    else:
+        record(namespace, 'hits')
+
+    return value
+
+
+def cached_many(namespace: str, keys: list,
+                producer: Callable[[list], dict],
+                timeout: int = None) -> dict:
+    """
+    Return values cached under `keys` in `namespace` by their keys, calling
+    `producer` once with the missing keys to compute and store theirs.
+    Keys the producer returns no value for are left out.
+    """
+    cache = get_cache()
+    prefix = f'blog:{namespace}:{get_version(namespace)}:'
+    found = cache.get_many([prefix + key for key in keys])
+    values = {key: found[prefix + key] for key in keys
+              if prefix + key in found}
+    missing = [key for key in keys if key not in values]
+
+    if values:
+        record(namespace, 'hits', len(values))
+    if missing:
+        record(namespace, 'misses', len(missing))
+        produced = producer(missing)
+        if timeout is None:
+            timeout = getattr(settings, 'BLOG_CACHE_TIMEOUT', 60 * 60)
+        cache.set_many({prefix + key: value
+                        for key, value in produced.items()}, timeout)
+        values.update(produced)
+
+    return values
+
+
+def stats() -> dict:
+    """Return hit and miss counters of this process for every namespace."""
+    with _stats_lock:
+        counters = dict(_stats)
+
+    result = {}
+    for namespace in sorted({namespace for namespace, _ in counters}):
+        hits = counters.get((namespace, 'hits'), 0)
+        misses = counters.get((namespace, 'misses'), 0)
+        result[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4),
+        }
+
+    return result
+
+
+def reset_stats() -> None:
+    """Reset hit and miss counters of this process."""
+    with _stats_lock:
+        _stats.clear()
+
+
+class LRUCache:
+    """
+    Thread-safe in-process cache holding at most `max_size` entries.
+    The least recently used entry is evicted first and, if a `timeout`
+    in seconds is given, entries older than it are never returned.
+    """
+
+    def __init__(self, max_size: int, timeout: float = None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._entries[key]
+            except KeyError:
+                return default
+            if expires is not None and expires < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        expires = None
+        if self.timeout is not None:
+            expires = time.monotonic() + self.timeout
+
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
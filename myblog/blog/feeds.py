@@ -1,18 +1,152 @@
+"""
+RSS and Atom feeds of the newest posts, of all posts or of a tag.
+
+Feed items are serialized by `feed_items` into plain dicts, cached per
+post and its last update and shared by every feed listing the post. A post
+edited or commented is serialized again, and changes of tags invalidate
+all items. Pages of feeds only load keys of their posts and whole
+responses are cached like the post lists (see `urls.py`).
+"""
+from collections import namedtuple
+
 from django.contrib.syndication.views import Feed
-from django.template.defaultfilters import truncatewords
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import (
+    Atom1Feed,
+    Rss201rev2Feed,
+)
+from taggit.models import Tag
+
+from .cache import cached_many
 from .models import Post
+from .paginators import KeysetPaginator
+
+FEED_ITEM_FIELDS = ('title', 'slug', 'publish', 'updated', 'description',
+                    'author__username')
+
+FeedPage = namedtuple('FeedPage', ('tag', 'page'))
+
+
+def _next_page_url(feed: dict) -> str:
+    return f'{feed["feed_url"]}?cursor={feed["next_cursor"]}'
+
+
+class PagedRssFeed(Rss201rev2Feed):
+    """RSS feed linking to its next (older) page, as in RFC 5005."""
+    def add_root_elements(self, handler):
+        super(PagedRssFeed, self).add_root_elements(handler)
+        if self.feed.get('next_cursor'):
+            handler.addQuickElement('atom:link', None, {
+                'rel': 'next',
+                'href': _next_page_url(self.feed),
+            })
+
+
+class PagedAtomFeed(Atom1Feed):
+    """Atom feed linking to its next (older) page, as in RFC 5005."""
+    def add_root_elements(self, handler):
+        super(PagedAtomFeed, self).add_root_elements(handler)
+        if self.feed.get('next_cursor'):
+            handler.addQuickElement('link', '', {
+                'rel': 'next',
+                'href': _next_page_url(self.feed),
+            })
+
+
+def serialize_post(post: Post) -> dict:
+    """Return everything a feed item shows of the post."""
+    return {
+        'title': post.title,
+        'link': post.get_absolute_url(),
+        'description': post.description,
+        'pubdate': post.publish,
+        'updateddate': post.updated,
+        'author_name': post.author.username,
+        'categories': [tag.name for tag in post.tags.all()],
+    }
+
+
+def _item_key(post: Post) -> str:
+    return f'{post.pk}:{post.updated.timestamp()}'
+
+
+def _serialize_posts(keys: list) -> dict:
+    ids = {int(key.split(':')[0]): key for key in keys}
+    posts = Post.objects.filter(pk__in=ids) \
+                        .select_related('author') \
+                        .only(*FEED_ITEM_FIELDS) \
+                        .prefetch_related('tags')
+    return {ids[post.pk]: serialize_post(post) for post in posts}
+
+
+def feed_items(posts) -> list:
+    """
+    Return serialized items of the posts, loading only posts whose items
+    are not cached yet. Posts need their primary key and `updated` only.
+    """
+    keys = [_item_key(post) for post in posts]
+    items = cached_many('feeds', keys, _serialize_posts)
+    return [items[key] for key in keys if key in items]
 
 
 class LatestPostsFeed(Feed):
-    title = 'My Blog'
-    link = '/blog/'
-    description = 'New posts on my blog.'
+    """RSS feed of the newest posts, of a tag if its slug is given."""
+    feed_type = PagedRssFeed
+    paginate_by = 5
+
+    def get_object(self, request, tag_slug: str = None):
+        tag = get_object_or_404(Tag, slug=tag_slug) if tag_slug else None
+        posts = Post.published.only('id', 'publish', 'updated')
+        if tag:
+            posts = posts.filter(tags__in=[tag])
+        paginator = KeysetPaginator(posts, self.paginate_by)
+        return FeedPage(tag, paginator.page(request.GET.get('cursor')))
+
+    def title(self, obj):
+        return f'My Blog: {obj.tag.name}' if obj.tag else 'My Blog'
+
+    def link(self, obj):
+        if obj.tag:
+            return reverse('blog:post-list-by-tag', args=[obj.tag.slug])
+        return reverse('blog:post-list')
+
+    def description(self, obj):
+        if obj.tag:
+            return f'New posts tagged "{obj.tag.name}" on my blog.'
+        return 'New posts on my blog.'
+
+    def feed_extra_kwargs(self, obj):
+        return {'next_cursor': obj.page.next_cursor}
 
-    def items(self):
-        return Post.published.all()[:5]
+    def items(self, obj):
+        return feed_items(obj.page.object_list)
 
     def item_title(self, item):
-        return item.title
+        return item['title']
+
+    def item_link(self, item):
+        return item['link']
 
     def item_description(self, item):
-        return truncatewords(item.body, 30)
+        return item['description']
+
+    def item_pubdate(self, item):
+        return item['pubdate']
+
+    def item_updateddate(self, item):
+        return item['updateddate']
+
+    def item_author_name(self, item):
+        return item['author_name']
+
+    def item_categories(self, item):
+        return item['categories']
+
+
+class AtomLatestPostsFeed(LatestPostsFeed):
+    """Atom variant of `LatestPostsFeed`."""
+    feed_type = PagedAtomFeed
+
+    def subtitle(self, obj):
+        return self.description(obj)
@@ -1,8 +1,10 @@
 from django import forms
+from .cache import cached
 from .models import (
     Comment,
     Post,
 )
+from .tagstats import tags_by_popularity
 from taggit.models import Tag
 
 
@@ -59,8 +61,14 @@ class PostForm(forms.ModelForm):
 
     @staticmethod
     def get_dynamic_choice():
-        tag_choices = [(tag.name, tag.name) for tag in list(Tag.objects.all())]
-        return tag_choices
+        """
+        Return choices of all tags labelled with their numbers of posts,
+        the most used first, cached until tags or their stats change.
+        """
+        return cached('tags', 'choices', lambda: [
+            (name, f'{name} ({post_count})')
+            for name, post_count in tags_by_popularity()
+            .values_list('name', 'post_count')])
 
     title = forms.CharField(
         max_length=100,
@@ -0,0 +1,268 @@
+"""
+Write-behind ingest of comments posted by readers.
+
+By default every comment is saved by its own request. With
+`BLOG_COMMENT_BUFFER` enabled, validated comments are queued in memory and
+a background thread inserts them with `bulk_create`, every
+`BLOG_COMMENT_FLUSH_INTERVAL` seconds or as soon as
+`BLOG_COMMENT_BATCH_SIZE` comments are queued. Comment counters and cache
+invalidations are then applied once per post of the batch, instead of once
+per comment, so a burst of comments on a post costs a few statements.
+
+The queue holds at most `BLOG_COMMENT_BUFFER_SIZE` comments, counting
+the ones being inserted. A request finding it full wakes the background
+thread and waits up to `BLOG_COMMENT_BUFFER_TIMEOUT` seconds for room,
+then the comment is rejected with `BufferFull`, so requests never insert
+comments themselves nor pile up while the database is down. A batch
+failing `BLOG_COMMENT_FLUSH_ATTEMPTS` times in a row is saved by halves,
+down to the comments failing on their own, which are logged and dropped.
+Queued comments are flushed when the process exits, but the ones queued by
+a process which is killed are lost, and comments show up on pages only
+once flushed.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import (
+    InterfaceError,
+    OperationalError,
+    close_old_connections,
+    connection,
+    transaction,
+)
+from django.utils import timezone
+
+from . import (
+    cache,
+    pagecache,
+    routers,
+)
+from .models import (
+    Post,
+    Comment,
+)
+
+logger = logging.getLogger(__name__)
+
+UPDATE_COMMENT_COUNTS = """
+UPDATE blog_post
+SET comment_count = blog_post.comment_count + counted.delta, updated = %s
+FROM unnest(%s::bigint[], %s::integer[]) AS counted(id, delta)
+WHERE blog_post.id = counted.id
+"""
+
+
+def save_comments(comments: list) -> list:
+    """
+    Insert the comments at once, skipping comments of deleted posts, and
+    update counters and cached pages of their posts. Return the inserted
+    comments.
+    """
+    with transaction.atomic():
+        post_ids = {comment.post_id for comment in comments}
+        posts = Post.objects.select_for_update() \
+                            .filter(pk__in=post_ids).in_bulk()
+        if len(posts) < len(post_ids):
+            logger.warning('Dropped comments of deleted posts %s.',
+                           sorted(post_ids - set(posts)))
+
+        comments = Comment.objects.bulk_create(
+            [comment for comment in comments if comment.post_id in posts])
+        counts = Counter(comment.post_id
+                         for comment in comments if comment.active)
+        if counts:
+            with connection.cursor() as cursor:
+                cursor.execute(UPDATE_COMMENT_COUNTS, [
+                    timezone.now(), list(counts), list(counts.values())])
+
+    # Invalidations of the `post_save` receivers, once per post.
+    cache.invalidate('sidebar')
+    for post_id in {comment.post_id for comment in comments}:
+        pagecache.invalidate_post_pages(posts[post_id])
+
+    return comments
+
+
+class BufferFull(Exception):
+    """Raised when a comment finds no room in the queue in time."""
+
+
+class CommentBuffer:
+    """
+    Bounded queue of comments inserted in batches, by a background thread
+    once started, or by `flush()`.
+    """
+
+    def __init__(self, max_size: int = 5000, batch_size: int = 500,
+                 interval: float = 0.2, timeout: float = 1,
+                 attempts: int = 3):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.timeout = timeout
+        self.attempts = attempts
+        self._comments = []
+        # Comments queued or being inserted, bounded by `max_size`.
+        self._size = 0
+        # Failed flushes of the first batch of the queue in a row.
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        # Serializes flushes, so comments are inserted in order.
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._comments)
+
+    def add(self, comment: Comment) -> None:
+        """
+        Queue the comment. When the queue is full, wake the background
+        thread and wait up to `timeout` seconds for room, or raise
+        `BufferFull`. Without the thread, full batches are flushed by the
+        adding thread.
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._not_full:
+            while self._size >= self.max_size:
+                # Woken by a flush whose room went to other comments, the
+                # thread is woken again for the next batch.
+                self._wakeup.set()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise BufferFull(
+                        f'{self._size} comments are waiting to be saved.')
+                self._not_full.wait(remaining)
+            self._comments.append(comment)
+            self._size += 1
+            batch_ready = len(self._comments) >= self.batch_size
+        if batch_ready:
+            if self._thread is None:
+                self.flush()
+            else:
+                self._wakeup.set()
+
+    def flush(self) -> int:
+        """
+        Insert the queued comments and return their number. Comments of a
+        failed batch, and the following ones, are queued again, unless the
+        batch failed `attempts` times: it is then saved by halves and the
+        comments failing on their own are dropped.
+        """
+        with self._flush_lock:
+            with self._lock:
+                comments, self._comments = self._comments, []
+
+            for start in range(0, len(comments), self.batch_size):
+                batch = comments[start:start + self.batch_size]
+                pending = list(batch)
+                try:
+                    if self._failures < self.attempts:
+                        save_comments(batch)
+                    else:
+                        self._save_by_halves(pending)
+                except Exception:
+                    self._failures += 1
+                    with self._not_full:
+                        self._comments[:0] = \
+                            pending + comments[start + len(batch):]
+                        self._size -= len(batch) - len(pending)
+                        self._not_full.notify_all()
+                    raise
+                self._failures = 0
+                with self._not_full:
+                    self._size -= len(batch)
+                    self._not_full.notify_all()
+            return len(comments)
+
+    @staticmethod
+    def _save_by_halves(pending: list) -> None:
+        """
+        Save the comments, splitting failing parts in halves until single
+        comments fail, which are logged and dropped. Saved and dropped
+        comments are removed from `pending`. Errors of the connection are
+        raised, as every comment would fail.
+        """
+        parts = [list(pending)]
+        while parts:
+            part = parts.pop()
+            try:
+                save_comments(part)
+            except (InterfaceError, OperationalError):
+                raise
+            except Exception:
+                if len(part) > 1:
+                    middle = len(part) // 2
+                    parts += [part[middle:], part[:middle]]
+                    continue
+                logger.exception('Dropped a comment of post %s failing to be '
+                                 'saved.', part[0].post_id)
+            # Parts are saved in order, so the part leads the pending ones.
+            del pending[:len(part)]
+
+    def start(self) -> None:
+        """Flush the queue in a background thread until `stop()`."""
+        self._thread = threading.Thread(
+            target=self._run, name='comment-buffer', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and flush the remaining comments."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Failed to flush queued comments.')
+        connection.close()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> CommentBuffer:
+    """Return the started buffer of this process, flushed at exit."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = CommentBuffer(
+                getattr(settings, 'BLOG_COMMENT_BUFFER_SIZE', 5000),
+                getattr(settings, 'BLOG_COMMENT_BATCH_SIZE', 500),
+                getattr(settings, 'BLOG_COMMENT_FLUSH_INTERVAL', 0.2),
+                getattr(settings, 'BLOG_COMMENT_BUFFER_TIMEOUT', 1),
+                getattr(settings, 'BLOG_COMMENT_FLUSH_ATTEMPTS', 3))
+            _buffer.start()
+            atexit.register(_buffer.stop)
+        return _buffer
+
+
+def submit_comment(comment: Comment) -> None:
+    """
+    Save a new comment, or queue it when `BLOG_COMMENT_BUFFER` is enabled,
+    raising `BufferFull` when the queue stays full. Reads of the request,
+    and of the next ones from the same reader, go to the primary database
+    either way.
+    """
+    if not getattr(settings, 'BLOG_COMMENT_BUFFER', False):
+        comment.save()
+        return
+
+    routers.mark_written()
+    get_buffer().add(comment)
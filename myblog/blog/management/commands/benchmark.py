@@ -0,0 +1,122 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from blog import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Benchmark blog hot paths on synthetic data, which is ' \
+           'rolled back afterwards, or serving of the data in the database.'
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='subject', required=True)
+
+        search = subparsers.add_parser(
+            'search', help='Compare computed and stored search vectors.')
+        search.add_argument(
+            '--sizes', type=int, nargs='+',
+            default=[10_000, 100_000, 1_000_000],
+            help='Numbers of synthetic posts to search through.')
+        search.add_argument(
+            '--repeat', type=int, default=20,
+            help='Number of times every query is run.')
+
+        urls = subparsers.add_parser(
+            'urls', help='Compare reverse() and the post URL builder.')
+        urls.add_argument(
+            '--count', type=int, default=1000,
+            help='Number of post URLs built per run.')
+        urls.add_argument(
+            '--repeat', type=int, default=20,
+            help='Number of runs.')
+
+        comments = subparsers.add_parser(
+            'comments', help='Compare comments saved one by one with '
+                             'comments inserted in batches.')
+        comments.add_argument(
+            '--count', type=int, default=2000,
+            help='Number of comments submitted by each path.')
+        comments.add_argument(
+            '--posts', type=int, default=5,
+            help='Number of posts commented in turn.')
+        comments.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of comments inserted per batch.')
+
+        views = subparsers.add_parser(
+            'views', help='Measure latencies and query counts of the blog '
+                          'endpoints through the test client.')
+        views.add_argument(
+            '--posts', type=int, default=0,
+            help='Number of synthetic posts generated, with the defaults '
+                 'of `generate_data`. By default the posts in the database '
+                 'are read.')
+        views.add_argument(
+            '--seed', type=int, default=0,
+            help='Seed of the generated posts.')
+        views.add_argument(
+            '--repeat', type=int, default=50,
+            help='Number of requests of every endpoint.')
+        views.add_argument(
+            '--query', default='django',
+            help='Query of the benchmarked search.')
+        views.add_argument(
+            '--output',
+            help='File the JSON report is written to, to be diffed with '
+                 'reports of other releases.')
+
+        for name, help_text in (
+                ('serve', 'Compare the sync views over WSGI with the async '
+                          'views over ASGI.'),
+                ('handler', 'Benchmark one handler with the views routed '
+                            'in this process.')):
+            serve = subparsers.add_parser(name, help=help_text)
+            if name == 'handler':
+                serve.add_argument('handler', choices=('wsgi', 'asgi'))
+            serve.add_argument(
+                '--paths', nargs='+',
+                help='Paths requested in turn. Defaults to the post list, '
+                     'the newest post and one of its tags.')
+            serve.add_argument(
+                '--requests', type=int, default=500,
+                help='Number of requests served.')
+            serve.add_argument(
+                '--concurrency', type=int, default=10,
+                help='Number of requests in flight at once.')
+            serve.add_argument(
+                '--page-cache', action='store_true',
+                help='Serve pages from the page cache once cached.')
+
+    def handle(self, *args, **options):
+        if options['subject'] == 'search':
+            results = benchmarks.benchmark_search(
+                options['sizes'], options['repeat'])
+        elif options['subject'] == 'urls':
+            results = benchmarks.benchmark_urls(
+                options['count'], options['repeat'])
+        elif options['subject'] == 'comments':
+            results = benchmarks.benchmark_comments(
+                options['count'], options['posts'], options['batch_size'])
+        elif options['subject'] == 'serve':
+            results = benchmarks.benchmark_serving(
+                options['paths'], options['requests'],
+                options['concurrency'], options['page_cache'])
+        elif options['subject'] == 'handler':
+            results = benchmarks.benchmark_handler(
+                options['handler'], options['paths'], options['requests'],
+                options['concurrency'], options['page_cache'])
+        elif options['subject'] == 'views':
+            results = benchmarks.benchmark_views(
+                options['posts'], options['repeat'], options['seed'],
+                options['query'], self.stdout)
+
+            if options['output']:
+                with open(options['output'], 'w', encoding='utf-8') as file:
+                    json.dump(results, file, indent=2, sort_keys=True)
+                    file.write('\n')
+                self.stdout.write(self.style.SUCCESS(
+                    f'Wrote the report to {options["output"]}.'))
+                return
+
+        self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
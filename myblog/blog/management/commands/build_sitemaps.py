@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.management.base import BaseCommand
+
+from blog.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Write gzipped sitemaps of posts to disk, to be served as ' \
+           'static files. Only pages whose posts changed are rewritten.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir', type=Path,
+            default=getattr(settings, 'BLOG_SITEMAP_ROOT', None),
+            help='Directory the sitemaps are written into.')
+        parser.add_argument(
+            '--base-url',
+            help='URL the directory is served at. Defaults to '
+                 '"<protocol>://<current site domain>/sitemaps/".')
+        parser.add_argument('--protocol', default='https')
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'] or \
+            f'{options["protocol"]}://{Site.objects.get_current().domain}' \
+            f'/sitemaps/'
+        if not base_url.endswith('/'):
+            base_url += '/'
+
+        written = build_sitemaps(
+            options['output_dir'], base_url, options['protocol'],
+            self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f'Written {written} sitemap pages.'))
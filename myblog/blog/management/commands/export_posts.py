@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from blog.transfer import export_posts
+
+
+class Command(BaseCommand):
+    help = 'Export every post as JSON Lines, with the username of its ' \
+           'author and names of its tags.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='File the posts are written to, standard output by '
+                 'default.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Number of posts fetched from the database at once.')
+
+    def handle(self, *args, **options):
+        # Progress goes to standard error when posts go to standard output.
+        progress = self.stderr if options['path'] == '-' else self.stdout
+
+        if options['path'] == '-':
+            exported = export_posts(sys.stdout, options['chunk_size'],
+                                    progress)
+        else:
+            with open(options['path'], 'w', encoding='utf-8') as output:
+                exported = export_posts(output, options['chunk_size'],
+                                        progress)
+
+        progress.write(self.style.SUCCESS(f'Exported {exported} posts.'))
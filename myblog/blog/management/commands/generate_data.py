@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from blog.synthetic import (
+    Distribution,
+    generate_blog,
+)
+
+
+class Command(BaseCommand):
+    help = 'Generate a reproducible synthetic blog: authors, tags, ' \
+           'published posts and their comments. Distributions are given ' \
+           'as "fixed:N", "uniform:LOW:HIGH", "poisson:MEAN" or ' \
+           '"lognormal:MEDIAN:SIGMA".'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=1000,
+            help='Number of posts generated.')
+        parser.add_argument(
+            '--authors', type=int, default=10,
+            help='Number of authors the posts are written by.')
+        parser.add_argument(
+            '--tags', type=int, default=50,
+            help='Number of tags, used with Zipf distributed popularity.')
+        parser.add_argument(
+            '--tags-per-post', type=Distribution,
+            default=Distribution('uniform:0:4'),
+            help='Distribution of the number of tags of a post.')
+        parser.add_argument(
+            '--comments-per-post', type=Distribution,
+            default=Distribution('poisson:3'),
+            help='Distribution of the number of comments of a post.')
+        parser.add_argument(
+            '--body-words', type=Distribution,
+            default=Distribution('lognormal:200:0.5'),
+            help='Distribution of the number of words of a post body.')
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Seed making the generated data reproducible.')
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Number of posts inserted in a transaction.')
+
+    def handle(self, *args, **options):
+        created = generate_blog(
+            options['posts'], options['authors'], options['tags'],
+            options['tags_per_post'], options['comments_per_post'],
+            options['body_words'], options['seed'], options['batch_size'],
+            self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created["posts"]} posts with {created["comments"]} '
+            f'comments and {created["tagged_items"]} tags. Run '
+            f'`rebuild_similar_posts` to include them in similar posts.'))
@@ -0,0 +1,34 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from blog.transfer import import_posts
+
+
+class Command(BaseCommand):
+    help = 'Import posts from JSON Lines written by `export_posts`. ' \
+           'Missing authors and tags are created.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='File the posts are read from, standard input by default.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of posts inserted in a transaction.')
+        parser.add_argument(
+            '--no-render', action='store_false', dest='render',
+            help='Leave bodies to be rendered by `render_markdown`.')
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            imported = import_posts(sys.stdin, options['batch_size'],
+                                    options['render'], self.stdout)
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                imported = import_posts(lines, options['batch_size'],
+                                        options['render'], self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} posts. Run `rebuild_similar_posts` to '
+            f'include them in similar posts.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Recalculate the number of active comments stored on every post.'
+
+    def handle(self, *args, **options):
+        updated = Post.objects.rebuild_comment_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt comment counters of {updated} posts.'))
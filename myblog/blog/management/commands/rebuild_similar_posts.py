@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from blog.similarity import rebuild_similar_posts
+
+
+class Command(BaseCommand):
+    help = 'Recompute similar posts of every published post.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of posts whose similar posts are inserted at once.')
+
+    def handle(self, *args, **options):
+        created = rebuild_similar_posts(options['batch_size'], self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {created} similar posts.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from blog.tagstats import rebuild_tag_stats
+
+
+class Command(BaseCommand):
+    help = 'Recount published posts of every tag stored in tag stats.'
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_tag_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt stats of {rebuilt} tags.'))
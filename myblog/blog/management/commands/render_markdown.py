@@ -0,0 +1,46 @@
+import os
+from itertools import islice
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from blog.rendering import render_markdown
+
+
+class Command(BaseCommand):
+    help = 'Render markdown bodies of posts into their stored HTML.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Render every post, not only posts without stored HTML.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of posts rendered and updated at once.')
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count(),
+            help='Number of worker processes rendering markdown.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        posts = Post.objects.order_by('pk')
+        if not options['all']:
+            posts = posts.filter(body_html='')
+
+        rows = posts.values_list('pk', 'body').iterator(chunk_size=batch_size)
+        rendered = 0
+
+        with Pool(options['processes']) as pool:
+            while batch := list(islice(rows, batch_size)):
+                ids, bodies = zip(*batch)
+                htmls = pool.map(render_markdown, bodies)
+                Post.objects.bulk_update(
+                    [Post(pk=pk, body_html=html)
+                     for pk, html in zip(ids, htmls)],
+                    ['body_html'])
+                rendered += len(batch)
+                self.stdout.write(f'Rendered {rendered} posts.')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered bodies of {rendered} posts.'))
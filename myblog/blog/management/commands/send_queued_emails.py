@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.outbox import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Send emails queued in the outbox, in batches over a single ' \
+           'connection to the email backend.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of emails sent over one connection.')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep polling the outbox instead of exiting once drained.')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Seconds to wait between polls of an empty outbox.')
+
+    def handle(self, *args, **options):
+        while True:
+            counts = send_queued_emails(options['batch_size'])
+            if counts:
+                self.stdout.write(', '.join(
+                    f'{number} {state}' for state, number in counts.items()))
+            elif not options['loop']:
+                break
+            else:
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Outbox drained.'))
@@ -0,0 +1,33 @@
+# Generated by Django 4.1 on 2026-10-17 05:46
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_comments(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    active_comments = Comment.objects.filter(
+        post=models.OuterRef('pk'), active=True) \
+        .order_by() \
+        .values('post') \
+        .annotate(total=models.Count('pk')) \
+        .values('total')
+    Post.objects.update(
+        comment_count=Coalesce(models.Subquery(active_comments), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_remove_post_like'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(count_comments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1 on 2026-10-17 05:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_body_html'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-publish', '-id'], name='blog_post_publish_id_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.1 on 2026-10-17 05:50
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR = """
+    setweight(to_tsvector(COALESCE({table}.title, '')), 'A') ||
+    setweight(to_tsvector(COALESCE({table}.body, '')), 'B')
+"""
+
+CREATE_TRIGGER = f"""
+CREATE FUNCTION blog_post_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR.format(table='NEW')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER blog_post_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, body ON blog_post
+    FOR EACH ROW EXECUTE PROCEDURE blog_post_search_vector_update();
+
+UPDATE blog_post SET search_vector = {SEARCH_VECTOR.format(table='blog_post')};
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER blog_post_search_vector_update ON blog_post;
+DROP FUNCTION blog_post_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_publish_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='blog_post_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1 on 2026-10-17 05:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_similarpost'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-updated'], name='blog_post_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.1 on 2026-10-17 06:42
+
+from itertools import islice
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 2000
+DESCRIPTION_WORDS = 30
+
+UPDATE_DESCRIPTIONS = """
+UPDATE blog_post SET description = described.description
+FROM unnest(%s::bigint[], %s::text[]) AS described(id, description)
+WHERE blog_post.id = described.id
+"""
+
+
+def describe(body):
+    # Frozen copy of `blog.rendering.describe` at the time of the migration.
+    return Truncator(body).words(DESCRIPTION_WORDS, truncate=' …')
+
+
+def describe_posts(apps, schema_editor):
+    """Store descriptions of existing posts, a batch per UPDATE."""
+    Post = apps.get_model('blog', 'Post')
+    rows = Post.objects.order_by('pk').values_list('pk', 'body') \
+                       .iterator(chunk_size=BATCH_SIZE)
+
+    with schema_editor.connection.cursor() as cursor:
+        while batch := list(islice(rows, BATCH_SIZE)):
+            cursor.execute(UPDATE_DESCRIPTIONS, [
+                [pk for pk, _ in batch],
+                [describe(body) for _, body in batch],
+            ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='description',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(describe_posts, migrations.RunPython.noop),
+    ]
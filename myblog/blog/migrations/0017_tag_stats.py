@@ -0,0 +1,34 @@
+# Generated by Django 4.1 on 2026-10-17 06:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from blog.tagstats import REBUILD_TAG_STATS
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0005_auto_20220424_2025'),
+        ('blog', '0016_post_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagStats',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='taggit.tag')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('last_used', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'tag stats',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='tagstats',
+            index=models.Index(fields=['-post_count'], name='blog_tagstats_post_count_idx'),
+        ),
+        migrations.RunSQL(REBUILD_TAG_STATS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.1 on 2026-10-17 06:56
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Comments keep being written while their large table is indexed.
+    atomic = False
+
+    dependencies = [
+        ('blog', '0017_tag_stats'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='comment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', 'body', config='english'), name='blog_comment_search_idx'),
+        ),
+    ]
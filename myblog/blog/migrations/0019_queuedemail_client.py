@@ -0,0 +1,26 @@
+# Generated by Django 4.1 on 2026-10-17 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0018_comment_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='queuedemail',
+            name='blog_queuedemail_sender_idx',
+        ),
+        migrations.AddField(
+            model_name='queuedemail',
+            name='client',
+            field=models.GenericIPAddressField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='queuedemail',
+            index=models.Index(fields=['client', 'sent'], name='blog_queuedemail_client_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1 on 2026-10-17 07:47
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+    # Comments keep being written while their large table is indexed.
+    atomic = False
+
+    dependencies = [
+        ('blog', '0019_queuedemail_client'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='blog_comment_email_idx'),
+        ),
+    ]
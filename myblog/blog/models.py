@@ -1,14 +1,122 @@
+from datetime import (
+    datetime,
+    timedelta,
+)
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchVector,
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+)
 from django.db import models
+from django.db.models.functions import (
+    Coalesce,
+    Upper,
+)
 from django.utils import timezone
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.urls import reverse
 from taggit.managers import TaggableManager
+from taggit.models import Tag
+
+from .paginators import encode_cursor
+from .rendering import (
+    describe,
+    render_markdown,
+)
+from .urlbuilders import post_detail_url
+
+# Text search configuration of the index of comments, which needs to be
+# explicit to be indexed and is matched by searches of comments.
+COMMENT_SEARCH_CONFIG = 'english'
+
+
+class ListedPostIterable(models.query.ModelIterable):
+    """
+    Yield posts with their first `BLOG_LISTED_COMMENTS` active comments as
+    `listed_comments` and, if the post has more, the cursor of the comments
+    following them as `comments_cursor`.
+    """
+
+    def __iter__(self):
+        posts = list(super(ListedPostIterable, self).__iter__())
+        count = getattr(settings, 'BLOG_LISTED_COMMENTS', 3)
+        comments = Comment.is_active.first_of_posts(
+            [post.pk for post in posts], count, self.queryset.db)
+
+        for post in posts:
+            post.listed_comments = comments.get(post.pk, [])
+            post.comments_cursor = encode_cursor(
+                post.listed_comments[-1], 'next', 'created') \
+                if post.comment_count > len(post.listed_comments) else None
+
+        yield from posts
+
+
+class PostQuerySet(models.QuerySet):
+    """QuerySet for posts."""
+    def for_listing(self):
+        """
+        Load everything a post card renders in a constant number of queries:
+        the author is joined, tags are prefetched and a bounded number of
+        active comments is loaded, however many comments posts have. The
+        number of comments is read from the `comment_count` counter.
+        """
+        clone = self.select_related('author').prefetch_related('tags')
+        clone._iterable_class = ListedPostIterable
+        return clone
+
+    def rebuild_comment_counts(self, **changes) -> int:
+        """
+        Recalculate `comment_count` of posts with a single UPDATE, which
+        also makes other `changes` of fields.
+        """
+        active_comments = Comment.objects.filter(
+            post=models.OuterRef('pk'), active=True) \
+            .order_by() \
+            .values('post') \
+            .annotate(total=models.Count('pk')) \
+            .values('total')
+        return self.update(comment_count=Coalesce(
+            models.Subquery(active_comments), 0), **changes)
+
+    def published_on(self, year: int, month: int, day: int):
+        """
+        Return posts published on a day of the current time zone. The day is
+        filtered as a range of `publish`, which indexes can serve, unlike
+        its extracted year, month and day. Invalid dates match no posts.
+        """
+        try:
+            start = timezone.make_aware(
+                datetime(int(year), int(month), int(day)))
+        except ValueError:
+            return self.none()
+        try:
+            return self.filter(publish__gte=start,
+                               publish__lt=start + timedelta(days=1))
+        except OverflowError:
+            # The last representable day.
+            return self.filter(publish__gte=start)
+
+    def search(self, query: str, min_rank: float = 0.3):
+        """
+        Return posts matching the query, best ranked first. Matches are
+        looked up in the GIN index of the stored `search_vector`.
+        """
+        search_query = SearchQuery(query)
+        return self.filter(search_vector=search_query) \
+                   .annotate(rank=SearchRank(models.F('search_vector'),
+                                             search_query)) \
+                   .filter(rank__gte=min_rank) \
+                   .order_by('-rank')
 
 
-class PublishedManager(models.Manager):
+class PublishedManager(models.Manager.from_queryset(PostQuerySet)):
     """Manager for published posts."""
     def get_queryset(self):
-        return super(PublishedManager, self)\
+        return super(PublishedManager, self) \
             .get_queryset().filter(status='published')
 
 
@@ -17,6 +125,34 @@ class ActiveManager(models.Manager):
     def get_queryset(self):
         return super(ActiveManager, self).get_queryset().filter(active=True)
 
+    def first_of_posts(self, post_ids: list, count: int,
+                       using: str = None) -> dict:
+        """
+        Return lists of the first `count` active comments of every post by
+        post id. A lateral join reads at most `count` entries of the index
+        of active comments per post, however many comments it has.
+        """
+        if not post_ids or count <= 0:
+            return {}
+
+        comments = self.raw(
+            'SELECT comment.id, comment.post_id, comment.name, '
+            'comment.body, comment.created '
+            'FROM unnest(%s::bigint[]) AS listed(post_id) '
+            'CROSS JOIN LATERAL ('
+            '    SELECT * FROM blog_comment'
+            '    WHERE blog_comment.post_id = listed.post_id'
+            '      AND blog_comment.active'
+            '    ORDER BY blog_comment.created, blog_comment.id'
+            '    LIMIT %s'
+            ') AS comment',
+            [list(post_ids), count], using=using)
+
+        comments_of_posts = {}
+        for comment in comments:
+            comments_of_posts.setdefault(comment.post_id, []).append(comment)
+        return comments_of_posts
+
 
 class Post(models.Model):
     STATUS_CHOICES = (
@@ -24,33 +160,75 @@ class Post(models.Model):
         ('published', 'Published'),
     )
 
-    objects = models.Manager()
+    objects = PostQuerySet.as_manager()
     published = PublishedManager()
     title = models.CharField(max_length=50)
     slug = models.SlugField(max_length=150, unique_for_date='publish')
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='blog_posts')
     body = models.TextField()
+    body_html = models.TextField(blank=True, default='', editable=False)
+    # First words of the body, the description of feed items.
+    description = models.TextField(blank=True, default='', editable=False)
     publish = models.DateTimeField(default=timezone.now)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
     status = models.CharField(
         max_length=10, choices=STATUS_CHOICES, default='draft')
     tags = TaggableManager()
+    comment_count = models.PositiveIntegerField(
+        default=0, db_index=True, editable=False)
+    # Weighted title and body vector, maintained by a database trigger.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ('-publish',)
+        # Read paths go through `published`, so their indexes skip drafts.
+        indexes = [
+            models.Index(fields=['-publish', '-id'],
+                         condition=models.Q(status='published'),
+                         name='blog_post_published_idx'),
+            models.Index(fields=['slug', 'publish'],
+                         condition=models.Q(status='published'),
+                         name='blog_post_published_slug_idx'),
+            GinIndex(fields=['search_vector'],
+                     name='blog_post_search_vector_idx'),
+            models.Index(fields=['-updated'],
+                         name='blog_post_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the loaded address to invalidate it once it changes, and
+        the loaded status to count posts of tags once it changes.
+        """
+        instance = super(Post, cls).from_db(db, field_names, values)
+        if 'publish' in instance.__dict__ and 'slug' in instance.__dict__:
+            instance._loaded_detail = (instance.publish, instance.slug)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Render the markdown body and its description once, instead of on
+        every page view or feed poll, unless `update_fields` leave the body
+        out.
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'body' in update_fields:
+            self.body_html = render_markdown(self.body)
+            self.description = describe(self.body)
+        if update_fields is not None and 'body' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'body_html',
+                                       'description'}
+        super(Post, self).save(*args, **kwargs)
+
     def get_absolute_url(self):
-        return reverse('blog:post-detail', args=[
-                           self.publish.year,
-                           self.publish.strftime('%m'),
-                           self.publish.strftime('%d'),
-                           self.slug
-        ])
+        return post_detail_url(self.publish, self.slug)
 
 
 class Comment(models.Model):
@@ -68,6 +246,115 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('created',)
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         condition=models.Q(active=True),
+                         name='blog_comment_active_idx'),
+            GinIndex(SearchVector('name', 'body',
+                                  config=COMMENT_SEARCH_CONFIG),
+                     name='blog_comment_search_idx'),
+            # Exact, case insensitive searches of emails in the admin.
+            models.Index(Upper('email'), name='blog_comment_email_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded `active` state to detect toggles on save."""
+        instance = super(Comment, cls).from_db(db, field_names, values)
+        instance._loaded_active = instance.__dict__.get('active')
+        return instance
 
     def __str__(self):
         return f'{self.name} added a comment for the post "{self.post}".'
+
+
+class SimilarPost(models.Model):
+    """
+    Precomputed similarity of two published posts, scored by the number
+    of tags they share.
+    """
+    objects = models.Manager()
+
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name='similar_posts')
+    similar = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name='+')
+    score = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ('-score',)
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'similar'],
+                                    name='blog_similarpost_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['post', '-score'],
+                         name='blog_similarpost_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'"{self.similar}" is similar to "{self.post}".'
+
+
+class TagStats(models.Model):
+    """
+    Number of published posts of a tag and when it was last added to a
+    post, maintained by `blog.tagstats`.
+    """
+    objects = models.Manager()
+
+    tag = models.OneToOneField(
+        Tag, on_delete=models.CASCADE, primary_key=True,
+        related_name='stats')
+    post_count = models.PositiveIntegerField(default=0)
+    last_used = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'tag stats'
+        indexes = [
+            models.Index(fields=['-post_count'],
+                         name='blog_tagstats_post_count_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tag} has {self.post_count} published posts.'
+
+
+class QueuedEmail(models.Model):
+    """Email waiting in the outbox for the `send_queued_emails` command."""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    objects = models.Manager()
+
+    # Address given by the reader sharing a post.
+    sender = models.EmailField()
+    # IP address of the reader, whose emails are rate limited. Emails queued
+    # by the site itself have none.
+    client = models.GenericIPAddressField(null=True, blank=True)
+    from_email = models.EmailField()
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=998)
+    message = models.TextField()
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created = models.DateTimeField(auto_now_add=True)
+    sent = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('created',)
+        indexes = [
+            models.Index(fields=['status', 'next_attempt'],
+                         name='blog_queuedemail_due_idx'),
+            models.Index(fields=['client', 'sent'],
+                         name='blog_queuedemail_client_idx'),
+        ]
+
+    def __str__(self):
+        return f'"{self.subject}" to {self.recipient} ({self.status}).'
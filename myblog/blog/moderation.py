@@ -0,0 +1,95 @@
+"""
+Bulk moderation of posts and comments, used by admin actions.
+
+Statuses of posts and comments are changed by a single UPDATE, which
+skips `save()` and model signals. What their receivers maintain is then
+brought up to date once for all changed rows: stats of tags, comment
+counters of posts and caches of the blog. Similar posts are refreshed
+post by post, as when a single post is saved.
+"""
+from collections import Counter
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from taggit.models import TaggedItem
+
+from . import (
+    cache,
+    pagecache,
+    search,
+    tagstats,
+)
+from .models import (
+    Post,
+    SimilarPost,
+)
+from .similarity import refresh_similar_posts
+
+
+def _invalidate_post_pages(post_ids: set, similar_to_ids=()) -> None:
+    # Detail pages of the posts and of posts listing them as similar,
+    # post lists and pages of every tag.
+    details = Post.objects.filter(
+        Q(pk__in=post_ids) | Q(pk__in=similar_to_ids)
+        | Q(pk__in=SimilarPost.objects.filter(similar__in=post_ids)
+                                      .values('post'))
+    ).values_list('publish', 'slug')
+    cache.invalidate(
+        pagecache.LIST_NAMESPACE, pagecache.ALL_TAGS_NAMESPACE,
+        *(pagecache.post_detail_namespace(publish, slug)
+          for publish, slug in details))
+    cache.invalidate('sidebar')
+
+
+def set_post_status(posts, status: str) -> int:
+    """
+    Set the status of the posts by a single UPDATE and return the number
+    of posts whose status changed.
+    """
+    with transaction.atomic():
+        post_ids = set(posts.exclude(status=status)
+                            .select_for_update()
+                            .values_list('pk', flat=True))
+        if not post_ids:
+            return 0
+
+        Post.objects.filter(pk__in=post_ids) \
+                    .update(status=status, updated=timezone.now())
+
+        tag_ids = TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Post),
+            object_id__in=post_ids).values_list('tag_id', flat=True)
+        delta = 1 if status == 'published' else -1
+        tagstats.count_posts(
+            {tag_id: count * delta
+             for tag_id, count in Counter(tag_ids).items()})
+
+        similar_to_ids = set()
+        for post in Post.objects.filter(pk__in=post_ids):
+            similar_to_ids |= refresh_similar_posts(post)
+
+    _invalidate_post_pages(post_ids, similar_to_ids)
+    search.invalidate()
+    return len(post_ids)
+
+
+def set_comments_active(comments, active: bool) -> int:
+    """
+    Approve or deactivate the comments by a single UPDATE, recount active
+    comments of their posts and return the number of changed comments.
+    """
+    with transaction.atomic():
+        changed = comments.exclude(active=active)
+        post_ids = set(changed.order_by().values_list('post_id', flat=True)
+                              .distinct())
+        updated = changed.update(active=active, updated=timezone.now())
+        if not updated:
+            return 0
+
+        Post.objects.filter(pk__in=post_ids) \
+                    .rebuild_comment_counts(updated=timezone.now())
+
+    _invalidate_post_pages(post_ids)
+    return updated
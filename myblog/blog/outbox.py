@@ -0,0 +1,158 @@
+"""
+Outbox of emails sent on behalf of readers.
+
+Views only queue emails, so a slow or unreachable SMTP server never holds
+up a request. The `send_queued_emails` command drains the queue in
+batches over a single connection, retries failures with an exponential
+backoff and limits how many emails a single reader gets sent.
+
+Readers are told apart by their IP address, which they cannot choose like
+the address in the form. Behind a reverse proxy, `REMOTE_ADDR` has to be
+set to the address of the client for the limit to apply per reader.
+When the server cannot be reached or drops the connection, the rest of
+the batch is postponed without using up attempts of its emails.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from smtplib import (
+    SMTPConnectError,
+    SMTPServerDisconnected,
+)
+
+from django.conf import settings
+from django.core.mail import (
+    EmailMessage,
+    get_connection,
+)
+from django.db import transaction
+from django.db.models import (
+    Count,
+    Min,
+)
+from django.utils import timezone
+
+from .models import QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+# Errors of the connection rather than of a single message.
+CONNECTION_ERRORS = (SMTPConnectError, SMTPServerDisconnected,
+                     ConnectionError, TimeoutError)
+
+
+def get_rate_limit() -> tuple:
+    """Return the number of emails a client gets sent per window."""
+    return (getattr(settings, 'BLOG_OUTBOX_RATE_LIMIT', 10),
+            timedelta(seconds=getattr(settings,
+                                      'BLOG_OUTBOX_RATE_WINDOW', 60 * 60)))
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    """Return the delay before retrying an email failed `attempts` times."""
+    base = getattr(settings, 'BLOG_OUTBOX_RETRY_DELAY', 60)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+def enqueue_email(sender: str, subject: str, message: str,
+                  from_email: str, recipient: str,
+                  client: str = None) -> QueuedEmail:
+    """
+    Queue an email to be sent on behalf of `sender`, rate limited by the
+    IP address of its `client`, if given.
+    """
+    return QueuedEmail.objects.create(
+        sender=sender, subject=subject, message=message,
+        from_email=from_email, recipient=recipient, client=client)
+
+
+def _sent_recently(clients: set, since) -> dict:
+    """Return the number and the oldest send time of recent emails."""
+    rows = QueuedEmail.objects.filter(
+        client__in=clients, status='sent', sent__gte=since,
+    ).values('client').annotate(count=Count('id'), oldest=Min('sent')) \
+     .order_by()
+
+    return {row['client']: (row['count'], row['oldest']) for row in rows}
+
+
+def send_queued_emails(batch_size: int = 100, connection=None) -> dict:
+    """
+    Send a batch of due emails over a single connection and return the
+    numbers of sent, retried, failed, deferred and postponed ones.
+
+    Rows are locked while sending, skipping rows locked by other workers,
+    so several workers can drain the outbox at once.
+    """
+    limit, window = get_rate_limit()
+    max_attempts = getattr(settings, 'BLOG_OUTBOX_MAX_ATTEMPTS', 5)
+    counts = defaultdict(int)
+
+    with transaction.atomic():
+        now = timezone.now()
+        emails = list(
+            QueuedEmail.objects.select_for_update(skip_locked=True)
+                               .filter(status='pending', next_attempt__lte=now)
+                               .order_by('next_attempt', 'id')[:batch_size])
+        if not emails:
+            return dict(counts)
+
+        recent = _sent_recently({email.client for email in emails
+                                 if email.client}, now - window)
+        sent_by = {client: count for client, (count, _) in recent.items()}
+        connection = connection or get_connection()
+        index = 0
+
+        try:
+            connection.open()
+            for index, email in enumerate(emails):
+                if email.client and sent_by.get(email.client, 0) >= limit:
+                    # Wait for the oldest email in the window to leave it.
+                    oldest = recent.get(email.client, (0, now))[1]
+                    email.next_attempt = oldest + window
+                    counts['deferred'] += 1
+                    continue
+
+                message = EmailMessage(
+                    subject=email.subject, body=email.message,
+                    from_email=email.from_email, to=[email.recipient],
+                    connection=connection)
+
+                try:
+                    connection.send_messages([message])
+                except CONNECTION_ERRORS:
+                    raise
+                except Exception as error:
+                    email.attempts += 1
+                    email.last_error = f'{type(error).__name__}: {error}'
+                    if email.attempts >= max_attempts:
+                        email.status = 'failed'
+                        counts['failed'] += 1
+                    else:
+                        email.next_attempt = \
+                            now + get_retry_delay(email.attempts)
+                        counts['retried'] += 1
+                else:
+                    email.attempts += 1
+                    email.status = 'sent'
+                    email.sent = now
+                    email.last_error = ''
+                    sent_by[email.client] = sent_by.get(email.client, 0) + 1
+                    counts['sent'] += 1
+        except Exception as error:
+            # Raised by the connection: the emails left wait for the
+            # server, keeping their attempts.
+            logger.warning('Postponed %d emails: %s: %s', len(emails) - index,
+                           type(error).__name__, error)
+            for email in emails[index:]:
+                email.next_attempt = now + get_retry_delay(1)
+                email.last_error = f'{type(error).__name__}: {error}'
+                counts['postponed'] += 1
+        finally:
+            connection.close()
+
+        QueuedEmail.objects.bulk_update(
+            emails, ['status', 'attempts', 'next_attempt', 'last_error',
+                     'sent'])
+
+    return dict(counts)
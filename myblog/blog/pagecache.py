@@ -0,0 +1,242 @@
+"""
+Full-page cache of blog pages served to anonymous readers.
+
+Every cached page belongs to namespaces of the blog cache, and its key
+embeds their versions. Changes bump only the namespaces of the pages they
+affect: the detail page of a post, the post list pages and pages of the
+tags the post is marked with. Tag pages are namespaced by the id of the
+tag, so a post invalidates them from its tagged items alone, and the ids
+of slugs looked up by requests are cached until tags change. Sidebars of
+cached pages are refreshed when the pages expire, after
+`BLOG_PAGE_CACHE_TIMEOUT` at the latest.
+
+CSRF tokens are stripped from stored pages and every served copy gets the
+token of the current reader, so forms keep working for everyone.
+
+Conditional GETs are answered before the cache or the view are reached.
+Pages are validated by an ETag covering the time a published post was last
+updated, which is a single indexed query, and versions of their
+namespaces, which also change when posts are deleted or unpublished. No
+Last-Modified is sent: the latest update goes back in time when the newest
+post is deleted or unpublished, so If-Modified-Since would be answered
+"304 Not Modified" for a changed page.
+
+Both decorators also wrap async views, doing their cache and database
+work in a thread.
+"""
+import asyncio
+import hashlib
+import re
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+from taggit.models import (
+    Tag,
+    TaggedItem,
+)
+
+from . import cache
+from .models import Post
+
+LIST_NAMESPACE = 'page:list'
+ALL_TAGS_NAMESPACE = 'page:tags'
+CSRF_PLACEHOLDER = '__blog_csrf_token__'
+CSRF_TOKEN_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def detail_namespace(year: int, month: int, day: int, slug: str) -> str:
+    return f'page:post:{int(year)}-{int(month)}-{int(day)}:{slug}'
+
+
+def post_detail_namespace(publish, slug: str) -> str:
+    return detail_namespace(publish.year, publish.month, publish.day, slug)
+
+
+def tag_namespace(tag_id: int) -> str:
+    return f'page:tag:{tag_id}'
+
+
+def get_tag_id(slug: str):
+    """Return the id of the tag with the slug, or None if there is none."""
+    return cache.cached('tags', f'id:{slug}', lambda: Tag.objects.filter(
+        slug=slug).values_list('pk', flat=True).first())
+
+
+def list_namespaces(**kwargs) -> list:
+    return [LIST_NAMESPACE]
+
+
+def post_list_namespaces(tag_slug: str = None, **kwargs) -> list:
+    if tag_slug:
+        return [tag_namespace(get_tag_id(tag_slug)), ALL_TAGS_NAMESPACE]
+    return [LIST_NAMESPACE]
+
+
+def post_detail_namespaces(year, month, day, post_slug, **kwargs) -> list:
+    return [detail_namespace(year, month, day, post_slug)]
+
+
+def is_cacheable(request) -> bool:
+    """Return whether the page requested could be served from the cache."""
+    return request.method in ('GET', 'HEAD') \
+        and not request.user.is_authenticated \
+        and not settings.CSRF_USE_SESSIONS
+
+
+def page_key(request, namespaces: list) -> str:
+    versions = '.'.join(str(cache.get_version(namespace))
+                        for namespace in namespaces)
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'blog:page:{versions}:{path}'
+
+
+def _lookup_page(request, namespaces: list) -> tuple:
+    """
+    Return the cache key of a cacheable page, or None, and the cached
+    response, or None on a miss.
+    """
+    if not is_cacheable(request):
+        return None, None
+
+    key = page_key(request, namespaces)
+    page = cache.get_cache().get(key)
+
+    if page is None:
+        cache.record('pages', 'misses')
+        return key, None
+
+    cache.record('pages', 'hits')
+    content, content_type = page
+    # Pages without forms, like feeds, get no CSRF cookie, as when rendered.
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    return key, HttpResponse(content, content_type=content_type)
+
+
+def _store_page(key: str, response) -> None:
+    if response.status_code == 200 and not response.streaming \
+            and not response.cookies:
+        content = CSRF_TOKEN_RE.sub(
+            rf'\g<1>{CSRF_PLACEHOLDER}\g<2>',
+            response.content.decode(response.charset))
+        cache.get_cache().set(
+            key, (content, response['Content-Type']),
+            getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 5 * 60))
+
+
+def cache_anonymous_page(get_namespaces):
+    """
+    Cache successful responses of the decorated view for anonymous GETs.
+    `get_namespaces` receives the view keyword arguments and returns
+    namespaces of the page.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                key, response = await sync_to_async(_lookup_page)(
+                    request, get_namespaces(**kwargs))
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    if key:
+                        await sync_to_async(_store_page)(key, response)
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key, response = _lookup_page(request, get_namespaces(**kwargs))
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if key:
+                    _store_page(key, response)
+            return response
+        return wrapper
+    return decorator
+
+
+def latest_update(request):
+    """Return when a published post was last updated, once per request."""
+    if not hasattr(request, '_blog_latest_update'):
+        request._blog_latest_update = Post.published.order_by('-updated') \
+            .values_list('updated', flat=True) \
+            .first()
+    return request._blog_latest_update
+
+
+def conditional_page(get_namespaces, *extra_namespaces: str):
+    """
+    Answer conditional GETs of the decorated view with "304 Not Modified"
+    without calling it. `get_namespaces` receives the view keyword arguments
+    and returns namespaces of the page, to which `extra_namespaces` are added.
+    """
+    def etag(request, *args, **kwargs):
+        namespaces = [*get_namespaces(**kwargs), *extra_namespaces]
+        versions = '.'.join(str(cache.get_version(namespace))
+                            for namespace in namespaces)
+        validator = f'{latest_update(request)}:{versions}'
+        return hashlib.md5(validator.encode()).hexdigest()
+
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+
+                # The same checks `condition()` does for sync views.
+                res_etag = quote_etag(
+                    await sync_to_async(etag)(request, **kwargs))
+                response = get_conditional_response(request, etag=res_etag)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                response.headers.setdefault('ETag', res_etag)
+                return response
+            return async_wrapper
+
+        conditional_view = condition(etag_func=etag)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            return conditional_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def invalidate_post_pages(post, similar_to_ids=(), tag_ids=()) -> None:
+    """
+    Invalidate pages showing the post: its detail page (at its current and
+    loaded address), post lists and pages of its tags and of `tag_ids`.
+    Detail pages of posts showing it as similar are given by their ids.
+    """
+    namespaces = {LIST_NAMESPACE,
+                  post_detail_namespace(post.publish, post.slug)}
+    loaded_detail = getattr(post, '_loaded_detail', None)
+    if loaded_detail:
+        namespaces.add(post_detail_namespace(*loaded_detail))
+
+    tag_ids = {*(tag_ids or ()), *TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Post),
+        object_id=post.pk).values_list('tag_id', flat=True)}
+    namespaces.update(tag_namespace(tag_id) for tag_id in tag_ids)
+    if similar_to_ids:
+        namespaces.update(
+            post_detail_namespace(publish, slug)
+            for publish, slug in Post.objects.filter(pk__in=similar_to_ids)
+                                             .values_list('publish', 'slug'))
+
+    cache.invalidate(*namespaces)
+
+
+def invalidate_tag_pages() -> None:
+    """Invalidate pages showing tags after a tag is renamed or deleted."""
+    cache.invalidate(LIST_NAMESPACE, ALL_TAGS_NAMESPACE)
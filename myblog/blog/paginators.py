@@ -0,0 +1,169 @@
+"""
+Keyset (cursor) pagination of posts and comments.
+
+Unlike `django.core.paginator.Paginator`, pages are not addressed by their
+number but by an opaque cursor holding the key of the object they start
+after: `(publish, id)` for posts, newest first, and `(created, id)` for
+comments, oldest first. Fetching a page never runs `COUNT(*)` nor scans
+the rows of previous pages with `OFFSET`, so every page is equally cheap.
+
+Numbered pages of large tables, as in the admin, are counted by the
+estimate of the query planner with `EstimatedCountPaginator`.
+"""
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+def encode_cursor(obj, direction: str, field: str = 'publish') -> str:
+    """
+    Return an opaque cursor pointing before or after the given object,
+    keyed by its datetime `field` and id.
+    """
+    position = {'p': getattr(obj, field).isoformat(), 'i': obj.id,
+                'd': direction}
+    data = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """
+    Return the `(datetime, id, direction)` position of a cursor or None
+    if it is missing or malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(data)
+        value = parse_datetime(position['p'])
+        object_id = int(position['i'])
+        direction = position['d']
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None
+    if value is None or direction not in ('next', 'previous'):
+        return None
+
+    return value, object_id, direction
+
+
+def estimate_count(queryset) -> int:
+    """Return the number of rows of the queryset estimated by the planner."""
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator counting objects by the estimate of the query planner, only
+    counting them exactly when fewer than `exact_count_limit` are expected.
+    The last pages of large lists may thus be missing or empty.
+    """
+    exact_count_limit = 10000
+
+    @cached_property
+    def count(self) -> int:
+        estimate = estimate_count(self.object_list)
+        if estimate < self.exact_count_limit:
+            return super(EstimatedCountPaginator, self).count
+        return estimate
+
+
+class KeysetPage(Sequence):
+    """A single page of objects returned by `KeysetPaginator`."""
+    is_keyset = True
+
+    def __init__(self, object_list: list, next_cursor: str = None,
+                 previous_cursor: str = None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Paginate objects by the key of a datetime field and the id, in order
+    of `key`: by default posts from the newest by their `(publish, id)`.
+    """
+
+    def __init__(self, object_list, per_page: int, key: str = '-publish'):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.field = key.lstrip('-')
+        self.ordering = (key, '-id' if key.startswith('-') else 'id')
+        # Lookups of keys following and preceding a position.
+        self.after, self.before = ('lt', 'gt') if key.startswith('-') \
+            else ('gt', 'lt')
+
+    def _beyond(self, objects, position: tuple, lookup: str):
+        value, object_id, _ = position
+        return objects.filter(**{f'{self.field}__{lookup}e': value}).filter(
+            Q(**{f'{self.field}__{lookup}': value})
+            | Q(**{self.field: value, f'id__{lookup}': object_id}))
+
+    def page(self, cursor: str = None) -> KeysetPage:
+        """
+        Return the page following (or preceding) the cursor position.
+        A missing or malformed cursor returns the first page.
+        """
+        position = decode_cursor(cursor)
+        objects = self.object_list.order_by(*self.ordering)
+
+        if position is None:
+            rows = list(objects[:self.per_page + 1])
+            has_next, has_previous = len(rows) > self.per_page, False
+            rows = rows[:self.per_page]
+
+        elif position[2] == 'next':
+            rows = list(self._beyond(objects, position, self.after)
+                        [:self.per_page + 1])
+            has_next, has_previous = len(rows) > self.per_page, True
+            rows = rows[:self.per_page]
+
+        else:
+            reversed_ordering = [field[1:] if field.startswith('-')
+                                 else f'-{field}' for field in self.ordering]
+            rows = list(self._beyond(objects, position, self.before)
+                        .order_by(*reversed_ordering)[:self.per_page + 1])
+            has_next, has_previous = True, len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+
+        if not rows:
+            return KeysetPage(rows)
+
+        return KeysetPage(
+            rows,
+            next_cursor=encode_cursor(rows[-1], 'next', self.field)
+            if has_next else None,
+            previous_cursor=encode_cursor(rows[0], 'previous', self.field)
+            if has_previous else None,
+        )
@@ -0,0 +1,272 @@
+"""
+Opt-in instrumentation of what every request costs.
+
+With `BLOG_PROFILING` enabled, `ProfilingMiddleware` records the number
+and total time of SQL queries, queries repeated with the same SQL (the
+signature of an N+1 pattern), the template render time and the time spent
+in functions decorated with `profiled`, like the `markdown` filter. The
+figures are sent as a `Server-Timing` header and the latest requests are
+kept in a ring buffer shown by the admin-only `request_stats` view.
+
+The profile of the current request is held in a context variable, so
+queries run by async views on other threads are recorded too. When
+profiling is disabled the middleware removes itself and hooks only check
+that no profile is active.
+"""
+import asyncio
+import functools
+import logging
+import threading
+import time
+from collections import (
+    Counter,
+    deque,
+)
+from contextvars import ContextVar
+from typing import Callable
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import (
+    DjangoTemplates,
+    Template,
+)
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('blog_request_profile', default=None)
+_history_lock = threading.Lock()
+_history = deque()
+
+
+class RequestProfile:
+    """Costs of a single request."""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.total = None
+        self.status = None
+        self.view = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.executions = Counter()
+        self.spans = Counter()
+        self.span_calls = Counter()
+        self._active_spans = set()
+        self._lock = threading.Lock()
+
+    def add_query(self, sql: str, params, duration: float) -> None:
+        with self._lock:
+            self.queries += 1
+            self.db_time += duration
+            self.statements[sql] += 1
+            self.executions[(sql, repr(params))] += 1
+
+    def enter_span(self, name: str) -> bool:
+        """Start timing a span unless it is nested in one of the same name."""
+        with self._lock:
+            if name in self._active_spans:
+                return False
+            self._active_spans.add(name)
+            return True
+
+    def exit_span(self, name: str, duration: float) -> None:
+        with self._lock:
+            self._active_spans.discard(name)
+            self.spans[name] += duration
+            self.span_calls[name] += 1
+
+    def finish(self, status: int, view: str = None) -> None:
+        self.total = time.perf_counter() - self.started
+        self.status = status
+        self.view = view
+
+    @property
+    def duplicates(self) -> int:
+        """Return the number of queries repeating an identical query."""
+        return sum(count - 1 for count in self.executions.values())
+
+    def repeated(self, threshold: int = 2) -> list:
+        """Return SQL run at least `threshold` times, most repeated first."""
+        return [{'sql': sql, 'count': count}
+                for sql, count in self.statements.most_common()
+                if count >= threshold]
+
+    def server_timing(self) -> str:
+        """Return the value of the `Server-Timing` header."""
+        metrics = [
+            f'total;dur={self.total * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} '
+            f'queries, {self.duplicates} duplicated"',
+        ]
+        metrics.extend(
+            f'{name};dur={duration * 1000:.1f};'
+            f'desc="{self.span_calls[name]} calls"'
+            for name, duration in sorted(self.spans.items()))
+        return ', '.join(metrics)
+
+    def as_dict(self) -> dict:
+        return {
+            'method': self.method,
+            'path': self.path,
+            'view': self.view,
+            'status': self.status,
+            'total_ms': round(self.total * 1000, 3),
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 3),
+            'duplicates': self.duplicates,
+            'repeated': self.repeated(),
+            'spans': {name: {'ms': round(duration * 1000, 3),
+                             'calls': self.span_calls[name]}
+                      for name, duration in self.spans.items()},
+        }
+
+
+def current_profile() -> RequestProfile:
+    """Return the profile of the current request, if it is profiled."""
+    return _current.get()
+
+
+def profiled(name: str) -> Callable:
+    """Decorate a function to add its duration to the `name` span."""
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is None or not profile.enter_span(name):
+                return function(*args, **kwargs)
+
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profile.exit_span(name, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(sql, params, time.perf_counter() - started)
+
+
+def install_query_recorder(connection, **kwargs) -> None:
+    """Record queries of a connection run for profiled requests."""
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class ProfiledTemplate(Template):
+    """Template timing its render as the `template` span."""
+
+    @profiled('template')
+    def render(self, context=None, request=None):
+        return super(ProfiledTemplate, self).render(context, request)
+
+
+class ProfilingDjangoTemplates(DjangoTemplates):
+    """
+    Django templates backend timing the render of templates it returns.
+    Included templates are rendered as part of them.
+    """
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super(ProfilingDjangoTemplates, self) \
+            .get_template(template_name)
+        return ProfiledTemplate(template.template, self)
+
+
+def history() -> list:
+    """Return profiles of the latest requests, newest first."""
+    with _history_lock:
+        return [profile.as_dict() for profile in reversed(_history)]
+
+
+def reset_history() -> None:
+    with _history_lock:
+        _history.clear()
+
+
+def _store(profile: RequestProfile) -> None:
+    size = getattr(settings, 'BLOG_PROFILING_HISTORY', 200)
+    with _history_lock:
+        _history.append(profile)
+        while len(_history) > size:
+            _history.popleft()
+
+
+class ProfilingMiddleware:
+    """
+    Profile every request and send its costs as `Server-Timing`. Requests
+    running the same SQL `BLOG_PROFILING_REPEATED_QUERIES` times or more
+    are logged as warnings, as they are likely to be N+1 queries.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'BLOG_PROFILING', False):
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        connection_created.connect(
+            install_query_recorder, dispatch_uid='blog_profiling')
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Mark the middleware as a coroutine function, like Django's.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        profile = RequestProfile(request.method, request.get_full_path())
+        token = _current.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.process_response(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = RequestProfile(request.method, request.get_full_path())
+        token = _current.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.process_response(request, response, profile)
+
+    def process_response(self, request, response, profile: RequestProfile):
+        match = getattr(request, 'resolver_match', None)
+        profile.finish(response.status_code, match and match.view_name)
+        response.headers['Server-Timing'] = profile.server_timing()
+        _store(profile)
+
+        threshold = getattr(settings, 'BLOG_PROFILING_REPEATED_QUERIES', 5)
+        for statement in profile.repeated(threshold):
+            logger.warning(
+                '%s %s ran the same query %d times: %s', profile.method,
+                profile.path, statement['count'], statement['sql'])
+
+        return response
@@ -0,0 +1,40 @@
+"""
+Markdown rendering of post bodies.
+"""
+import hashlib
+
+import markdown
+from django.conf import settings
+from django.template.defaultfilters import truncatewords
+
+from .cache import LRUCache
+
+DESCRIPTION_WORDS = 30
+
+_rendered = LRUCache(getattr(settings, 'BLOG_MARKDOWN_CACHE_SIZE', 256))
+
+
+def describe(text: str) -> str:
+    """Return the description of a post body, its first words."""
+    return truncatewords(text, DESCRIPTION_WORDS)
+
+
+def render_markdown(text: str) -> str:
+    """Render markdown text into HTML."""
+    return markdown.markdown(text)
+
+
+def render_markdown_cached(text: str) -> str:
+    """
+    Render markdown text into HTML, reusing results of recently rendered
+    texts. Entries are keyed by a hash of the text and the least recently
+    used one is evicted once `BLOG_MARKDOWN_CACHE_SIZE` is exceeded.
+    """
+    digest = hashlib.sha1(text.encode()).hexdigest()
+    html = _rendered.get(digest)
+
+    if html is None:
+        html = render_markdown(text)
+        _rendered.set(digest, html)
+
+    return html
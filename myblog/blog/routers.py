@@ -0,0 +1,198 @@
+"""
+Routing of blog reads to read replicas of the primary database.
+
+Reads of the `blog` and `taggit` apps are spread in turn over the replicas
+listed in `BLOG_DATABASE_REPLICAS`, skipping replicas which failed their
+last health check, run at most every `BLOG_REPLICA_CHECK_INTERVAL` seconds.
+Only reads of requests served through `ReplicaPinMiddleware` are routed.
+Everything else goes to the primary: writes, reads outside requests, like
+those of management commands and background threads, reads in a
+transaction of the primary, reads of a request after it wrote and reads
+of requests pinned after a write from the same browser, so readers and
+scripts always see their own writes despite replication lag.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import (
+    DatabaseError,
+    connections,
+)
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+ROUTED_APPS = {'blog', 'taggit'}
+PIN_COOKIE = 'blog_primary'
+
+
+class RequestState:
+    """Whether reads of the current request must go to the primary."""
+
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar('blog_replica_state', default=None)
+
+
+def get_replicas() -> list:
+    return getattr(settings, 'BLOG_DATABASE_REPLICAS', [])
+
+
+def mark_written() -> None:
+    """
+    Route reads of the current request, and pin the following ones, to
+    the primary as if it wrote, for writes made on its behalf later.
+    """
+    state = _state.get()
+    if state is not None:
+        state.wrote = True
+
+
+class ReplicaHealth:
+    """Results of health checks of replicas, kept for an interval."""
+
+    def __init__(self):
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def is_healthy(self, alias: str) -> bool:
+        interval = getattr(settings, 'BLOG_REPLICA_CHECK_INTERVAL', 10)
+        now = time.monotonic()
+        with self._lock:
+            checked, healthy = self._results.get(alias, (None, None))
+        if checked is not None and now - checked < interval:
+            return healthy
+
+        healthy = self.check(alias)
+        with self._lock:
+            self._results[alias] = (now, healthy)
+        return healthy
+
+    def check(self, alias: str) -> bool:
+        """Return whether the replica answers a query."""
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except DatabaseError as error:
+            logger.warning('Replica %s is unavailable: %s', alias, error)
+            return False
+        return True
+
+    def set(self, alias: str, healthy: bool) -> None:
+        """Record the health of a replica as if it was just checked."""
+        with self._lock:
+            self._results[alias] = (time.monotonic(), healthy)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+
+class ReplicaRouter:
+    """Route reads of blog and tag models to healthy replicas in turn."""
+
+    def __init__(self):
+        self.health = ReplicaHealth()
+        self._turns = itertools.count()
+
+    def _reads_primary(self) -> bool:
+        state = _state.get()
+        if state is None or state.pinned or state.wrote:
+            return True
+        # Replicas do not see changes of a transaction in progress.
+        return connections[PRIMARY].in_atomic_block
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if model._meta.app_label not in ROUTED_APPS or not replicas:
+            return None
+        if self._reads_primary():
+            return PRIMARY
+
+        # Related objects are read from the database of the instance.
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+
+        for _ in replicas:
+            alias = replicas[next(self._turns) % len(replicas)]
+            if self.health.is_healthy(alias):
+                return alias
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in ROUTED_APPS:
+            return None
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        """Replicas are migrated by replication of the primary."""
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+    """
+    Pin reads of a browser to the primary for `BLOG_REPLICA_PIN_SECONDS`
+    after a request of it wrote blog data, by a cookie.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_replicas():
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Mark the middleware as a coroutine function, like Django's.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        state = RequestState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.process_response(request, response, state)
+
+    async def __acall__(self, request):
+        state = RequestState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.process_response(request, response, state)
+
+    def process_response(self, request, response, state: RequestState):
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'BLOG_REPLICA_PIN_SECONDS', 10),
+                httponly=True, samesite='Lax')
+        return response
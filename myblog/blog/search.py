@@ -0,0 +1,105 @@
+"""
+Cached full-text search of posts.
+
+Ranked ids of the first `BLOG_SEARCH_CACHED_RESULTS` matching posts, the
+first pages of results, and the number of all matching posts are kept in
+an in-process LRU cache, keyed by the normalized query and the version of
+the "search" namespace of the blog cache. Later pages are searched live.
+Any post change bumps that version, so all processes stop serving stale
+results, while entries also expire after `BLOG_SEARCH_CACHE_TIMEOUT`.
+"""
+from collections.abc import Sequence
+
+from django.conf import settings
+
+from . import cache
+from .models import Post
+
+_results = cache.LRUCache(
+    getattr(settings, 'BLOG_SEARCH_CACHE_SIZE', 128),
+    getattr(settings, 'BLOG_SEARCH_CACHE_TIMEOUT', 5 * 60))
+
+
+def normalize_query(query: str) -> str:
+    """Return the query lowercased, with runs of whitespace collapsed."""
+    return ' '.join(query.lower().split())
+
+
+def get_cached_results() -> int:
+    return getattr(settings, 'BLOG_SEARCH_CACHED_RESULTS', 100)
+
+
+def _search_ranks(query: str, tag=None):
+    posts = Post.published.search(query)
+    if tag:
+        posts = posts.filter(tags__in=[tag])
+    # Ties are broken by id, so cached and live pages follow each other.
+    return posts.order_by('-rank', 'id').values_list('id', 'rank')
+
+
+def search_post_ranks(query: str, tag=None) -> tuple:
+    """
+    Return `(id, rank)` pairs of the first `BLOG_SEARCH_CACHED_RESULTS`
+    published posts matching the query, optionally marked with the tag,
+    best ranked first, and the number of all matching posts.
+    """
+    query = normalize_query(query)
+    key = (cache.get_version('search'), tag.pk if tag else None, query)
+    results = _results.get(key)
+
+    if results is None:
+        cache.record('search', 'misses')
+        limit = get_cached_results()
+        ranks = list(_search_ranks(query, tag)[:limit + 1])
+        count = len(ranks) if len(ranks) <= limit \
+            else _search_ranks(query, tag).count()
+        results = (ranks[:limit], count)
+        _results.set(key, results)
+    else:
+        cache.record('search', 'hits')
+
+    return results
+
+
+def invalidate() -> None:
+    """Drop cached results of every search."""
+    cache.invalidate('search')
+    _results.clear()
+
+
+class SearchResults(Sequence):
+    """
+    Ranked posts matching a query, usable as a paginator object list.
+    Only posts of a requested slice are loaded, with a single `in_bulk`,
+    after searching their ranks if they are not cached.
+    """
+
+    def __init__(self, query: str, tag=None):
+        self.query = normalize_query(query)
+        self.tag = tag
+        self.ranks, self.count = search_post_ranks(self.query, tag)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1 or None][0]
+
+        cached = len(self.ranks) == self.count or (
+            index.stop is not None and 0 <= index.stop <= len(self.ranks))
+        if cached:
+            ranks = self.ranks[index]
+        else:
+            # Pages past the cached ones are searched live.
+            ranks = list(_search_ranks(self.query, self.tag)[index])
+        posts = Post.published.for_listing().in_bulk(
+            [post_id for post_id, _ in ranks])
+        results = []
+        for post_id, rank in ranks:
+            # Skip posts unpublished since the results were cached.
+            if post_id in posts:
+                posts[post_id].rank = rank
+                results.append(posts[post_id])
+
+        return results
@@ -0,0 +1,208 @@
+"""
+Signal receivers keeping denormalized blog data up to date.
+"""
+from django.db.models import F
+from django.db.models.signals import (
+    pre_save,
+    post_save,
+    pre_delete,
+    post_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+from taggit.models import Tag
+
+from . import (
+    cache,
+    pagecache,
+    search,
+    tagstats,
+)
+from .models import (
+    Post,
+    Comment,
+)
+from .rendering import (
+    describe,
+    render_markdown,
+)
+from .similarity import (
+    get_showing_post_ids,
+    refresh_similar_posts,
+)
+
+
+def _change_comment_count(post_id: int, delta: int) -> None:
+    # Pages of the post show its comments, so they are updated too.
+    Post.objects.filter(pk=post_id) \
+        .update(comment_count=F('comment_count') + delta,
+                updated=timezone.now())
+
+
+@receiver(pre_save, sender=Post)
+def render_loaded_post_body(sender, instance, raw, **kwargs):
+    """Render bodies of posts loaded from fixtures, which skip `save()`."""
+    if raw:
+        instance.body_html = render_markdown(instance.body)
+        instance.description = describe(instance.body)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    """
+    Count a new active comment or a comment whose `active` was toggled.
+    Other saves leave the post alone, as its pages are invalidated by
+    `invalidate_comment_pages`.
+    """
+    loaded_active = getattr(instance, '_loaded_active', None)
+
+    if created:
+        delta = 1 if instance.active else 0
+    elif loaded_active is not None and loaded_active != instance.active:
+        delta = 1 if instance.active else -1
+    else:
+        delta = 0
+
+    if delta:
+        _change_comment_count(instance.post_id, delta)
+    instance._loaded_active = instance.active
+
+
+def _deleted_with_post(kwargs) -> bool:
+    # Comments deleted along with their post need no care of their own.
+    return isinstance(kwargs.get('origin'), Post)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    """Discount a deleted active comment, unless its post is deleted."""
+    if instance.active and not _deleted_with_post(kwargs):
+        _change_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_sidebar(sender, **kwargs):
+    """Drop cached sidebar fragments after any post or comment change."""
+    cache.invalidate('sidebar')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_search(sender, **kwargs):
+    """Drop cached search results after any post or post tags change."""
+    search.invalidate()
+
+
+@receiver(post_save, sender=Post)
+def refresh_saved_post(sender, instance, raw, **kwargs):
+    """
+    Recompute similar posts, as the post could be (un)published, and
+    invalidate cached pages showing it.
+    """
+    if not raw:
+        similar_to_ids = refresh_similar_posts(instance)
+        pagecache.invalidate_post_pages(instance, similar_to_ids)
+
+
+@receiver(pre_delete, sender=Post)
+def invalidate_deleted_post_pages(sender, instance, **kwargs):
+    """Invalidate cached pages showing a post, while its tags exist."""
+    similar_to_ids = get_showing_post_ids(instance)
+    pagecache.invalidate_post_pages(instance, similar_to_ids)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def refresh_tagged_post(sender, instance, action, pk_set, **kwargs):
+    """
+    Recompute similar posts of a post whose tags changed and invalidate
+    cached pages showing it, including pages of tags it lost.
+    """
+    if not isinstance(instance, Post):
+        return
+    if action == 'pre_clear':
+        pagecache.invalidate_post_pages(instance)
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        similar_to_ids = refresh_similar_posts(instance)
+        pagecache.invalidate_post_pages(instance, similar_to_ids, pk_set)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    """
+    Invalidate cached pages showing comments of the post, which its own
+    delete does when the comment is deleted with it.
+    """
+    if _deleted_with_post(kwargs):
+        return
+    post = Post.objects.filter(pk=instance.post_id).first()
+    if post:
+        pagecache.invalidate_post_pages(post)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_pages(sender, **kwargs):
+    """Invalidate cached pages showing tags."""
+    pagecache.invalidate_tag_pages()
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def count_tagged_post(sender, instance, action, pk_set, **kwargs):
+    """Count a published post in stats of tags added to or removed from it."""
+    if not isinstance(instance, Post):
+        return
+    delta = 1 if instance.status == 'published' else 0
+
+    if action == 'post_add':
+        tagstats.count_posts(dict.fromkeys(pk_set, delta), timezone.now())
+    elif action == 'post_remove':
+        tagstats.count_posts(dict.fromkeys(pk_set, -delta))
+    elif action == 'pre_clear':
+        instance._cleared_tag_ids = list(
+            instance.tags.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        tagstats.count_posts(
+            dict.fromkeys(getattr(instance, '_cleared_tag_ids', ()), -delta))
+
+
+@receiver(post_save, sender=Post)
+def count_published_post(sender, instance, raw, **kwargs):
+    """Count a post in stats of its tags once it is (un)published."""
+    loaded_status = getattr(instance, '_loaded_status', None)
+    published = instance.status == 'published'
+
+    if not raw and loaded_status is not None \
+            and (loaded_status == 'published') != published:
+        tagstats.count_posts(dict.fromkeys(
+            instance.tags.values_list('pk', flat=True),
+            1 if published else -1))
+    instance._loaded_status = instance.status
+
+
+@receiver(pre_delete, sender=Post)
+def discount_deleted_post(sender, instance, **kwargs):
+    """Discount a deleted published post in stats of its tags."""
+    if instance.status == 'published':
+        tagstats.count_posts(dict.fromkeys(
+            instance.tags.values_list('pk', flat=True), -1))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_choices(sender, **kwargs):
+    """Drop the cached tag choices of the post form."""
+    cache.invalidate('tags')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_feed_items(sender, **kwargs):
+    """Drop cached feed items, which list tags of their posts."""
+    cache.invalidate('feeds')
@@ -0,0 +1,217 @@
+"""
+Precomputed similar posts.
+
+Two published posts are similar when they share tags and their score is
+the number of shared tags. `rebuild_similar_posts` computes the best
+`BLOG_SIMILAR_POSTS_LIMIT` similar posts of every post from sparse tag
+vectors with an inverted tag index. `refresh_similar_posts` updates the
+table when tags of a single post change: it recomputes the list of that
+post and enters it in lists of other posts it makes the cut of, which are
+then trimmed back to the limit. Lists of other posts may miss an entry
+pushed out of them, until the next full rebuild.
+"""
+import heapq
+from collections import (
+    Counter,
+    defaultdict,
+)
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import (
+    connection,
+    transaction,
+)
+from django.db.models import (
+    Count,
+    Q,
+)
+from taggit.models import TaggedItem
+
+from .models import (
+    Post,
+    SimilarPost,
+)
+
+# Similar posts shown on detail pages.
+SHOWN_COUNT = 4
+
+# Enters the post, scored by candidate, in lists of candidates which have
+# fewer entries than the limit or whose last entry it beats, newest first
+# on ties.
+ENTER_SIMILAR_POST = """
+INSERT INTO blog_similarpost (post_id, similar_id, score)
+SELECT candidate.id, %(post)s, candidate.score
+FROM unnest(%(ids)s::bigint[], %(scores)s::integer[])
+     AS candidate(id, score)
+LEFT JOIN LATERAL (
+    SELECT entry.score, post.publish
+    FROM blog_similarpost AS entry
+    JOIN blog_post AS post ON post.id = entry.similar_id
+    WHERE entry.post_id = candidate.id
+    ORDER BY entry.score DESC, post.publish DESC
+    OFFSET %(last)s LIMIT 1
+) AS last ON true
+WHERE last.score IS NULL
+   OR (candidate.score, %(publish)s::timestamptz) > (last.score, last.publish)
+RETURNING post_id
+"""
+
+TRIM_SIMILAR_POSTS = """
+DELETE FROM blog_similarpost
+WHERE id IN (
+    SELECT id FROM (
+        SELECT entry.id,
+               row_number() OVER (
+                   PARTITION BY entry.post_id
+                   ORDER BY entry.score DESC, post.publish DESC
+               ) AS rank
+        FROM blog_similarpost AS entry
+        JOIN blog_post AS post ON post.id = entry.similar_id
+        WHERE entry.post_id = ANY(%(ids)s::bigint[])
+    ) AS ranked
+    WHERE rank > %(limit)s
+)
+"""
+
+# Posts showing the post among their first published similar posts, even
+# once it is saved unpublished.
+SHOWING_SIMILAR_POST = """
+SELECT post_id FROM (
+    SELECT entry.post_id, entry.similar_id,
+           row_number() OVER (
+               PARTITION BY entry.post_id
+               ORDER BY entry.score DESC, post.publish DESC
+           ) AS rank
+    FROM blog_similarpost AS entry
+    JOIN blog_post AS post ON post.id = entry.similar_id
+    WHERE entry.post_id IN (
+        SELECT post_id FROM blog_similarpost WHERE similar_id = %(post)s)
+      AND (post.status = 'published' OR post.id = %(post)s)
+) AS ranked
+WHERE similar_id = %(post)s AND rank <= %(count)s
+"""
+
+
+def get_similar_limit() -> int:
+    return getattr(settings, 'BLOG_SIMILAR_POSTS_LIMIT', 10)
+
+
+def get_similar_posts(post: Post, count: int = SHOWN_COUNT) -> list:
+    """Return the most similar published posts, newest first on ties."""
+    similar_posts = SimilarPost.objects \
+        .filter(post=post, similar__status='published') \
+        .select_related('similar') \
+        .prefetch_related('similar__tags') \
+        .order_by('-score', '-similar__publish')[:count]
+    return [similar_post.similar for similar_post in similar_posts]
+
+
+def get_showing_post_ids(post: Post, count: int = SHOWN_COUNT) -> set:
+    """Return ids of posts showing the post among `count` similar posts."""
+    with connection.cursor() as cursor:
+        cursor.execute(SHOWING_SIMILAR_POST, {'post': post.pk, 'count': count})
+        return {post_id for post_id, in cursor.fetchall()}
+
+
+@transaction.atomic
+def refresh_similar_posts(post: Post, count: int = SHOWN_COUNT) -> set:
+    """
+    Recompute similar posts involving the given post. Return ids of posts
+    which showed it among their `count` similar posts before or show it
+    now, the only ones whose shown similar posts can change.
+    """
+    affected_ids = get_showing_post_ids(post, count)
+    SimilarPost.objects.filter(Q(post=post) | Q(similar=post)).delete()
+    if post.status != 'published':
+        return affected_ids
+
+    limit = get_similar_limit()
+    scores = list(
+        Post.published.filter(tags__in=post.tags.all())
+                      .exclude(pk=post.pk)
+                      .annotate(score=Count('tags'))
+                      .order_by('-score', '-publish')
+                      .values_list('pk', 'score'))
+    if not scores:
+        return affected_ids
+    SimilarPost.objects.bulk_create(
+        SimilarPost(post=post, similar_id=similar_id, score=score)
+        for similar_id, score in scores[:limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(ENTER_SIMILAR_POST, {
+            'post': post.pk,
+            'publish': post.publish,
+            'ids': [similar_id for similar_id, _ in scores],
+            'scores': [score for _, score in scores],
+            'last': limit - 1,
+        })
+        entered_ids = [post_id for post_id, in cursor.fetchall()]
+        if not entered_ids:
+            return affected_ids
+        cursor.execute(TRIM_SIMILAR_POSTS,
+                       {'ids': entered_ids, 'limit': limit})
+
+    return affected_ids | get_showing_post_ids(post, count)
+
+
+def _load_tag_vectors() -> tuple:
+    """
+    Return tag ids of every published post and the inverted index
+    listing ids of published posts marked with every tag.
+    """
+    published = set(Post.published.values_list('pk', flat=True))
+    tags_of_posts = defaultdict(list)
+    posts_of_tags = defaultdict(list)
+    tagged_items = TaggedItem.objects \
+        .filter(content_type=ContentType.objects.get_for_model(Post)) \
+        .values_list('object_id', 'tag_id') \
+        .iterator(chunk_size=10_000)
+
+    for post_id, tag_id in tagged_items:
+        if post_id in published:
+            tags_of_posts[post_id].append(tag_id)
+            posts_of_tags[tag_id].append(post_id)
+
+    return tags_of_posts, posts_of_tags
+
+
+def rebuild_similar_posts(batch_size: int = 1000, stdout=None) -> int:
+    """Recompute the whole similar posts table and return its size."""
+    limit = get_similar_limit()
+    tags_of_posts, posts_of_tags = _load_tag_vectors()
+    # Ties are resolved in favour of newer posts, as on the detail page.
+    publish = dict(Post.published.filter(pk__in=tags_of_posts.keys())
+                                 .values_list('pk', 'publish')
+                                 .iterator(chunk_size=10_000))
+    post_ids = sorted(tags_of_posts)
+    created = 0
+
+    with transaction.atomic():
+        SimilarPost.objects.all().delete()
+
+        for start in range(0, len(post_ids), batch_size):
+            similar_posts = []
+
+            for post_id in post_ids[start:start + batch_size]:
+                scores = Counter()
+                for tag_id in tags_of_posts[post_id]:
+                    scores.update(posts_of_tags[tag_id])
+                del scores[post_id]
+
+                best = heapq.nlargest(
+                    limit, scores.items(),
+                    key=lambda item: (item[1], publish[item[0]]))
+                similar_posts.extend(
+                    SimilarPost(post_id=post_id, similar_id=similar_id,
+                                score=score)
+                    for similar_id, score in best)
+
+            SimilarPost.objects.bulk_create(similar_posts)
+            created += len(similar_posts)
+            if stdout:
+                processed = min(start + batch_size, len(post_ids))
+                stdout.write(f'Processed {processed} of {len(post_ids)}.')
+
+    return created
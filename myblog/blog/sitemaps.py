@@ -1,13 +1,120 @@
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+
 from django.contrib.sitemaps import Sitemap
+from django.contrib.sites.models import Site
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.template.loader import render_to_string
+from django.utils.functional import cached_property
 from .models import Post
 
+MANIFEST_NAME = 'sitemap-manifest.json'
+
+
+class StreamingPaginator(Paginator):
+    """
+    Paginator whose pages fetch their rows with a server-side cursor, in
+    chunks. Pages can only be iterated once, as sitemaps do.
+    """
+    chunk_size = 2000
+
+    def page(self, number):
+        page = super(StreamingPaginator, self).page(number)
+        page.object_list = page.object_list.iterator(
+            chunk_size=self.chunk_size)
+        return page
+
 
 class PostSitemap(Sitemap):
     changefreq = 'weekly'
     priority = 0.9
+    limit = 5000
 
     def items(self):
-        return Post.published.all()
+        # Oldest first, so new posts only ever change the last page.
+        return Post.published.only('slug', 'publish', 'updated') \
+                             .order_by('publish', 'id')
 
     def lastmod(self, obj):
-        return obj.publish
+        return obj.updated
+
+    @cached_property
+    def paginator(self):
+        return StreamingPaginator(self._items(), self.limit)
+
+    def get_latest_lastmod(self):
+        return Post.published.aggregate(Max('updated'))['updated__max']
+
+
+def _write_gzipped(path: Path, content: str) -> None:
+    temporary_path = path.with_name(f'.{path.name}.tmp')
+    with gzip.open(temporary_path, 'wt', encoding='utf-8') as file:
+        file.write(content)
+    os.replace(temporary_path, path)
+
+
+def _page_fingerprints(sitemap: PostSitemap) -> list:
+    """
+    Return `(fingerprint, lastmod)` of every sitemap page, computed from
+    ids and update times of its posts.
+    """
+    pages = []
+    rows = sitemap.items().values_list('id', 'updated') \
+                          .iterator(chunk_size=10_000)
+
+    for position, (post_id, updated) in enumerate(rows):
+        if position % sitemap.limit == 0:
+            pages.append([hashlib.md5(), updated])
+        digest, lastmod = pages[-1]
+        digest.update(f'{post_id}:{updated.isoformat()};'.encode())
+        pages[-1][1] = max(lastmod, updated)
+
+    return [(digest.hexdigest(), lastmod) for digest, lastmod in pages]
+
+
+def build_sitemaps(output_dir: Path, base_url: str, protocol: str = 'https',
+                   stdout=None) -> int:
+    """
+    Write gzipped sitemap pages of posts and their index into `output_dir`.
+    Pages whose posts did not change since the previous build are kept.
+    Return the number of pages written.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = {}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+
+    sitemap = PostSitemap()
+    site = Site.objects.get_current()
+    pages = _page_fingerprints(sitemap)
+    written = 0
+
+    for number, (fingerprint, _) in enumerate(pages, start=1):
+        path = output_dir / f'sitemap-posts-{number}.xml.gz'
+        if manifest.get(str(number)) == fingerprint and path.exists():
+            continue
+
+        urls = sitemap.get_urls(page=number, site=site, protocol=protocol)
+        _write_gzipped(path, render_to_string('sitemap.xml', {'urlset': urls}))
+        manifest[str(number)] = fingerprint
+        written += 1
+        if stdout:
+            stdout.write(f'Written {path.name}.')
+
+    for number in range(len(pages) + 1, len(manifest) + 1):
+        (output_dir / f'sitemap-posts-{number}.xml.gz').unlink(missing_ok=True)
+        manifest.pop(str(number), None)
+
+    index = [{'location': f'{base_url}sitemap-posts-{number}.xml.gz',
+              'last_mod': lastmod}
+             for number, (_, lastmod) in enumerate(pages, start=1)]
+    _write_gzipped(output_dir / 'sitemap.xml.gz',
+                   render_to_string('sitemap_index.xml', {'sitemaps': index}))
+    manifest_path.write_text(json.dumps(manifest))
+
+    return written
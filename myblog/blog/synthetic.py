@@ -0,0 +1,217 @@
+"""
+Synthetic blog content used by benchmarks.
+
+`generate_blog` fills the database with a reproducible blog: authors,
+tags with Zipf distributed popularity, posts and their comments, with the
+numbers of tags, comments and words of every post drawn from configurable
+distributions.
+"""
+import math
+import random
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import (
+    reset_queries,
+    transaction,
+)
+from django.utils import timezone
+from taggit.models import TaggedItem
+
+from . import tagstats
+from .models import (
+    Post,
+    Comment,
+)
+from .rendering import (
+    describe,
+    render_markdown,
+)
+from .transfer import (
+    invalidate_caches,
+    resolve_authors,
+    resolve_tags,
+)
+
+# Word frequencies roughly follow Zipf's law, like natural language does,
+# so searches for the first words match far more posts than for the last.
+WORDS = (
+    'the', 'django', 'python', 'web', 'post', 'blog', 'model', 'view',
+    'template', 'query', 'database', 'cache', 'server', 'request', 'form',
+    'admin', 'index', 'search', 'docker', 'deploy', 'test', 'migration',
+    'signal', 'middleware', 'postgres', 'feed', 'sitemap', 'markdown',
+    'comment', 'tag', 'async', 'worker', 'queue', 'latency', 'throughput',
+    'profiling', 'benchmark', 'replica', 'router', 'pagination', 'cursor',
+    'keyset', 'vector', 'ranking', 'tsvector', 'trigger', 'vacuum',
+    'explain', 'analyze', 'denormalization',
+)
+WEIGHTS = tuple(1 / rank for rank in range(1, len(WORDS) + 1))
+
+
+def random_text(rng: random.Random, words: int) -> str:
+    """Return a text of randomly chosen words."""
+    return ' '.join(rng.choices(WORDS, weights=WEIGHTS, k=words))
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    if mean > 30:
+        return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+    # Knuth's algorithm, fine for small means.
+    limit, number, product = math.exp(-mean), 0, rng.random()
+    while product > limit:
+        number += 1
+        product *= rng.random()
+    return number
+
+
+class Distribution:
+    """
+    Distribution of non-negative integers given by a spec, one of
+    "fixed:N", "uniform:LOW:HIGH", "poisson:MEAN" and
+    "lognormal:MEDIAN:SIGMA".
+    """
+    KINDS = {
+        'fixed': lambda rng, value: value,
+        'uniform': lambda rng, low, high: rng.uniform(low, high),
+        'poisson': _poisson,
+        'lognormal': lambda rng, median, sigma:
+            rng.lognormvariate(math.log(median), sigma),
+    }
+
+    def __init__(self, spec: str):
+        kind, *parameters = spec.split(':')
+        if kind not in self.KINDS:
+            raise ValueError(f'Unknown distribution "{kind}".')
+        self.spec = spec
+        self._sample = self.KINDS[kind]
+        self._parameters = [float(parameter) for parameter in parameters]
+        # Fail on a wrong number of parameters right away.
+        self.sample(random.Random())
+
+    def __repr__(self):
+        return f'Distribution({self.spec!r})'
+
+    def sample(self, rng: random.Random) -> int:
+        return max(0, round(self._sample(rng, *self._parameters)))
+
+
+def tag_names(count: int) -> list:
+    """Return names of `count` synthetic tags, most popular first."""
+    return [WORDS[number % len(WORDS)]
+            + (f'-{number // len(WORDS)}' if number >= len(WORDS) else '')
+            for number in range(count)]
+
+
+def _choose_tags(rng: random.Random, names: list, weights: list,
+                 count: int) -> list:
+    # Ordered, unlike a set, to choose the same tags in every process.
+    count = min(count, len(names))
+    chosen = {}
+    while len(chosen) < count:
+        chosen.update(dict.fromkeys(
+            rng.choices(names, weights=weights, k=count)))
+    return list(chosen)[:count]
+
+
+def generate_blog(posts: int, authors: int = 10, tags: int = 50,
+                  tags_per_post: Distribution = Distribution('uniform:0:4'),
+                  comments_per_post: Distribution = Distribution('poisson:3'),
+                  body_words: Distribution = Distribution(
+                      'lognormal:200:0.5'),
+                  seed: int = 0, batch_size: int = 2000,
+                  stdout=None) -> dict:
+    """
+    Bulk create published posts with their tags and active comments and
+    return the numbers of created rows. Posts are published a minute
+    apart, the newest one now, and numbered after existing synthetic ones.
+    """
+    rng = random.Random(seed)
+    content_type = ContentType.objects.get_for_model(Post)
+    author_ids = list(resolve_authors(
+        {f'synthetic-author-{number}' for number in range(authors)}
+    ).values())
+    author_ids.sort()
+    names = tag_names(tags)
+    tag_ids = resolve_tags(set(names))
+    tag_weights = [1 / rank for rank in range(1, len(names) + 1)]
+    start = Post.objects.filter(slug__startswith='synthetic-post-').count()
+    now = timezone.now()
+    created = {'posts': 0, 'comments': 0, 'tagged_items': 0}
+
+    for offset in range(start, start + posts, batch_size):
+        numbers = range(offset, min(start + posts, offset + batch_size))
+        batch, comment_counts, post_tags = [], [], []
+
+        for number in numbers:
+            body = random_text(rng, max(1, body_words.sample(rng)))
+            comment_counts.append(comments_per_post.sample(rng))
+            post_tags.append(_choose_tags(
+                rng, names, tag_weights, tags_per_post.sample(rng)))
+            batch.append(Post(
+                title=random_text(rng, 4).capitalize()[:50],
+                slug=f'synthetic-post-{number}',
+                author_id=rng.choice(author_ids),
+                body=body,
+                body_html=render_markdown(body),
+                description=describe(body),
+                status='published',
+                publish=now - timedelta(minutes=number),
+                comment_count=comment_counts[-1]))
+
+        with transaction.atomic():
+            Post.objects.bulk_create(batch)
+            comments = Comment.objects.bulk_create([
+                Comment(post=post, name=f'Reader {number}',
+                        email=f'reader{number}@example.com',
+                        body=random_text(rng, 20))
+                for post, count in zip(batch, comment_counts)
+                for number in range(count)])
+            tagged_items = TaggedItem.objects.bulk_create([
+                TaggedItem(content_type=content_type, object_id=post.pk,
+                           tag_id=tag_ids[name])
+                for post, post_tag_names in zip(batch, post_tags)
+                for name in post_tag_names])
+            tagstats.count_posts(
+                Counter(tag_ids[name] for post_tag_names in post_tags
+                        for name in post_tag_names), now)
+
+        created['posts'] += len(batch)
+        created['comments'] += len(comments)
+        created['tagged_items'] += len(tagged_items)
+        reset_queries()
+        if stdout:
+            stdout.write(f'Created {created["posts"]} of {posts} posts.')
+
+    invalidate_caches()
+    return created
+
+
+def create_author(username: str = 'synthetic') -> User:
+    """Return an author for synthetic posts."""
+    author, _ = User.objects.get_or_create(username=username)
+    return author
+
+
+def create_posts(author: User, count: int, start: int = 0,
+                 body_words: int = 200, batch_size: int = 5000,
+                 seed: int = 0) -> None:
+    """
+    Bulk create `count` published posts, numbered from `start`. Posts are
+    published a minute apart, the newest one now.
+    """
+    rng = random.Random(seed + start)
+    now = timezone.now()
+
+    for offset in range(start, start + count, batch_size):
+        numbers = range(offset, min(start + count, offset + batch_size))
+        Post.objects.bulk_create([
+            Post(title=random_text(rng, 4).capitalize()[:50],
+                 slug=f'synthetic-post-{number}',
+                 author=author,
+                 body=random_text(rng, body_words),
+                 status='published',
+                 publish=now - timedelta(minutes=number))
+            for number in numbers
+        ])
@@ -0,0 +1,111 @@
+"""
+Statistics of tags: the number of published posts of every tag and when
+it was last added to a post.
+
+`TagStats` rows are updated incrementally by signal receivers when tags
+of a post change, a post is (un)published or deleted, and by bulk imports.
+Writes bypassing signals, like `QuerySet.update()`, are reconciled by the
+`rebuild_tag_stats` command. Tags without a row have no posts.
+"""
+import math
+
+from django.db import connection
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from taggit.models import Tag
+
+from . import cache
+from .models import TagStats
+
+CREATE_TAG_STATS = """
+INSERT INTO blog_tagstats (tag_id, post_count)
+SELECT tag_id, 0 FROM unnest(%s::bigint[]) AS counted(tag_id)
+ON CONFLICT (tag_id) DO NOTHING
+"""
+
+COUNT_TAG_POSTS = """
+UPDATE blog_tagstats
+SET post_count = GREATEST(blog_tagstats.post_count + counted.delta, 0),
+    last_used = COALESCE(%s, blog_tagstats.last_used)
+FROM unnest(%s::bigint[], %s::integer[]) AS counted(tag_id, delta)
+WHERE blog_tagstats.tag_id = counted.tag_id
+"""
+
+REBUILD_TAG_STATS = """
+INSERT INTO blog_tagstats (tag_id, post_count, last_used)
+SELECT tag.id,
+       COUNT(post.id) FILTER (WHERE post.status = 'published'),
+       MAX(post.created)
+FROM taggit_tag AS tag
+LEFT JOIN taggit_taggeditem AS item
+       ON item.tag_id = tag.id AND item.content_type_id = (
+          SELECT id FROM django_content_type
+          WHERE app_label = 'blog' AND model = 'post')
+LEFT JOIN blog_post AS post ON post.id = item.object_id
+GROUP BY tag.id
+ON CONFLICT (tag_id) DO UPDATE
+SET post_count = EXCLUDED.post_count, last_used = EXCLUDED.last_used
+"""
+
+CLOUD_WEIGHTS = 5
+
+
+def count_posts(deltas: dict, used=None) -> None:
+    """
+    Add numbers of published posts to stats of tags, given by tag id, and
+    mark the tags as used at `used`, if given.
+    """
+    deltas = {tag_id: delta for tag_id, delta in deltas.items()
+              if delta or used}
+    if not deltas:
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_TAG_STATS, [list(deltas)])
+        cursor.execute(COUNT_TAG_POSTS,
+                       [used, list(deltas), list(deltas.values())])
+    cache.invalidate('tags')
+
+
+def rebuild_tag_stats() -> int:
+    """Recount stats of every tag and return the number of tags."""
+    with connection.cursor() as cursor:
+        cursor.execute(REBUILD_TAG_STATS)
+        rebuilt = cursor.rowcount
+    cache.invalidate('tags')
+    return rebuilt
+
+
+def get_post_count(tag: Tag) -> int:
+    """Return the number of published posts of a tag from its stats."""
+    try:
+        return tag.stats.post_count
+    except TagStats.DoesNotExist:
+        return 0
+
+
+def tags_by_popularity():
+    """Return tags annotated with `post_count`, the most used first."""
+    return Tag.objects.annotate(
+        post_count=Coalesce('stats__post_count', Value(0))
+    ).order_by('-post_count', 'name')
+
+
+def get_tag_cloud(count: int = 30) -> list:
+    """
+    Return the `count` tags with the most published posts, by name, with
+    weights from 1 to `CLOUD_WEIGHTS` growing with the log of their count.
+    """
+    popular_tags = tags_by_popularity().filter(post_count__gt=0)
+    tags = list(popular_tags.values('name', 'slug', 'post_count')[:count])
+    if not tags:
+        return []
+
+    lowest = math.log(tags[-1]['post_count'])
+    spread = math.log(tags[0]['post_count']) - lowest
+    for tag in tags:
+        share = (math.log(tag['post_count']) - lowest) / spread \
+            if spread else 1
+        tag['weight'] = 1 + round(share * (CLOUD_WEIGHTS - 1))
+
+    return sorted(tags, key=lambda tag: tag['name'].lower())
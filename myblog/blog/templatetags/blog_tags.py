@@ -1,31 +1,66 @@
 from django import template
+from ..cache import cached
 from ..models import Post
-from django.db.models import Count
+from ..profiling import profiled
 from django.utils.safestring import mark_safe
-import markdown
+from ..rendering import render_markdown_cached
+from ..tagstats import get_tag_cloud
 
 register = template.Library()
 
 
+def _sidebar_posts(ordering: str, count: int) -> list:
+    return list(Post.published.only('title', 'slug', 'publish')
+                              .order_by(ordering)[:count])
+
+
 @register.simple_tag()
+@profiled('sidebar')
 def total_posts():
-    return Post.published.count()
+    return cached('sidebar', 'total_posts', Post.published.count)
 
 
 @register.inclusion_tag('blog/post/latest_posts.html')
+@profiled('sidebar')
 def show_latest_posts(count=5):
-    latest_posts = Post.published.order_by('-publish')[:count]
+    latest_posts = cached(
+        'sidebar', f'latest_posts:{count}',
+        lambda: _sidebar_posts('-publish', count))
     return {'latest_posts': latest_posts}
 
 
 @register.inclusion_tag('blog/post/mostly_commented_posts.html')
+@profiled('sidebar')
 def show_mostly_commented_posts(count=5):
-    mostly_commented_posts = Post.published.annotate(
-                                    total_comments=Count('comments')
-                                    ).order_by('-total_comments')[:count]
+    mostly_commented_posts = cached(
+        'sidebar', f'mostly_commented_posts:{count}',
+        lambda: _sidebar_posts('-comment_count', count))
     return {'mostly_commented_posts': mostly_commented_posts}
 
 
+@register.inclusion_tag('blog/post/tag_cloud.html')
+@profiled('sidebar')
+def show_tag_cloud(count=30):
+    tags = cached('tags', f'cloud:{count}', lambda: get_tag_cloud(count))
+    return {'tags': tags}
+
+
+def warm_sidebar() -> None:
+    """Cache the sidebar fragments ahead of rendering a page."""
+    total_posts()
+    show_latest_posts()
+    show_mostly_commented_posts()
+    show_tag_cloud()
+
+
 @register.filter(name='markdown')
-def markdown_filter(text):
-    return mark_safe(markdown.markdown(text))
+@profiled('markdown')
+def markdown_filter(value):
+    """
+    Return HTML of a post body stored on save, or render markdown text
+    (or a post not rendered yet) through the bounded LRU cache.
+    """
+    html = getattr(value, 'body_html', None)
+    if not html:
+        html = render_markdown_cached(getattr(value, 'body', value))
+    return mark_safe(html)
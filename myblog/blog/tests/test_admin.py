@@ -5,13 +5,24 @@ from django.test import (
     TestCase,
     Client,
 )
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.urls import reverse
 from django.contrib import admin
+from django.contrib.admin.utils import (
+    display_for_field,
+    lookup_field,
+)
 
+from blog.models import (
+    Post,
+    Comment,
+)
 from blog.utils import (
     create_user,
     create_post,
     create_comment,
+    create_queued_email,
 )
 
 
@@ -25,6 +36,7 @@ class AdminSiteTests(TestCase):
         self.user = create_user()
         self.post = create_post()
         self.comment = create_comment()
+        self.queuedemail = create_queued_email()
 
     def test_admin_models_url_patterns(self):
         """Test all default url patterns in admin site for each registered model.
@@ -41,13 +53,16 @@ class AdminSiteTests(TestCase):
 
         for model in admin_models:
             for pattern in model.get_urls():
-                if pattern.name is not None:
-                    model_name = str(model.opts).replace('blog.', '')
-                    model_instance = getattr(self, model_name)
-                    pattern_params = [
-                        'id' if 'id' in param else param
-                        for param in pattern.pattern.converters
-                    ]
+                if pattern.name is None:
+                    # The redirect of bare object ids to their change page.
+                    continue
+
+                model_name = str(model.opts).replace('blog.', '')
+                model_instance = getattr(self, model_name)
+                pattern_params = [
+                    'id' if 'id' in param else param
+                    for param in pattern.pattern.converters
+                ]
 
                 url_params = [getattr(model_instance, param) for param in pattern_params]
 
@@ -60,6 +75,76 @@ class AdminSiteTests(TestCase):
 
                 if 'list' in pattern.name:
                     for field in model.list_display:
-                        self.assertContains(res,getattr(model_instance, field))
+                        # Values are shown as the changelist displays them.
+                        field_object, _, value = lookup_field(
+                            field, model_instance, model)
+                        self.assertContains(res, display_for_field(
+                            value, field_object,
+                            model.get_empty_value_display()))
 
                 self.assertEqual(res.status_code, 200)
+
+
+class AdminModerationTests(TestCase):
+    """Tests for bulk actions, searches and lists of posts and comments."""
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(create_user(superuser=True))
+        self.post = create_post(title='Caching pages', status='draft')
+        self.comments = [create_comment(body=f'Comment about caching {number}',
+                                        post=self.post)
+                         for number in range(3)]
+
+    def test_publish_action(self):
+        """Test selected posts are published by the admin action."""
+        res = self.client.post(reverse('admin:blog_post_changelist'), {
+            'action': 'publish_posts',
+            '_selected_action': [self.post.pk]}, follow=True)
+
+        self.assertContains(res, 'Published 1 posts.')
+        self.assertTrue(Post.published.filter(pk=self.post.pk).exists())
+
+    def test_deactivate_action(self):
+        """Test selected comments are deactivated by the admin action."""
+        res = self.client.post(reverse('admin:blog_comment_changelist'), {
+            'action': 'deactivate_comments',
+            '_selected_action': [comment.pk for comment in self.comments]},
+            follow=True)
+
+        self.assertContains(res, 'Deactivated 3 comments.')
+        self.assertFalse(Comment.is_active.exists())
+
+    def test_full_text_search(self):
+        """Test searches match words in their indexed forms."""
+        for changelist, matches in (('admin:blog_post_changelist', 1),
+                                    ('admin:blog_comment_changelist', 3)):
+            url = reverse(changelist)
+            for query, count in (('cache', matches), ('unrelated', 0)):
+                res = self.client.get(url, {'q': query})
+                self.assertEqual(res.context['cl'].result_count, count)
+
+    def test_comment_search_matches_emails(self):
+        """Test comments are also found by their whole email, in any case."""
+        create_comment(email='Reader@Example.com', post=self.post)
+        url = reverse('admin:blog_comment_changelist')
+
+        for query, count in (('reader@example.com', 1),
+                             (' READER@example.com ', 1),
+                             ('test@example.com', 3), ('reader', 0)):
+            res = self.client.get(url, {'q': query})
+            self.assertEqual(res.context['cl'].result_count, count, query)
+
+    def test_comment_list_loads_posts_at_once(self):
+        """Test posts of listed comments are joined, not queried per row."""
+        url = reverse('admin:blog_comment_changelist')
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        create_comment(post=create_post(title='Other post'))
+        with CaptureQueriesContext(connection) as more_context:
+            self.client.get(url)
+
+        self.assertEqual(len(context.captured_queries),
+                         len(more_context.captured_queries))
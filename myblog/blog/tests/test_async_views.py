@@ -0,0 +1,137 @@
+"""
+Tests for the async read views.
+"""
+import asyncio
+import threading
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import (
+    TransactionTestCase,
+    AsyncClient,
+    Client,
+    override_settings,
+)
+from django.urls import (
+    include,
+    path,
+)
+
+from blog import (
+    async_views,
+    cache,
+)
+from blog import urls as blog_urls
+from blog.models import (
+    Post,
+    Comment,
+)
+from blog.pagecache import CSRF_TOKEN_RE
+from blog.similarity import rebuild_similar_posts
+
+READ_VIEWS = ('post-list', 'post-list-by-tag', 'post-detail')
+
+urlpatterns = [
+    path('blog/', include(([
+        path('', async_views.post_list, name='post-list'),
+        path('tag/<slug:tag_slug>/', async_views.post_list,
+             name='post-list-by-tag'),
+        path('<int:year>/<int:month>/<int:day>/<slug:post_slug>/',
+             async_views.post_detail, name='post-detail'),
+        *[pattern for pattern in blog_urls.urlpatterns
+          if pattern.name not in READ_VIEWS],
+    ], 'blog'))),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(TransactionTestCase):
+    """Tests for the async variants of `post_list` and `post_detail`."""
+    # Reads may be routed to replicas, on worker threads.
+    databases = '__all__'
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.client = AsyncClient()
+        author = User.objects.create(username='author')
+        self.post = Post.objects.create(
+            title='First post', slug='first-post', author=author,
+            body='Body', status='published')
+        self.post.tags.add('django')
+        self.similar_post = Post.objects.create(
+            title='Second post', slug='second-post', author=author,
+            body='Body', status='published')
+        self.similar_post.tags.add('django')
+        Comment.objects.create(
+            post=self.post, name='Reader', email='reader@example.com',
+            body='Nice one')
+        rebuild_similar_posts()
+        cache.get_cache().clear()
+
+    def without_csrf_tokens(self, response) -> str:
+        return CSRF_TOKEN_RE.sub(r'\g<1>\g<2>', response.content.decode())
+
+    def test_list_renders_like_sync_view(self):
+        """Test the async list renders the same page as the sync view."""
+        res = async_to_sync(self.client.get)('/blog/')
+        cache.get_cache().clear()
+        with override_settings(ROOT_URLCONF='myblog.urls'):
+            expected = Client().get('/blog/')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.without_csrf_tokens(res),
+                         self.without_csrf_tokens(expected))
+
+    async def test_list_by_tag(self):
+        """Test posts are filtered by an existing tag only."""
+        res = await self.client.get('/blog/tag/django/')
+        missing = await self.client.get('/blog/tag/missing/')
+
+        self.assertContains(res, 'Second post')
+        self.assertEqual(missing.status_code, 404)
+
+    async def test_detail_shows_comments_and_similar_posts(self):
+        """Test comments and similar posts are rendered."""
+        res = await self.client.get(self.post.get_absolute_url())
+
+        self.assertContains(res, 'Nice one')
+        self.assertContains(res, 'Second post')
+
+    async def test_parts_are_loaded_concurrently(self):
+        """Test parts of a page run at once, on threads of the pool."""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def part():
+            barrier.wait()
+            return threading.current_thread().name
+
+        names = await asyncio.gather(*(
+            async_views.run_in_thread(part) for _ in range(3)))
+
+        self.assertEqual(len(set(names)), 3)
+        self.assertTrue(all(name.startswith('blog-async')
+                            for name in names))
+
+    async def test_detail_of_missing_post(self):
+        """Test an unknown post is not found."""
+        res = await self.client.get('/blog/2000/01/01/missing/')
+
+        self.assertEqual(res.status_code, 404)
+
+    async def test_conditional_get(self):
+        """Test a matching ETag is answered with "304 Not Modified"."""
+        res = await self.client.get(self.post.get_absolute_url())
+        # The async client of Django 4.1 takes extra headers by name.
+        res = await self.client.get(self.post.get_absolute_url(),
+                                    **{'If-None-Match': res['ETag']})
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_posted_comment_is_handled_by_sync_view(self):
+        """Test forms posted to the async detail page are saved."""
+        res = Client().post(self.post.get_absolute_url(), {
+            'name': 'Writer', 'email': 'writer@example.com',
+            'body': 'Posted'})
+
+        self.assertEqual(res.status_code, 302)
+        self.assertTrue(Comment.objects.filter(body='Posted').exists())
@@ -0,0 +1,98 @@
+"""
+Tests for the blog cache.
+"""
+from django.contrib.auth.models import User
+from django.template import (
+    Context,
+    Template,
+)
+from django.test import (
+    TestCase,
+    Client,
+)
+from django.urls import reverse
+
+from blog import cache
+from blog.models import (
+    Post,
+    Comment,
+)
+
+
+class SidebarCacheTests(TestCase):
+    """Tests for the cached sidebar template tags."""
+
+    template = Template(
+        '{% load blog_tags %}'
+        '{% total_posts %}'
+        '{% show_latest_posts %}'
+        '{% show_mostly_commented_posts %}'
+    )
+
+    def setUp(self):
+        cache.get_cache().clear()
+        cache.reset_stats()
+        self.author = User.objects.create(username='author')
+        self.post = Post.objects.create(
+            title='First post', slug='first-post', author=self.author,
+            body='Body', status='published')
+
+    def render(self) -> str:
+        return self.template.render(Context())
+
+    def test_sidebar_is_served_from_cache(self):
+        """Test a second render does not query the database."""
+        self.render()
+
+        with self.assertNumQueries(0):
+            self.render()
+
+        self.assertEqual(cache.stats()['sidebar']['hits'], 3)
+        self.assertEqual(cache.stats()['sidebar']['misses'], 3)
+
+    def test_post_change_invalidates_sidebar(self):
+        """Test saving a post refreshes cached fragments."""
+        self.render()
+
+        Post.objects.create(
+            title='Second post', slug='second-post', author=self.author,
+            body='Body', status='published')
+
+        self.assertIn('Second post', self.render())
+
+    def test_comment_change_invalidates_sidebar(self):
+        """Test deleting a comment refreshes cached fragments."""
+        comment = Comment.objects.create(
+            post=self.post, name='Reader', email='reader@example.com',
+            body='Comment')
+        self.render()
+
+        comment.delete()
+
+        with self.assertNumQueries(3):
+            self.render()
+
+
+class CacheStatsViewTests(TestCase):
+    """Tests for the cache statistics endpoint."""
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_cache_stats_requires_staff(self):
+        """Test anonymous users are redirected to the admin login."""
+        res = self.client.get(reverse('blog:cache-stats'))
+
+        self.assertEqual(res.status_code, 302)
+
+    def test_cache_stats_for_staff(self):
+        """Test staff users receive the counters as JSON."""
+        cache.reset_stats()
+        cache.cached('sidebar', 'key', lambda: 1)
+        staff = User.objects.create(username='staff', is_staff=True)
+        self.client.force_login(staff)
+
+        res = self.client.get(reverse('blog:cache-stats'))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['sidebar']['misses'], 1)
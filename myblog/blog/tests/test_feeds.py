@@ -0,0 +1,133 @@
+"""
+Tests for the RSS and Atom feeds of posts.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import (
+    TestCase,
+    Client,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog import cache
+from blog.models import (
+    Post,
+    Comment,
+)
+
+
+class FeedTests(TestCase):
+    """Tests for feeds of all posts and of tags, in both formats."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.client = Client()
+        self.author = User.objects.create(username='author')
+        self.django_post = self.create_post('django-post', 'django')
+        self.python_post = self.create_post('python-post', 'python')
+
+    def create_post(self, slug: str, tag: str) -> Post:
+        post = Post.objects.create(
+            title=slug, slug=slug, author=self.author,
+            body=' '.join(['word'] * 40), status='published')
+        post.tags.add(tag)
+        return post
+
+    def test_formats_and_tags(self):
+        """Test RSS and Atom feeds list the posts of their tag."""
+        for name, content_type in (
+                ('blog:post-feed', 'application/rss+xml'),
+                ('blog:post-feed-atom', 'application/atom+xml')):
+            res = self.client.get(reverse(name))
+            self.assertTrue(res['Content-Type'].startswith(content_type))
+            self.assertContains(res, 'django-post')
+            self.assertContains(res, 'python-post')
+
+        for name in ('blog:post-feed-by-tag', 'blog:post-feed-atom-by-tag'):
+            res = self.client.get(reverse(name, args=['django']))
+            self.assertContains(res, 'django-post')
+            self.assertNotContains(res, 'python-post')
+            self.assertContains(res, 'My Blog: django')
+
+        res = self.client.get(reverse('blog:post-feed-by-tag',
+                                      args=['missing']))
+        self.assertEqual(res.status_code, 404)
+
+    def test_atom_feed_links_next_page(self):
+        """Test the Atom feed links to the next page of older posts."""
+        for number in range(5):
+            self.create_post(f'post-{number}', 'django')
+
+        res = self.client.get(reverse('blog:post-feed-atom'))
+
+        self.assertRegex(res.content.decode(),
+                         r'<link href="[^"]+/blog/feed/atom/\?cursor=\w+" '
+                         r'rel="next"/>')
+
+    def test_description_is_stored(self):
+        """Test the description is computed on save and shown as is."""
+        self.assertEqual(self.django_post.description,
+                         ' '.join(['word'] * 30) + ' …')
+
+        Post.objects.filter(pk=self.django_post.pk) \
+            .update(description='Stored description')
+        res = self.client.get(reverse('blog:post-feed'))
+
+        self.assertContains(res, 'Stored description')
+
+    def test_feed_is_cached_until_posts_change(self):
+        """Test a repeated poll only validates, until a post is edited."""
+        url = reverse('blog:post-feed-by-tag', args=['django'])
+        self.client.get(url)
+
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        self.django_post.title = 'Edited title'
+        self.django_post.save()
+        self.assertContains(self.client.get(url), 'Edited title')
+
+        Comment.objects.create(
+            post=self.django_post, name='Reader', email='r@example.com',
+            body='Comment')
+        self.assertNotEqual(self.client.get(url).status_code, 304)
+
+    def test_cached_feed_sets_no_csrf_cookie(self):
+        """Test a feed served from the cache carries no CSRF cookie."""
+        url = reverse('blog:post-feed')
+        rendered = self.client.get(url)
+        cached = self.client.get(url)
+
+        self.assertEqual(cached.content, rendered.content)
+        for res in (rendered, cached):
+            self.assertNotIn(settings.CSRF_COOKIE_NAME, res.cookies)
+
+    def test_items_are_shared_between_feeds(self):
+        """Test feeds serialize only posts not serialized by another."""
+        self.client.get(reverse('blog:post-feed'))
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('blog:post-feed-atom'))
+
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertNotIn('"blog_post"."description"', sql)
+
+    def test_full_bodies_are_not_loaded(self):
+        """Test feeds load the stored description, not bodies."""
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('blog:post-feed'))
+
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertIn('"blog_post"."description"', sql)
+        self.assertNotIn('"blog_post"."body"', sql)
+
+    def test_tag_change_refreshes_categories(self):
+        """Test items list tags added after they were cached."""
+        self.client.get(reverse('blog:post-feed'))
+
+        self.django_post.tags.add('web')
+
+        self.assertContains(self.client.get(reverse('blog:post-feed')),
+                            '<category>web</category>')
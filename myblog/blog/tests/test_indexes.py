@@ -0,0 +1,96 @@
+"""
+Tests for the indexes serving the hot queries, checked by EXPLAIN.
+"""
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import (
+    TestCase,
+    Client,
+)
+from django.utils import timezone
+
+from blog.models import (
+    Post,
+    Comment,
+)
+
+
+class IndexUsageTests(TestCase):
+    """Tests for the plans of queries filtering published posts."""
+
+    def setUp(self):
+        author = User.objects.create(username='author')
+        self.post = Post.objects.create(
+            title='Post', slug='post', author=author, body='Body',
+            status='published',
+            publish=timezone.make_aware(datetime(2026, 3, 14, 23, 30)))
+        Comment.objects.create(
+            post=self.post, name='Reader', email='r@example.com',
+            body='Comment')
+
+    def assertUsesIndex(self, queryset, index: str, *disabled: str):
+        """
+        Assert the plan of the queryset scans the index. Test tables are
+        tiny, so sequential scans and other disabled plans are ruled out.
+        """
+        with connection.cursor() as cursor:
+            for plan in ('seqscan', *disabled):
+                cursor.execute(f'SET LOCAL enable_{plan} = off')
+        plan = queryset.explain()
+
+        self.assertIn(index, plan)
+        self.assertNotIn('Filter:', plan)
+
+    def test_published_listing(self):
+        """Test listing published posts from the newest reads the index."""
+        self.assertUsesIndex(
+            Post.published.order_by('-publish', '-id')[:10],
+            'blog_post_published_idx')
+
+    def test_detail_lookup(self):
+        """Test the detail lookup is a range of the slug and date index."""
+        self.assertUsesIndex(
+            Post.published.published_on(2026, 3, 14).filter(slug='post')
+                          .order_by(),
+            'blog_post_published_slug_idx')
+
+    def test_active_comments(self):
+        """Test active comments of a post are read in order of creation."""
+        self.assertUsesIndex(
+            self.post.comments.filter(active=True),
+            'blog_comment_active_idx', 'sort')
+
+
+class PublishedOnTests(TestCase):
+    """Tests for filtering posts by their day of publication."""
+
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+
+    def create_post(self, slug: str, *publish) -> Post:
+        return Post.objects.create(
+            title=slug, slug=slug, author=self.author, body='Body',
+            status='published',
+            publish=timezone.make_aware(datetime(*publish)))
+
+    def test_day_bounds(self):
+        """Test posts from the first to the last moment of the day match."""
+        first = self.create_post('first', 2026, 3, 14, 0, 0)
+        last = self.create_post('last', 2026, 3, 14, 23, 59, 59, 999999)
+        self.create_post('before', 2026, 3, 13, 23, 59, 59, 999999)
+        self.create_post('after', 2026, 3, 15)
+
+        self.assertQuerysetEqual(
+            Post.published.published_on('2026', '03', '14'), [last, first])
+
+    def test_invalid_dates_match_nothing(self):
+        """Test invalid dates find no post and detail pages answer 404."""
+        post = self.create_post('post', 9999, 12, 31, 12)
+
+        self.assertQuerysetEqual(Post.published.published_on(2026, 2, 30), [])
+        self.assertQuerysetEqual(Post.published.published_on(9999, 12, 31),
+                                 [post])
+        self.assertEqual(
+            Client().get('/blog/2026/2/30/post/').status_code, 404)
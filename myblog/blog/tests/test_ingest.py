@@ -0,0 +1,253 @@
+"""
+Tests for the write-behind ingest of comments.
+"""
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    Client,
+    override_settings,
+)
+from django.urls import reverse
+
+from blog import (
+    cache,
+    ingest,
+    pagecache,
+)
+from blog.ingest import (
+    BufferFull,
+    CommentBuffer,
+    save_comments,
+)
+from blog.models import (
+    Post,
+    Comment,
+)
+
+
+def new_comment(post: Post, body: str = 'Comment',
+                active: bool = True) -> Comment:
+    return Comment(post=post, name='Reader', email='reader@example.com',
+                   body=body, active=active)
+
+
+class SaveCommentsTests(TestCase):
+    """Tests for `save_comments`."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        author = User.objects.create(username='author')
+        self.posts = [
+            Post.objects.create(title=f'Post {number}', slug=f'post-{number}',
+                                author=author, body='Body',
+                                status='published')
+            for number in range(2)
+        ]
+
+    def test_comments_are_inserted_and_counted_per_post(self):
+        """Test a batch is inserted with one counter update per post."""
+        comments = [new_comment(self.posts[0]) for _ in range(3)]
+        comments += [new_comment(self.posts[1]),
+                     new_comment(self.posts[1], active=False)]
+
+        # A savepoint and its release, the posts locked, the comments
+        # inserted and their posts counted.
+        with self.assertNumQueries(5):
+            with mock.patch('blog.pagecache.invalidate_post_pages'):
+                save_comments(comments)
+
+        self.assertEqual(Comment.objects.count(), 5)
+        self.assertEqual(
+            list(Post.objects.order_by('pk')
+                             .values_list('comment_count', flat=True)),
+            [3, 1])
+
+    def test_pages_of_commented_posts_are_invalidated(self):
+        """Test the pages of every commented post are invalidated once."""
+        namespace = pagecache.post_detail_namespace(
+            self.posts[0].publish, self.posts[0].slug)
+        version = cache.get_version(namespace)
+
+        with mock.patch('blog.pagecache.invalidate_post_pages',
+                        wraps=pagecache.invalidate_post_pages) as invalidate:
+            save_comments([new_comment(self.posts[0]) for _ in range(3)])
+
+        self.assertEqual(invalidate.call_count, 1)
+        self.assertNotEqual(cache.get_version(namespace), version)
+
+    def test_comments_of_deleted_posts_are_dropped(self):
+        """Test comments of posts deleted meanwhile are not inserted."""
+        comments = [new_comment(self.posts[0]), new_comment(self.posts[1])]
+        self.posts[1].delete()
+
+        with self.assertLogs('blog.ingest', 'WARNING'):
+            saved = save_comments(comments)
+
+        self.assertEqual(saved, comments[:1])
+        self.assertEqual(Comment.objects.count(), 1)
+
+
+class CommentBufferTests(TestCase):
+    """Tests for `CommentBuffer` without its background thread."""
+
+    def setUp(self):
+        author = User.objects.create(username='author')
+        self.post = Post.objects.create(
+            title='Post', slug='post', author=author, body='Body',
+            status='published')
+
+    def test_full_batch_is_flushed(self):
+        """Test comments are queued until a batch is full."""
+        buffer = CommentBuffer(max_size=10, batch_size=3)
+
+        for _ in range(2):
+            buffer.add(new_comment(self.post))
+        self.assertEqual((len(buffer), Comment.objects.count()), (2, 0))
+
+        buffer.add(new_comment(self.post))
+        self.assertEqual((len(buffer), Comment.objects.count()), (0, 3))
+
+    def test_full_queue_rejects_comments(self):
+        """Test adding to a full queue wakes the thread instead of
+        flushing, and rejects comments once the wait times out."""
+        buffer = CommentBuffer(max_size=2, batch_size=10, timeout=0.01)
+        buffer._thread = mock.Mock()
+
+        for _ in range(2):
+            buffer.add(new_comment(self.post))
+        with self.assertNumQueries(0):
+            with self.assertRaises(BufferFull):
+                buffer.add(new_comment(self.post))
+
+        self.assertTrue(buffer._wakeup.is_set())
+        self.assertEqual(len(buffer), 2)
+        buffer.flush()
+        buffer.add(new_comment(self.post))
+        self.assertEqual((len(buffer), Comment.objects.count()), (1, 2))
+
+    @override_settings(BLOG_COMMENT_BUFFER=True)
+    def test_full_queue_answers_service_unavailable(self):
+        """Test a comment rejected by a full queue is answered with 503."""
+        buffer = CommentBuffer(max_size=0, timeout=0)
+
+        with mock.patch('blog.ingest.get_buffer', return_value=buffer):
+            res = Client().post(self.post.get_absolute_url(), {
+                'name': 'Reader', 'email': 'reader@example.com',
+                'body': 'Rejected'})
+
+        self.assertEqual(res.status_code, 503)
+        self.assertIn('Retry-After', res.headers)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_failed_flush_queues_comments_again(self):
+        """Test comments of a failed batch are kept for the next flush."""
+        buffer = CommentBuffer(batch_size=10)
+        buffer.add(new_comment(self.post))
+
+        with mock.patch('blog.ingest.save_comments',
+                        side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                buffer.flush()
+
+        self.assertEqual(len(buffer), 1)
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_always_failing_batch_drops_failing_comments(self):
+        """Test a batch failing every attempt is saved by halves, without
+        the comments failing on their own."""
+        buffer = CommentBuffer(batch_size=10, attempts=2)
+        for number in range(5):
+            comment = new_comment(self.post, body=f'Comment {number}')
+            if number == 2:
+                # Longer than the column, so the batch always fails.
+                comment.name = 'Reader' * 20
+            buffer.add(comment)
+
+        for _ in range(2):
+            with self.assertRaises(DatabaseError):
+                buffer.flush()
+            self.assertEqual(len(buffer), 5)
+        with self.assertLogs('blog.ingest', 'ERROR'):
+            self.assertEqual(buffer.flush(), 5)
+
+        self.assertEqual(
+            list(Comment.objects.values_list('body', flat=True)),
+            ['Comment 0', 'Comment 1', 'Comment 3', 'Comment 4'])
+        self.assertEqual((len(buffer), buffer._size), (0, 0))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 4)
+
+    @override_settings(BLOG_COMMENT_BUFFER=True)
+    def test_posted_comments_are_queued(self):
+        """Test comments posted to the list are queued when enabled."""
+        buffer = CommentBuffer(batch_size=10)
+
+        with mock.patch('blog.ingest.get_buffer', return_value=buffer):
+            res = Client().post(reverse('blog:post-list'), {
+                'action': 'comment', 'post-id': self.post.pk,
+                'name': 'Reader', 'email': 'reader@example.com',
+                'body': 'Queued'})
+
+        self.assertEqual(res.status_code, 302)
+        self.assertFalse(Comment.objects.exists())
+        buffer.flush()
+        self.assertTrue(Comment.objects.filter(body='Queued').exists())
+
+    @override_settings(BLOG_COMMENT_BUFFER=False)
+    def test_disabled_buffer_saves_comments(self):
+        """Test comments are saved by their request by default."""
+        ingest.submit_comment(new_comment(self.post))
+
+        self.assertIsNone(ingest._buffer)
+        self.assertEqual(Comment.objects.count(), 1)
+
+
+class CommentBufferThreadTests(TransactionTestCase):
+    """Tests for flushes of the background thread."""
+    databases = '__all__'
+
+    def test_stop_flushes_queued_comments(self):
+        """Test comments are flushed by the thread and when it stops."""
+        author = User.objects.create(username='author')
+        post = Post.objects.create(
+            title='Post', slug='post', author=author, body='Body',
+            status='published')
+        buffer = CommentBuffer(batch_size=2, interval=60)
+        buffer.start()
+
+        for _ in range(3):
+            buffer.add(new_comment(post))
+        buffer.stop()
+
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(Comment.objects.count(), 3)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 3)
+
+    def test_full_queue_waits_for_the_thread(self):
+        """Test comments added to a full queue wait for the thread to make
+        room, from several threads at once."""
+        author = User.objects.create(username='author')
+        post = Post.objects.create(
+            title='Post', slug='post', author=author, body='Body',
+            status='published')
+        buffer = CommentBuffer(max_size=2, batch_size=10, interval=60,
+                               timeout=10)
+        buffer.start()
+
+        threads = [threading.Thread(target=buffer.add,
+                                    args=[new_comment(post)])
+                   for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        buffer.stop()
+
+        self.assertEqual(Comment.objects.count(), 6)
@@ -0,0 +1,179 @@
+"""
+Tests for the blog models.
+"""
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import (
+    Post,
+    Comment,
+)
+
+
+class CommentCountTests(TestCase):
+    """Tests for the denormalized `Post.comment_count` counter."""
+
+    def setUp(self):
+        author = User.objects.create(username='author')
+        self.post = Post.objects.create(
+            title='Post', slug='post', author=author, body='Body',
+            status='published')
+
+    def create_comment(self, **extra_fields) -> Comment:
+        return Comment.objects.create(
+            post=self.post, name='Reader', email='reader@example.com',
+            body='Comment', **extra_fields)
+
+    def assertCommentCount(self, expected: int):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, expected)
+
+    def test_creating_comments_updates_counter(self):
+        """Test only active comments are counted on create."""
+        self.create_comment()
+        self.create_comment(active=False)
+
+        self.assertCommentCount(1)
+
+    def test_toggling_active_updates_counter(self):
+        """Test (de)activating a loaded comment changes the counter."""
+        comment = self.create_comment()
+        comment = Comment.objects.get(pk=comment.pk)
+
+        comment.active = False
+        comment.save()
+        self.assertCommentCount(0)
+
+        comment.save()
+        self.assertCommentCount(0)
+
+        comment.active = True
+        comment.save()
+        self.assertCommentCount(1)
+
+    def test_deleting_comment_updates_counter(self):
+        """Test deleting an active comment decrements the counter."""
+        self.create_comment().delete()
+        self.create_comment(active=False).delete()
+
+        self.assertCommentCount(0)
+
+    def test_deleting_post_does_not_count_its_comments(self):
+        """Test comments deleted with their post update no counter."""
+        for _ in range(3):
+            self.create_comment()
+
+        with CaptureQueriesContext(connection) as context:
+            self.post.delete()
+
+        self.assertFalse(any(
+            query['sql'].startswith('UPDATE "blog_post"')
+            for query in context.captured_queries))
+        self.assertFalse(Comment.objects.exists())
+
+    def test_saving_uncounted_change_skips_counter(self):
+        """Test saves leaving the counter as it is update no post."""
+        comment = self.create_comment(active=False)
+        comment.body = 'Edited'
+
+        with CaptureQueriesContext(connection) as context:
+            comment.save()
+
+        self.assertFalse(any(
+            query['sql'].startswith('UPDATE "blog_post"')
+            for query in context.captured_queries))
+
+    def test_rebuild_comment_counts_command(self):
+        """Test the command recalculates counters from comments."""
+        self.create_comment()
+        self.create_comment()
+        Post.objects.update(comment_count=10)
+
+        call_command('rebuild_comment_counts', stdout=StringIO())
+
+        self.assertCommentCount(2)
+
+
+class PostBodyHtmlTests(TestCase):
+    """Tests for the stored rendered HTML of post bodies."""
+
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+
+    def test_saving_post_renders_body(self):
+        """Test the markdown body is rendered on save."""
+        post = Post.objects.create(
+            title='Post', slug='post', author=self.author, body='**Bold**')
+
+        self.assertEqual(post.body_html, '<p><strong>Bold</strong></p>')
+
+    def test_saving_body_with_update_fields_renders_body(self):
+        """Test the HTML is saved along with an updated body."""
+        post = Post.objects.create(
+            title='Post', slug='post', author=self.author, body='Old')
+
+        post.body = '*New*'
+        post.save(update_fields=['body'])
+        post.refresh_from_db()
+
+        self.assertEqual(post.body_html, '<p><em>New</em></p>')
+
+    def test_saving_other_fields_skips_rendering(self):
+        """Test saves leaving the body out of `update_fields` keep it
+        unrendered and unread."""
+        Post.objects.create(
+            title='Post', slug='post', author=self.author, body='Body')
+        post = Post.objects.defer('body').get()
+
+        with mock.patch('blog.models.render_markdown') as render:
+            post.status = 'published'
+            post.save(update_fields=['status'])
+
+        render.assert_not_called()
+        self.assertNotIn('body', post.__dict__)
+        self.assertEqual(Post.objects.get().body_html, '<p>Body</p>')
+
+    def test_render_markdown_command(self):
+        """Test the command fills in HTML of posts missing it."""
+        post = Post.objects.create(
+            title='Post', slug='post', author=self.author, body='# Title')
+        Post.objects.update(body_html='')
+
+        call_command('render_markdown', processes=1, stdout=StringIO())
+        post.refresh_from_db()
+
+        self.assertEqual(post.body_html, '<h1>Title</h1>')
+
+
+class PostSearchTests(TestCase):
+    """Tests for searching posts by the stored search vector."""
+
+    def setUp(self):
+        author = User.objects.create(username='author')
+        self.post = Post.objects.create(
+            title='Django tips', slug='django-tips', author=author,
+            body='Querying a database.', status='published')
+        Post.objects.create(
+            title='Django draft', slug='django-draft', author=author,
+            body='Not ready yet.')
+
+    def test_search_vector_is_maintained(self):
+        """Test the search vector is updated along with the body."""
+        self.post.body = 'Deploying with docker.'
+        self.post.save()
+
+        self.assertQuerysetEqual(
+            Post.objects.search('docker', min_rank=0), [self.post])
+        self.assertQuerysetEqual(
+            Post.objects.search('database', min_rank=0), [])
+
+    def test_published_search_skips_drafts(self):
+        """Test searching published posts does not return drafts."""
+        self.assertQuerysetEqual(Post.published.search('django'),
+                                 [self.post])
@@ -0,0 +1,120 @@
+"""
+Tests for bulk moderation of posts and comments.
+"""
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from blog import (
+    cache,
+    pagecache,
+)
+from blog.models import (
+    Post,
+    Comment,
+    SimilarPost,
+    TagStats,
+)
+from blog.moderation import (
+    set_comments_active,
+    set_post_status,
+)
+from blog.paginators import (
+    EstimatedCountPaginator,
+    estimate_count,
+)
+from blog.similarity import get_similar_posts
+
+
+class ModerationTests(TestCase):
+    """Tests for `set_post_status` and `set_comments_active`."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        author = User.objects.create(username='author')
+        self.posts = []
+        for number in range(3):
+            post = Post.objects.create(
+                title=f'Post {number}', slug=f'post-{number}', author=author,
+                body='Body', status='published' if number else 'draft')
+            post.tags.add('django')
+            self.posts.append(post)
+
+    def test_posts_are_published_in_one_update(self):
+        """Test only changed posts are updated and counted in tag stats."""
+        namespace = pagecache.post_detail_namespace(
+            self.posts[0].publish, self.posts[0].slug)
+        version = cache.get_version(namespace)
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(
+                set_post_status(Post.objects.all(), 'published'), 1)
+
+        self.assertEqual(len([
+            query for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "blog_post"')]), 1)
+
+        self.assertEqual(Post.published.count(), 3)
+        self.assertEqual(TagStats.objects.get().post_count, 3)
+        self.assertNotEqual(cache.get_version(namespace), version)
+
+        self.assertEqual(set_post_status(Post.objects.all(), 'draft'), 3)
+        self.assertEqual(TagStats.objects.get().post_count, 0)
+
+    def test_published_posts_become_similar(self):
+        """Test posts published in bulk enter lists of similar posts."""
+        set_post_status(Post.objects.filter(pk=self.posts[0].pk),
+                        'published')
+        self.assertIn(self.posts[0], get_similar_posts(self.posts[1]))
+        self.assertEqual(len(get_similar_posts(self.posts[0])), 2)
+
+        set_post_status(Post.objects.filter(pk=self.posts[0].pk), 'draft')
+        self.assertNotIn(self.posts[0], get_similar_posts(self.posts[1]))
+        self.assertFalse(SimilarPost.objects.filter(
+            post=self.posts[0]).exists())
+
+    def test_comments_are_moderated_and_counted(self):
+        """Test comment counters of posts follow bulk moderation."""
+        post = self.posts[1]
+        for number in range(3):
+            Comment.objects.create(post=post, name='Reader',
+                                   email='reader@example.com',
+                                   body=f'Comment {number}')
+
+        self.assertEqual(set_comments_active(Comment.objects.all(), False), 3)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+
+        approved = Comment.objects.filter(body='Comment 0')
+        self.assertEqual(set_comments_active(approved, True), 1)
+        self.assertEqual(set_comments_active(approved, True), 0)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    """Tests for counting pages by estimates of the planner."""
+
+    def test_small_lists_are_counted_exactly(self):
+        """Test lists expected to be small are counted exactly."""
+        paginator = EstimatedCountPaginator(Comment.objects.all(), 10)
+
+        self.assertEqual(paginator.count, 0)
+
+    def test_empty_querysets_are_counted(self):
+        """Test querysets which cannot match rows count none."""
+        paginator = EstimatedCountPaginator(
+            Comment.objects.filter(pk__in=[]), 10)
+        paginator.exact_count_limit = 0
+
+        self.assertEqual(paginator.count, 0)
+
+    def test_large_lists_are_estimated(self):
+        """Test lists expected to be large are not counted."""
+        paginator = EstimatedCountPaginator(Comment.objects.all(), 10)
+        paginator.exact_count_limit = 0
+        estimate = estimate_count(Comment.objects.all())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, estimate)
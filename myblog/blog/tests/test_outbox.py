@@ -0,0 +1,180 @@
+"""
+Tests for the outbox of shared emails.
+"""
+from io import StringIO
+from smtplib import (
+    SMTPException,
+    SMTPServerDisconnected,
+)
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import (
+    TestCase,
+    Client,
+    override_settings,
+)
+from django.utils import timezone
+
+from blog.models import (
+    Post,
+    QueuedEmail,
+)
+from blog.outbox import (
+    enqueue_email,
+    send_queued_emails,
+)
+
+
+class FailingEmailBackend(EmailBackend):
+    """Email backend whose server rejects every message."""
+
+    def send_messages(self, messages):
+        raise SMTPException('Service not available')
+
+
+class UnreachableEmailBackend(EmailBackend):
+    """Email backend whose server cannot be connected to."""
+
+    def open(self):
+        raise ConnectionRefusedError('Connection refused')
+
+
+class DisconnectingEmailBackend(EmailBackend):
+    """Email backend whose server disconnects after the first message."""
+
+    def send_messages(self, messages):
+        if mail.outbox:
+            raise SMTPServerDisconnected('Connection unexpectedly closed')
+        return super(DisconnectingEmailBackend, self).send_messages(messages)
+
+
+class CountingEmailBackend(EmailBackend):
+    """Email backend counting the opened connections."""
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return super(CountingEmailBackend, self).open()
+
+
+class OutboxTests(TestCase):
+    """Tests for queueing and sending shared emails."""
+
+    def setUp(self):
+        CountingEmailBackend.opened = 0
+
+    def enqueue(self, sender: str = 'reader@example.com',
+                client: str = '192.0.2.1') -> QueuedEmail:
+        return enqueue_email(
+            sender=sender, subject='Read this', message='Link',
+            from_email='admin@myblog.com', recipient='friend@example.com',
+            client=client)
+
+    def test_share_form_queues_email(self):
+        """Test sharing a post queues the email instead of sending it."""
+        author = User.objects.create(username='author')
+        post = Post.objects.create(
+            title='Post', slug='post', author=author, body='Body',
+            status='published')
+
+        res = Client(REMOTE_ADDR='192.0.2.1').post(post.get_absolute_url(), {
+            'name': 'Reader', 'email': 'reader@example.com',
+            'to': 'friend@example.com', 'comments': 'Look'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.sender, 'reader@example.com')
+        self.assertEqual(email.recipient, 'friend@example.com')
+        self.assertEqual(email.client, '192.0.2.1')
+
+    def test_batch_is_sent_over_one_connection(self):
+        """Test due emails are sent and marked sent."""
+        for _ in range(3):
+            self.enqueue()
+
+        counts = send_queued_emails(connection=CountingEmailBackend())
+
+        self.assertEqual(counts, {'sent': 3})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertFalse(QueuedEmail.objects.exclude(status='sent').exists())
+
+    @override_settings(BLOG_OUTBOX_RETRY_DELAY=60,
+                       BLOG_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_emails_are_retried_with_backoff(self):
+        """Test failures are postponed and given up after max attempts."""
+        email = self.enqueue()
+
+        counts = send_queued_emails(connection=FailingEmailBackend())
+        email.refresh_from_db()
+
+        self.assertEqual(counts, {'retried': 1})
+        self.assertEqual(email.status, 'pending')
+        self.assertGreater(email.next_attempt, timezone.now())
+        self.assertIn('Service not available', email.last_error)
+
+        QueuedEmail.objects.update(next_attempt=timezone.now())
+        counts = send_queued_emails(connection=FailingEmailBackend())
+        email.refresh_from_db()
+
+        self.assertEqual(counts, {'failed': 1})
+        self.assertEqual(email.status, 'failed')
+
+    @override_settings(BLOG_OUTBOX_RATE_LIMIT=2)
+    def test_client_rate_limit_defers_emails(self):
+        """Test emails over the limit of a client wait for the window,
+        whatever addresses its reader gives."""
+        for number in range(3):
+            self.enqueue(sender=f'reader{number}@example.com')
+        self.enqueue(client='192.0.2.2')
+
+        counts = send_queued_emails()
+
+        self.assertEqual(counts, {'sent': 3, 'deferred': 1})
+        deferred = QueuedEmail.objects.get(status='pending')
+        self.assertEqual(deferred.client, '192.0.2.1')
+        self.assertEqual(deferred.attempts, 0)
+        self.assertEqual(send_queued_emails(), {})
+
+    def test_unreachable_server_postpones_batch(self):
+        """Test a failed connection postpones emails keeping attempts."""
+        for _ in range(2):
+            self.enqueue()
+
+        with self.assertLogs('blog.outbox', 'WARNING'):
+            counts = send_queued_emails(connection=UnreachableEmailBackend())
+
+        self.assertEqual(counts, {'postponed': 2})
+        for email in QueuedEmail.objects.all():
+            self.assertEqual((email.status, email.attempts), ('pending', 0))
+            self.assertGreater(email.next_attempt, timezone.now())
+            self.assertIn('Connection refused', email.last_error)
+
+    def test_disconnection_stops_batch(self):
+        """Test emails left after a dropped connection are postponed."""
+        for _ in range(3):
+            self.enqueue()
+
+        with self.assertLogs('blog.outbox', 'WARNING'):
+            counts = send_queued_emails(
+                connection=DisconnectingEmailBackend())
+
+        self.assertEqual(counts, {'sent': 1, 'postponed': 2})
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(QueuedEmail.objects.filter(attempts__gt=1)
+                                            .exists())
+        self.assertEqual(
+            QueuedEmail.objects.filter(status='pending', attempts=0).count(),
+            2)
+
+    def test_send_queued_emails_command(self):
+        """Test the command drains the outbox."""
+        self.enqueue()
+
+        call_command('send_queued_emails', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
@@ -0,0 +1,201 @@
+"""
+Tests for the full-page cache of anonymous GETs.
+"""
+import re
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import (
+    TestCase,
+    Client,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+
+from blog import cache
+from blog.models import (
+    Post,
+    Comment,
+)
+
+
+class PageCacheTests(TestCase):
+    """Tests for caching and invalidating pages."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.client = Client()
+        self.author = User.objects.create(username='author')
+        self.django_post = self.create_post('django-post', 'django')
+        self.python_post = self.create_post('python-post', 'python')
+
+    def create_post(self, slug: str, tag: str) -> Post:
+        post = Post.objects.create(
+            title=slug, slug=slug, author=self.author, body='Body',
+            status='published')
+        post.tags.add(tag)
+        return post
+
+    def assertCached(self, url: str):
+        # The only query left is the one of the conditional GET validators.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def assertNotCached(self, url: str):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        self.assertGreater(len(context.captured_queries), 1,
+                           f'{url} was served from the cache.')
+
+    def test_anonymous_pages_are_cached(self):
+        """Test a second GET of a page does not query the database."""
+        for url in (reverse('blog:post-list'),
+                    reverse('blog:post-list-by-tag', args=['django']),
+                    self.django_post.get_absolute_url()):
+            self.client.get(url)
+            self.assertCached(url)
+
+    def test_cached_page_has_token_of_current_reader(self):
+        """Test forms of a cached page pass the CSRF check of any reader."""
+        url = self.django_post.get_absolute_url()
+        self.client.get(url)
+
+        reader = Client(enforce_csrf_checks=True)
+        res = reader.get(url)
+        token = re.search(
+            r'name="csrfmiddlewaretoken" value="([^"]+)"',
+            res.content.decode()).group(1)
+        res = reader.post(url, {'csrfmiddlewaretoken': token})
+
+        self.assertEqual(res.status_code, 200)
+
+    def test_comment_invalidates_only_pages_showing_it(self):
+        """Test a comment invalidates pages of its post and lists only."""
+        django_url = self.django_post.get_absolute_url()
+        python_url = self.python_post.get_absolute_url()
+        django_tag_url = reverse('blog:post-list-by-tag', args=['django'])
+        python_tag_url = reverse('blog:post-list-by-tag', args=['python'])
+        for url in (django_url, python_url, django_tag_url, python_tag_url):
+            self.client.get(url)
+
+        Comment.objects.create(
+            post=self.django_post, name='Reader', email='r@example.com',
+            body='Comment')
+
+        self.assertNotCached(django_url)
+        self.assertNotCached(django_tag_url)
+        self.assertNotCached(reverse('blog:post-list'))
+        self.assertCached(python_url)
+        self.assertCached(python_tag_url)
+
+    def test_post_delete_invalidates_pages_once(self):
+        """Test comments deleted with their post do not look it up again."""
+        Comment.objects.bulk_create(
+            Comment(post=self.django_post, name='Reader',
+                    email='r@example.com', body='Comment', active=False)
+            for _ in range(5))
+        url = reverse('blog:post-list')
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as context:
+            self.django_post.delete()
+
+        self.assertFalse([query for query in context.captured_queries
+                          if query['sql'].startswith('SELECT')
+                          and 'FROM "blog_post"' in query['sql']])
+        self.assertNotCached(url)
+
+    def test_tag_change_invalidates_tag_pages(self):
+        """Test tagging a post invalidates the page of the tag."""
+        url = reverse('blog:post-list-by-tag', args=['python'])
+        self.client.get(url)
+
+        self.django_post.tags.add('python')
+
+        self.assertContains(self.client.get(url), 'django-post')
+
+    def test_authenticated_users_bypass_cache(self):
+        """Test logged in users always get a freshly rendered page."""
+        url = reverse('blog:post-list')
+        self.client.get(url)
+        self.client.force_login(self.author)
+
+        self.assertNotCached(url)
+
+
+class ConditionalGetTests(TestCase):
+    """Tests for ETag validation."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.client = Client()
+        self.author = User.objects.create(username='author')
+        self.post = Post.objects.create(
+            title='Post', slug='post', author=self.author, body='Body',
+            status='published')
+        self.urls = (
+            reverse('blog:post-list'),
+            reverse('blog:post-list-by-tag', args=['django']),
+            self.post.get_absolute_url(),
+            reverse('blog:post-feed'),
+            reverse('django.contrib.sitemaps.views.index'),
+            reverse('django.contrib.sitemaps.views.sitemap',
+                    args=['posts']),
+        )
+        self.post.tags.add('django')
+
+    def test_responses_carry_validators(self):
+        """Test every endpoint sends an ETag."""
+        for url in self.urls:
+            res = self.client.get(url)
+
+            self.assertEqual(res.status_code, 200)
+            self.assertIn('ETag', res.headers)
+
+    def test_not_modified_with_one_query(self):
+        """Test a matching validator is answered with a single query."""
+        for url in self.urls:
+            res = self.client.get(url)
+
+            with self.assertNumQueries(1):
+                not_modified = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=res.headers['ETag'])
+            self.assertEqual(not_modified.status_code, 304)
+
+    def test_changes_invalidate_validators(self):
+        """Test a new comment and a deleted post change the ETag."""
+        etags = {url: self.client.get(url).headers['ETag']
+                 for url in self.urls}
+
+        Comment.objects.create(
+            post=self.post, name='Reader', email='r@example.com',
+            body='Comment')
+        for url in self.urls[:3]:
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(res.status_code, 200)
+
+        other = Post.objects.create(
+            title='Other', slug='other', author=self.author, body='Body',
+            status='published')
+        etags = {url: self.client.get(url).headers['ETag']
+                 for url in self.urls}
+        other.delete()
+        for url in self.urls:
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(res.status_code, 200)
+
+    def test_deleted_newest_post_is_modified_since(self):
+        """Test deleting the newest post is not answered "304 Not Modified"
+        to a reader sending only If-Modified-Since."""
+        newest = Post.objects.create(
+            title='Newest', slug='newest', author=self.author, body='Body',
+            status='published')
+        since = http_date(newest.updated.timestamp())
+        for url in self.urls:
+            self.client.get(url)
+
+        newest.delete()
+        for url in self.urls:
+            res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+            self.assertEqual(res.status_code, 200)
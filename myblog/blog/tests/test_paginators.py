@@ -0,0 +1,104 @@
+"""
+Tests for the keyset paginator.
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import (
+    TestCase,
+    Client,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Post
+from blog.paginators import (
+    KeysetPaginator,
+    decode_cursor,
+)
+
+
+class KeysetPaginatorTests(TestCase):
+    """Tests for `KeysetPaginator`."""
+
+    def setUp(self):
+        author = User.objects.create(username='author')
+        now = timezone.now()
+        # Pairs of posts share a publish date to exercise the id tiebreaker.
+        self.posts = [
+            Post.objects.create(
+                title=f'Post {number}', slug=f'post-{number}', author=author,
+                body='Body', status='published',
+                publish=now - timedelta(days=number // 2))
+            for number in range(7)
+        ]
+        self.expected = sorted(
+            self.posts, key=lambda post: (post.publish, post.id), reverse=True)
+        self.paginator = KeysetPaginator(Post.published.all(), 3)
+
+    def test_walking_forward_and_back(self):
+        """Test following cursors visits every post once, in order."""
+        first = self.paginator.page()
+        second = self.paginator.page(first.next_cursor)
+        third = self.paginator.page(second.next_cursor)
+
+        self.assertEqual(list(first) + list(second) + list(third),
+                         self.expected)
+        self.assertFalse(first.has_previous())
+        self.assertFalse(third.has_next())
+
+        back = self.paginator.page(third.previous_cursor)
+        self.assertEqual(list(back), list(second))
+        self.assertEqual(list(self.paginator.page(back.previous_cursor)),
+                         list(first))
+
+    def test_malformed_cursor_returns_first_page(self):
+        """Test an invalid cursor falls back to the first page."""
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        self.assertEqual(list(self.paginator.page('not-a-cursor')),
+                         self.expected[:3])
+
+    def test_page_does_not_count_rows(self):
+        """Test a page is fetched with a single query without COUNT."""
+        cursor = self.paginator.page().next_cursor
+
+        with self.assertNumQueries(1) as context:
+            list(self.paginator.page(cursor))
+
+        self.assertNotIn('COUNT', context.captured_queries[0]['sql'])
+
+
+@override_settings(BLOG_PAGINATION='cursor')
+class CursorPaginationViewTests(TestCase):
+    """Tests for the cursor based post list."""
+
+    def setUp(self):
+        self.client = Client()
+        author = User.objects.create(username='author')
+        for number in range(12):
+            Post.objects.create(
+                title=f'Post {number}', slug=f'post-{number}', author=author,
+                body='Body', status='published')
+
+    def test_post_list_links_next_cursor(self):
+        """Test the list renders a cursor link to the older posts."""
+        res = self.client.get(reverse('blog:post-list'))
+
+        next_cursor = res.context['posts'].next_cursor
+        self.assertContains(res, f'?cursor={next_cursor}')
+        res = self.client.get(reverse('blog:post-list'),
+                              {'cursor': next_cursor})
+        self.assertEqual(len(res.context['posts']), 2)
+
+    def test_page_number_uses_classic_pagination(self):
+        """Test requesting a page number keeps numbered pages."""
+        res = self.client.get(reverse('blog:post-list'), {'page': 2})
+
+        self.assertEqual(res.context['posts'].number, 2)
+
+    def test_feed_links_next_page(self):
+        """Test the feed links to the next page of older posts."""
+        res = self.client.get(reverse('blog:post-feed'))
+
+        self.assertContains(res, 'rel="next"')
@@ -0,0 +1,137 @@
+"""
+Tests for the per-request profiling middleware.
+"""
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    Client,
+    RequestFactory,
+    override_settings,
+)
+from django.urls import reverse
+
+from blog import (
+    cache,
+    profiling,
+)
+from blog.async_views import run_in_thread
+from blog.models import (
+    Post,
+    Comment,
+)
+
+
+@override_settings(BLOG_PROFILING=True)
+class ProfilingMiddlewareTests(TestCase):
+    """Tests for profiles of requests served by the views."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        profiling.reset_history()
+        self.client = Client()
+        author = User.objects.create(username='author')
+        self.posts = []
+        for number in range(3):
+            post = Post.objects.create(
+                title=f'Post {number}', slug=f'post-{number}',
+                author=author, body='**Body**', status='published')
+            post.tags.add('django', f'tag-{number}')
+            Comment.objects.create(
+                post=post, name='Reader', email='r@example.com',
+                body='Comment')
+            self.posts.append(post)
+
+    def test_server_timing_header(self):
+        """Test a rendered page reports database, template and markdown."""
+        res = self.client.get(reverse('blog:post-list'))
+
+        timing = res.headers['Server-Timing']
+        for metric in ('total;dur=', 'db;dur=', 'template;dur=',
+                       'markdown;dur=', 'sidebar;dur='):
+            self.assertIn(metric, timing)
+
+    def test_history_records_requests(self):
+        """Test profiles of the latest requests are kept, newest first."""
+        with override_settings(BLOG_PROFILING_HISTORY=2):
+            for url in (self.posts[0].get_absolute_url(),
+                        reverse('blog:post-list'),
+                        reverse('blog:post-list-by-tag', args=['tag-1'])):
+                self.client.get(url)
+
+        requests = profiling.history()
+
+        self.assertEqual([request['view'] for request in requests],
+                         ['blog:post-list-by-tag', 'blog:post-list'])
+        self.assertGreater(requests[0]['queries'], 0)
+        self.assertEqual(requests[0]['spans']['markdown']['calls'], 1)
+
+    def test_read_views_do_not_repeat_queries(self):
+        """Test no query is repeated per post on lists and details."""
+        for url in (reverse('blog:post-list'),
+                    reverse('blog:post-list-by-tag', args=['django']),
+                    self.posts[0].get_absolute_url()):
+            self.client.get(url)
+
+        for request in profiling.history():
+            self.assertEqual(request['repeated'], [], request['path'])
+
+    def test_repeated_queries_are_logged(self):
+        """Test a view running the same query again and again is logged."""
+        def view(request):
+            for post in self.posts * 2:
+                Post.objects.get(pk=post.pk)
+            return HttpResponse()
+
+        middleware = profiling.ProfilingMiddleware(view)
+        with self.assertLogs('blog.profiling', 'WARNING') as logs:
+            res = middleware(RequestFactory().get('/n-plus-one/'))
+
+        self.assertIn('6 queries, 3 duplicated', res.headers['Server-Timing'])
+        self.assertIn('ran the same query 6 times', logs.output[0])
+
+    def test_request_stats_requires_staff(self):
+        """Test only staff users see the profiles."""
+        url = reverse('blog:request-stats')
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(
+            User.objects.create(username='staff', is_staff=True))
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.json()['enabled'])
+        self.assertEqual(res.json()['requests'][0]['status'], 302)
+
+
+class DisabledProfilingTests(TestCase):
+    """Tests for requests with profiling disabled."""
+
+    def test_middleware_is_not_used(self):
+        """Test the middleware removes itself and sends no header."""
+        with self.assertRaises(MiddlewareNotUsed):
+            profiling.ProfilingMiddleware(lambda request: HttpResponse())
+
+        res = Client().get(reverse('blog:post-list'))
+
+        self.assertNotIn('Server-Timing', res.headers)
+
+
+@override_settings(BLOG_PROFILING=True, BLOG_DATABASE_REPLICAS=[])
+class AsyncProfilingTests(TransactionTestCase):
+    """Tests for profiles of async requests."""
+
+    def test_queries_on_other_threads_are_recorded(self):
+        """Test queries run by worker threads of async views count."""
+        async def view(request):
+            await run_in_thread(Post.objects.count)
+            await run_in_thread(Post.objects.count)
+            return HttpResponse()
+
+        middleware = profiling.ProfilingMiddleware(view)
+        res = async_to_sync(middleware)(RequestFactory().get('/'))
+
+        self.assertIn('2 queries, 1 duplicated', res.headers['Server-Timing'])
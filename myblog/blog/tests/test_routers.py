@@ -0,0 +1,176 @@
+"""
+Tests for routing reads to database replicas.
+"""
+import threading
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (
+    SimpleTestCase,
+    TransactionTestCase,
+    Client,
+    RequestFactory,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from taggit.models import Tag
+
+from blog.models import (
+    Post,
+    Comment,
+)
+from blog.routers import (
+    PIN_COOKIE,
+    ReplicaPinMiddleware,
+    ReplicaRouter,
+    RequestState,
+    _state,
+)
+
+REPLICAS = ['replica1', 'replica2']
+
+
+@override_settings(BLOG_DATABASE_REPLICAS=REPLICAS)
+class ReplicaRouterTests(SimpleTestCase):
+    """Tests for the decisions of the router."""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        for alias in REPLICAS:
+            self.router.health.set(alias, True)
+        # Decisions are made as in a request, unless a test serves one.
+        self.addCleanup(_state.reset, _state.set(RequestState()))
+
+    def reads(self, count: int = 4) -> list:
+        return [self.router.db_for_read(model)
+                for model in (Post, Tag, Comment, Post)[:count]]
+
+    def serve(self, view, cookies: dict = None) -> HttpResponse:
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies or {})
+        return ReplicaPinMiddleware(view)(request)
+
+    def test_reads_go_to_replicas_in_turn(self):
+        """Test blog and tag reads alternate over replicas."""
+        self.assertEqual(self.reads(), REPLICAS * 2)
+        self.assertIsNone(self.router.db_for_read(User))
+
+    def test_reads_outside_requests_use_primary(self):
+        """Test reads of threads serving no request, like the comment
+        buffer or commands, use the primary which they write to."""
+        decisions = []
+        thread = threading.Thread(
+            target=lambda: decisions.extend(self.reads(2)))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(decisions, ['default', 'default'])
+
+    def test_unhealthy_replicas_are_skipped(self):
+        """Test reads skip a failing replica, or fall back to the primary."""
+        self.router.health.set('replica1', False)
+        self.assertEqual(self.reads(2), ['replica2', 'replica2'])
+
+        self.router.health.set('replica2', False)
+        self.assertEqual(self.reads(2), ['default', 'default'])
+
+    def test_related_reads_follow_instance(self):
+        """Test objects related to an instance are read where it was."""
+        post = Post()
+        post._state.db = 'replica2'
+        self.router.db_for_read(Post)
+
+        self.assertEqual(
+            self.router.db_for_read(Comment, instance=post), 'replica2')
+
+    def test_writes_go_to_primary(self):
+        """Test writes, and reads of a request after it wrote, use the
+        primary."""
+        def view(request):
+            decisions = self.reads(1)
+            decisions.append(self.router.db_for_write(Comment))
+            decisions.extend(self.reads(2))
+            return HttpResponse(' '.join(decisions))
+
+        res = self.serve(view)
+
+        self.assertEqual(res.content.decode(),
+                         'replica1 default default default')
+        self.assertEqual(res.cookies[PIN_COOKIE]['max-age'],
+                         settings.BLOG_REPLICA_PIN_SECONDS)
+
+    def test_pinned_requests_read_primary(self):
+        """Test a request following a write reads its writes."""
+        def view(request):
+            return HttpResponse(' '.join(self.reads(2)))
+
+        pinned = self.serve(view, {PIN_COOKIE: '1'})
+        unpinned = self.serve(view)
+
+        self.assertEqual(pinned.content.decode(), 'default default')
+        self.assertEqual(unpinned.content.decode(), 'replica1 replica2')
+        self.assertNotIn(PIN_COOKIE, unpinned.cookies)
+
+    def test_replicas_are_not_migrated(self):
+        """Test migrations only run on the primary."""
+        self.assertIs(self.router.allow_migrate('replica1', 'blog'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'blog'))
+
+    @override_settings(BLOG_DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        """Test reads are not routed without replicas."""
+        self.assertEqual(self.reads(2), [None, None])
+
+
+@skipUnless(settings.BLOG_DATABASE_REPLICAS,
+            'Set DB_REPLICAS to run tests with replica aliases.')
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Tests for requests served with replica aliases mirroring the test
+    database, e.g. DB_REPLICAS=localhost,localhost.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = Client()
+        author = User.objects.create(username='author')
+        self.post = Post.objects.create(
+            title='Post', slug='post', author=author, body='Body',
+            status='published')
+
+    def get_counting_queries(self, url: str) -> dict:
+        """Request the page and return numbers of queries per database."""
+        contexts = {alias: CaptureQueriesContext(connections[alias])
+                    for alias in connections}
+        for context in contexts.values():
+            context.__enter__()
+        try:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        finally:
+            for context in contexts.values():
+                context.__exit__(None, None, None)
+        return {alias: len(context.captured_queries)
+                for alias, context in contexts.items()}
+
+    def test_reads_after_a_write_use_primary(self):
+        """Test pages read replicas, unless the reader just wrote."""
+        url = self.post.get_absolute_url()
+        queries = self.get_counting_queries(url)
+        self.assertGreater(
+            sum(queries[alias] for alias in settings.BLOG_DATABASE_REPLICAS),
+            0)
+
+        res = self.client.post(reverse('blog:post-list'), {
+            'action': 'comment', 'post-id': self.post.pk, 'name': 'Reader',
+            'email': 'r@example.com', 'body': 'Comment'})
+        self.assertIn(PIN_COOKIE, res.cookies)
+
+        queries = self.get_counting_queries(url)
+        self.assertGreater(queries['default'], 0)
+        self.assertEqual(
+            sum(queries[alias] for alias in settings.BLOG_DATABASE_REPLICAS),
+            0)
@@ -0,0 +1,110 @@
+"""
+Tests for the cached post search.
+"""
+from django.contrib.auth.models import User
+from django.test import (
+    TestCase,
+    Client,
+    override_settings,
+)
+from django.urls import reverse
+
+from blog import (
+    cache,
+    search,
+)
+from blog.models import Post
+
+
+class SearchCacheTests(TestCase):
+    """Tests for caching ranked search results."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        search.invalidate()
+        self.author = User.objects.create(username='author')
+        self.posts = [
+            Post.objects.create(
+                title=f'Django post {number}', slug=f'django-{number}',
+                author=self.author, body='Body', status='published')
+            for number in range(3)
+        ]
+
+    def test_normalize_query(self):
+        """Test case and whitespace differences are ignored."""
+        self.assertEqual(search.normalize_query('  Django \t Tips '),
+                         'django tips')
+
+    def test_equivalent_queries_are_cached(self):
+        """Test a normalized query is served without the database."""
+        ranks = search.search_post_ranks('django')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(search.search_post_ranks(' DJANGO '), ranks)
+
+    def test_post_change_invalidates_results(self):
+        """Test saving a post refreshes cached results."""
+        search.search_post_ranks('django')
+
+        Post.objects.create(
+            title='Another django post', slug='another', author=self.author,
+            body='Body', status='published')
+
+        self.assertEqual(search.search_post_ranks('django')[1], 4)
+
+    @override_settings(BLOG_SEARCH_CACHED_RESULTS=2)
+    def test_only_first_results_are_cached(self):
+        """Test ranks past the cached ones are searched live."""
+        ranks, count = search.search_post_ranks('django')
+        self.assertEqual((len(ranks), count), (2, 3))
+
+        results = search.SearchResults('django')
+        self.assertEqual(len(results), 3)
+        with self.assertNumQueries(3):
+            self.assertEqual(len(results[0:2]), 2)
+        # The ranks, then posts with their comments and tags.
+        with self.assertNumQueries(4):
+            last = results[2:3]
+
+        self.assertEqual(
+            {post.pk for post in results[0:2] + last},
+            {post.pk for post in self.posts})
+
+    def test_slicing_results_loads_only_the_slice(self):
+        """Test a page of results is hydrated with a single query."""
+        results = search.SearchResults('django')
+
+        # One query for posts, two for prefetched comments and tags.
+        with self.assertNumQueries(3):
+            page = results[1:2]
+
+        self.assertEqual(len(page), 1)
+        self.assertEqual(page[0].id, results.ranks[1][0])
+        self.assertEqual(results.count, 3)
+        self.assertEqual(page[0].rank, results.ranks[1][1])
+
+
+class SearchViewTests(TestCase):
+    """Tests for searching posts on the post list."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        search.invalidate()
+        self.client = Client()
+        author = User.objects.create(username='author')
+        for number in range(12):
+            Post.objects.create(
+                title=f'Django post {number}', slug=f'django-{number}',
+                author=author, body='Body', status='published')
+
+    def test_search_results_are_paginated(self):
+        """Test pages of results keep the query in their links."""
+        res = self.client.get(reverse('blog:post-list'), {'query': 'django'})
+
+        self.assertEqual(len(res.context['posts']), 10)
+        self.assertContains(res, '?page=2&amp;query=django')
+
+        res = self.client.get(reverse('blog:post-list'),
+                              {'query': 'django', 'page': 2})
+
+        self.assertEqual(len(res.context['posts']), 2)
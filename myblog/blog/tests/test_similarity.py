@@ -0,0 +1,116 @@
+"""
+Tests for the precomputed similar posts.
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.utils import timezone
+
+from blog.models import (
+    Post,
+    SimilarPost,
+)
+from blog.similarity import (
+    get_similar_posts,
+    refresh_similar_posts,
+)
+
+
+class SimilarPostTests(TestCase):
+    """Tests for maintaining and reading similar posts."""
+
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.post = self.create_post('main', 'django', 'python', 'docker')
+        self.close = self.create_post('close', 'django', 'python', days=2)
+        self.far = self.create_post('far', 'django', days=1)
+        self.other = self.create_post('other', 'cooking')
+
+    def create_post(self, slug: str, *tags: str, days: int = 0,
+                    status: str = 'published') -> Post:
+        post = Post.objects.create(
+            title=slug, slug=slug, author=self.author, body='Body',
+            status=status, publish=timezone.now() - timedelta(days=days))
+        post.tags.add(*tags)
+        return post
+
+    def test_similar_posts_are_ordered_by_shared_tags(self):
+        """Test posts sharing more tags come first."""
+        self.assertEqual(get_similar_posts(self.post),
+                         [self.close, self.far])
+        self.assertEqual(get_similar_posts(self.far),
+                         [self.post, self.close])
+
+    def test_changing_tags_refreshes_similar_posts(self):
+        """Test similar posts follow tags added and removed."""
+        self.other.tags.add('django', 'python', 'docker')
+        self.assertEqual(get_similar_posts(self.post)[0], self.other)
+
+        self.other.tags.clear()
+        self.assertNotIn(self.other, get_similar_posts(self.post))
+
+    def test_drafts_are_not_similar(self):
+        """Test unpublishing a post removes it from similar posts."""
+        self.close.status = 'draft'
+        self.close.save()
+
+        self.assertEqual(get_similar_posts(self.post), [self.far])
+
+    @override_settings(BLOG_SIMILAR_POSTS_LIMIT=2)
+    def test_lists_of_other_posts_keep_the_limit(self):
+        """Test a post enters full lists of other posts only if it beats
+        their last entry, which is then pushed out."""
+        weak = self.create_post('weak', 'django', days=5)
+        self.assertEqual(
+            list(SimilarPost.objects.filter(post=self.post)
+                                    .values_list('similar', flat=True)),
+            [self.close.pk, self.far.pk])
+        self.assertFalse(SimilarPost.objects.filter(
+            post=self.post, similar=weak).exists())
+
+        strong = self.create_post('strong', 'django', 'python', 'docker')
+        self.assertEqual(get_similar_posts(self.post), [strong, self.close])
+        self.assertEqual(
+            SimilarPost.objects.filter(post=self.post).count(), 2)
+        self.assertFalse(SimilarPost.objects.values('post').annotate(
+            size=Count('pk')).filter(size__gt=2).exists())
+
+    def test_refresh_returns_posts_showing_the_post(self):
+        """Test only posts showing a post among their similar posts are
+        returned, before and after its refresh."""
+        oldest = [self.create_post(f'old-{days}', 'django', days=days)
+                  for days in range(10, 14)][-1]
+
+        self.assertEqual(refresh_similar_posts(oldest), set())
+        self.assertEqual(
+            refresh_similar_posts(self.close),
+            {post.pk for post in Post.objects.exclude(
+                pk__in=[self.close.pk, self.other.pk])})
+
+        Post.objects.filter(pk=self.close.pk).update(status='draft')
+        self.close.status = 'draft'
+        self.assertIn(self.post.pk, refresh_similar_posts(self.close))
+
+    def test_reading_similar_posts_queries(self):
+        """Test similar posts and their tags are read in two queries."""
+        with self.assertNumQueries(2):
+            for post in get_similar_posts(self.post):
+                list(post.tags.all())
+
+    def test_rebuild_matches_incremental_updates(self):
+        """Test a full rebuild stores the same similar posts."""
+        def stored():
+            return set(SimilarPost.objects.values_list(
+                'post', 'similar', 'score'))
+        incremental = stored()
+
+        call_command('rebuild_similar_posts', stdout=StringIO())
+
+        self.assertEqual(stored(), incremental)
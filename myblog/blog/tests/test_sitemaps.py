@@ -0,0 +1,97 @@
+"""
+Tests for the sitemaps of posts.
+"""
+import gzip
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import (
+    TestCase,
+    Client,
+)
+from django.urls import reverse
+
+from blog import cache
+from blog.models import Post
+from blog.sitemaps import PostSitemap
+
+
+class SitemapTests(TestCase):
+    """Tests for the paginated sitemap views and the build command."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.client = Client()
+        self.author = User.objects.create(username='author')
+        self.posts = [
+            Post.objects.create(
+                title=f'Post {number}', slug=f'post-{number}',
+                author=self.author, body='Body', status='published')
+            for number in range(3)
+        ]
+        self.output_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.output_dir)
+        PostSitemap.limit = 2
+        self.addCleanup(setattr, PostSitemap, 'limit', 5000)
+
+    def read(self, name: str) -> str:
+        with gzip.open(self.output_dir / name, 'rt') as file:
+            return file.read()
+
+    def build(self) -> str:
+        stdout = StringIO()
+        call_command('build_sitemaps', output_dir=self.output_dir,
+                     base_url='https://example.com/sitemaps/', stdout=stdout)
+        return stdout.getvalue()
+
+    def test_index_lists_sitemap_pages(self):
+        """Test the index links every page of the posts sitemap."""
+        res = self.client.get(reverse('django.contrib.sitemaps.views.index'))
+
+        self.assertContains(res, 'sitemap-posts.xml</loc>')
+        self.assertContains(res, 'sitemap-posts.xml?p=2</loc>')
+
+    def test_sitemap_page_lists_posts(self):
+        """Test a page of the sitemap lists its posts only."""
+        res = self.client.get(
+            reverse('django.contrib.sitemaps.views.sitemap', args=['posts']),
+            {'p': 2})
+
+        self.assertContains(res, self.posts[2].get_absolute_url())
+        self.assertNotContains(res, self.posts[0].get_absolute_url())
+
+    def test_build_writes_gzipped_pages(self):
+        """Test the command writes every page and the index."""
+        self.build()
+
+        self.assertIn(self.posts[0].get_absolute_url(),
+                      self.read('sitemap-posts-1.xml.gz'))
+        self.assertIn(self.posts[2].get_absolute_url(),
+                      self.read('sitemap-posts-2.xml.gz'))
+        self.assertIn('https://example.com/sitemaps/sitemap-posts-2.xml.gz',
+                      self.read('sitemap.xml.gz'))
+
+    def test_build_rewrites_changed_pages_only(self):
+        """Test a rebuild skips pages whose posts did not change."""
+        self.build()
+
+        self.posts[2].title = 'Changed'
+        self.posts[2].save()
+        output = self.build()
+
+        self.assertNotIn('sitemap-posts-1.xml.gz', output)
+        self.assertIn('sitemap-posts-2.xml.gz', output)
+
+    def test_build_removes_stale_pages(self):
+        """Test pages left without posts are deleted."""
+        self.build()
+
+        self.posts[2].delete()
+        self.build()
+
+        self.assertFalse(
+            (self.output_dir / 'sitemap-posts-2.xml.gz').exists())
@@ -0,0 +1,124 @@
+"""
+Tests for the synthetic data generator and the views benchmark.
+"""
+import json
+import random
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from blog.benchmarks import benchmark_views
+from blog.models import (
+    Post,
+    Comment,
+)
+from blog.synthetic import (
+    Distribution,
+    generate_blog,
+)
+
+
+class DistributionTests(TestCase):
+    """Tests for distributions given by specs."""
+
+    def test_samples_are_in_range(self):
+        """Test samples of every kind are non-negative integers."""
+        rng = random.Random(0)
+        for spec, low, high in (('fixed:3', 3, 3), ('uniform:1:4', 1, 4),
+                                ('poisson:2', 0, 100),
+                                ('lognormal:50:0.5', 0, 10_000)):
+            samples = {Distribution(spec).sample(rng) for _ in range(100)}
+
+            self.assertTrue(all(isinstance(sample, int) and
+                                low <= sample <= high for sample in samples),
+                            spec)
+
+    def test_invalid_specs(self):
+        """Test unknown kinds and wrong parameters are rejected."""
+        for spec in ('zipf:2', 'uniform:1', 'poisson:many'):
+            with self.assertRaises((ValueError, TypeError)):
+                Distribution(spec)
+
+
+class GenerateBlogTests(TestCase):
+    """Tests for the `generate_data` command."""
+
+    def generate(self, **options) -> str:
+        stdout = StringIO()
+        call_command('generate_data', posts=30, authors=3, tags=5,
+                     batch_size=10, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_generates_consistent_data(self):
+        """Test counts match the options and comment counters."""
+        self.generate(comments_per_post=Distribution('fixed:2'),
+                      tags_per_post=Distribution('fixed:2'))
+
+        posts = Post.published.annotate(comments_created=Count('comments'))
+        self.assertEqual(posts.count(), 30)
+        self.assertEqual(Comment.objects.count(), 60)
+        self.assertTrue(all(post.comment_count == post.comments_created == 2
+                            for post in posts))
+        self.assertEqual(
+            {post.tags.count() for post in Post.objects.all()}, {2})
+        self.assertEqual(
+            Post.objects.values('author').distinct().count(), 3)
+
+    def test_same_seed_generates_same_posts(self):
+        """Test generating data again with the seed repeats the posts."""
+        self.generate(seed=7)
+        first = list(Post.objects.order_by('slug')
+                                 .values_list('title', 'body'))
+        Post.objects.all().delete()
+
+        generate_blog(30, authors=3, tags=5, seed=7, batch_size=10)
+        second = list(Post.objects.order_by('slug')
+                                  .values_list('title', 'body'))
+
+        self.assertNotEqual(first, [])
+        self.assertEqual(first, second)
+
+    def test_numbers_posts_after_existing_ones(self):
+        """Test running the command twice adds new posts."""
+        self.generate()
+        self.generate()
+
+        self.assertEqual(Post.objects.count(), 60)
+
+
+class BenchmarkViewsTests(TestCase):
+    """Tests for the views benchmark report."""
+
+    def test_report_covers_endpoints(self):
+        """Test every endpoint is measured and the report is written."""
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        path = directory / 'report.json'
+
+        call_command('benchmark', 'views', posts=20, repeat=2,
+                     output=str(path), stdout=StringIO())
+        report = json.loads(path.read_text())
+
+        self.assertEqual(set(report['views']), {
+            'list', 'tag', 'detail', 'search', 'feed', 'sitemap_index',
+            'sitemap_section'})
+        for name, view in report['views'].items():
+            self.assertEqual(view['status'], [200], name)
+            self.assertGreater(view['queries'], 0, name)
+        self.assertEqual(report['meta']['posts'], 20)
+        # Generated posts are rolled back.
+        self.assertEqual(Post.objects.count(), 0)
+
+    def test_reads_existing_posts(self):
+        """Test the benchmark reads the database without generated posts."""
+        generate_blog(5)
+
+        report = benchmark_views(repeat=1)
+
+        self.assertEqual(report['meta']['posts'], 5)
+        self.assertEqual(Post.objects.count(), 5)
@@ -0,0 +1,152 @@
+"""
+Tests for the precomputed statistics of tags.
+"""
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import (
+    TestCase,
+    Client,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from taggit.models import Tag
+
+from blog import cache
+from blog.forms import PostForm
+from blog.models import (
+    Post,
+    TagStats,
+)
+from blog.templatetags.blog_tags import show_tag_cloud
+from blog.tagstats import (
+    get_tag_cloud,
+    rebuild_tag_stats,
+)
+
+
+class TagStatsTests(TestCase):
+    """Tests for stats maintained by signals and rebuilt from scratch."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.author = User.objects.create(username='author')
+
+    def create_post(self, slug: str, *tags: str,
+                    status: str = 'published') -> Post:
+        post = Post.objects.create(title=slug, slug=slug, author=self.author,
+                                   body='Body', status=status)
+        post.tags.add(*tags)
+        return post
+
+    def post_counts(self) -> dict:
+        return dict(TagStats.objects.values_list('tag__name', 'post_count'))
+
+    def test_tagging_counts_published_posts(self):
+        """Test tags count their published posts, not drafts."""
+        self.create_post('first', 'django', 'python')
+        self.create_post('second', 'django')
+        self.create_post('draft', 'django', 'web', status='draft')
+
+        self.assertEqual(self.post_counts(),
+                         {'django': 2, 'python': 1, 'web': 0})
+        self.assertIsNotNone(Tag.objects.get(name='web').stats.last_used)
+
+    def test_changes_of_posts_are_counted(self):
+        """Test (un)publishing, untagging and deleting posts count."""
+        post = self.create_post('post', 'django', 'python', status='draft')
+        post.status = 'published'
+        post.save()
+        self.assertEqual(self.post_counts(), {'django': 1, 'python': 1})
+
+        post.tags.remove('python')
+        self.assertEqual(self.post_counts(), {'django': 1, 'python': 0})
+
+        post = Post.objects.get(pk=post.pk)
+        post.status = 'draft'
+        post.save()
+        self.assertEqual(self.post_counts(), {'django': 0, 'python': 0})
+
+        other = self.create_post('other', 'django', 'python')
+        other.tags.clear()
+        self.create_post('deleted', 'django').delete()
+        self.assertEqual(self.post_counts(), {'django': 0, 'python': 0})
+
+    def test_rebuild_recounts_posts(self):
+        """Test a rebuild repairs stats changed behind signals."""
+        post = self.create_post('post', 'django')
+        Post.objects.filter(pk=post.pk).update(status='draft')
+        Tag.objects.create(name='Untagged', slug='untagged')
+
+        self.assertEqual(rebuild_tag_stats(), 2)
+        self.assertEqual(self.post_counts(), {'django': 0, 'Untagged': 0})
+
+    def test_post_form_choices_are_ordered_by_use(self):
+        """Test tag choices list the most used tags first, with counts."""
+        self.create_post('first', 'python', 'django')
+        self.create_post('second', 'django')
+        Tag.objects.create(name='Web', slug='web')
+
+        self.assertEqual(PostForm().fields['tags'].choices, [
+            ('django', 'django (2)'), ('python', 'python (1)'),
+            ('Web', 'Web (0)')])
+
+    def test_tag_cloud(self):
+        """Test the cloud weighs used tags by their number of posts."""
+        for number in range(8):
+            self.create_post(f'post-{number}', 'django',
+                             *(['python'] if number < 3 else []))
+        self.create_post('single', 'web')
+
+        self.assertEqual(
+            [(tag['name'], tag['post_count'], tag['weight'])
+             for tag in get_tag_cloud()],
+            [('django', 8, 5), ('python', 3, 3), ('web', 1, 1)])
+
+    def test_tag_cloud_is_cached_until_tags_are_used(self):
+        """Test the cloud tag is cached until stats change."""
+        self.create_post('post', 'django')
+        show_tag_cloud()
+
+        with self.assertNumQueries(0):
+            show_tag_cloud()
+
+        self.create_post('other', 'python')
+        self.assertEqual(len(show_tag_cloud()['tags']), 2)
+
+
+@override_settings(BLOG_PAGINATION='pages')
+class TagListingTests(TestCase):
+    """Tests for listings of posts of a tag, counted by its stats."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.client = Client()
+        author = User.objects.create(username='author')
+        post = Post.objects.create(title='Post', slug='post', author=author,
+                                   body='Body', status='published')
+        post.tags.add('django')
+        Tag.objects.create(name='Empty', slug='empty')
+
+    def get_sql(self, tag_slug: str) -> list:
+        cache.get_cache().clear()
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(reverse('blog:post-list-by-tag',
+                                          args=[tag_slug]))
+        self.assertEqual(res.status_code, 200)
+        return [query['sql'] for query in context.captured_queries]
+
+    def test_posts_are_not_counted(self):
+        """Test pages of posts of a tag are numbered by its stats."""
+        queries = self.get_sql('django')
+
+        self.assertTrue([sql for sql in queries if 'taggit_taggeditem' in sql])
+        self.assertFalse([sql for sql in queries if 'COUNT(' in sql
+                          and 'taggit_taggeditem' in sql])
+
+    def test_empty_tag_skips_posts(self):
+        """Test posts of a tag without published posts are not queried."""
+        queries = self.get_sql('empty')
+
+        self.assertFalse(
+            [sql for sql in queries if 'taggit_taggeditem' in sql])
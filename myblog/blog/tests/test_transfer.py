@@ -0,0 +1,98 @@
+"""
+Tests for importing and exporting posts as JSON Lines.
+"""
+import json
+import shutil
+import tempfile
+from datetime import (
+    datetime,
+    timezone,
+)
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from taggit.models import Tag
+
+from blog.models import Post
+from blog.transfer import import_posts
+
+
+def post_line(slug: str, tags=(), author: str = 'author', **fields) -> str:
+    return json.dumps({
+        'title': slug, 'slug': slug, 'author': author, 'body': '**Body**',
+        'status': 'published', 'tags': list(tags), **fields,
+    })
+
+
+class TransferTests(TestCase):
+    """Tests for the `import_posts` and `export_posts` commands."""
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = self.directory / 'posts.jsonl'
+
+    def test_export_and_import_round_trip(self):
+        """Test exported posts are imported with all their data."""
+        author = User.objects.create(username='author')
+        post = Post.objects.create(
+            title='Post', slug='post', author=author, body='# Title',
+            status='published',
+            publish=datetime(2022, 8, 15, 17, 38, tzinfo=timezone.utc))
+        post.tags.add('django', 'python')
+        expected = Post.objects.get()
+
+        call_command('export_posts', str(self.path), stdout=StringIO())
+        Post.objects.all().delete()
+        call_command('import_posts', str(self.path), stdout=StringIO())
+
+        imported = Post.objects.get()
+        for field in ('title', 'slug', 'author', 'body', 'body_html',
+                      'status', 'publish', 'created', 'updated'):
+            self.assertEqual(getattr(imported, field),
+                             getattr(expected, field), field)
+        self.assertEqual(sorted(imported.tags.names()),
+                         ['django', 'python'])
+        self.assertQuerysetEqual(
+            Post.published.search('title', min_rank=0), [imported])
+
+    def test_import_creates_missing_authors_and_tags(self):
+        """Test unknown authors and tags are created, known ones reused."""
+        tag = Tag.objects.create(name='django', slug='django')
+        lines = [post_line('first', ['django', 'new'], author='writer'),
+                 post_line('second', ['new'], author='writer')]
+
+        import_posts(lines, batch_size=1)
+
+        writer = User.objects.get(username='writer')
+        self.assertFalse(writer.has_usable_password())
+        self.assertEqual(Post.objects.filter(author=writer).count(), 2)
+        self.assertEqual(Tag.objects.count(), 2)
+        self.assertIn(tag, Post.objects.get(slug='first').tags.all())
+
+    def test_import_tag_with_taken_slug(self):
+        """Test a new tag whose slug is taken gets a unique slug."""
+        Tag.objects.create(name='C', slug='c')
+
+        import_posts([post_line('post', ['C++'])])
+
+        tag = Tag.objects.get(name='C++')
+        self.assertNotEqual(tag.slug, 'c')
+
+    def test_import_queries_do_not_depend_on_batch_size(self):
+        """Test every batch is inserted with a constant number of queries."""
+        import_posts([post_line('existing', ['django'])])
+
+        def count_queries(amount: int) -> int:
+            lines = [post_line(f'post-{amount}-{number}', ['django'])
+                     for number in range(amount)]
+            with CaptureQueriesContext(connection) as context:
+                import_posts(lines, batch_size=100)
+            return len(context.captured_queries)
+
+        self.assertEqual(count_queries(2), count_queries(20))
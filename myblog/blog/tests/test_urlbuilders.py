@@ -0,0 +1,73 @@
+"""
+Tests for the precompiled URL builders.
+"""
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+
+from django.test import (
+    SimpleTestCase,
+    override_settings,
+)
+from django.urls import (
+    NoReverseMatch,
+    include,
+    path,
+    reverse,
+    set_script_prefix,
+)
+
+from blog.urlbuilders import post_detail_url
+
+urlpatterns = [
+    path('articles/', include('blog.urls', namespace='blog')),
+]
+
+
+class PostDetailUrlTests(SimpleTestCase):
+    """Tests for building post detail URLs without `reverse()`."""
+
+    slugs = ('post', 'my-first_post-2', 'A-B-C', '1')
+
+    def reversed_url(self, publish: datetime, slug: str) -> str:
+        return reverse('blog:post-detail', args=[
+            publish.year, publish.strftime('%m'), publish.strftime('%d'),
+            slug])
+
+    def test_matches_reverse(self):
+        """Test built URLs equal reversed ones over a range of dates."""
+        start = datetime(1999, 1, 1, tzinfo=timezone.utc)
+
+        for days in range(0, 366 * 3, 7):
+            publish = start + timedelta(days=days, hours=days % 24)
+            for slug in self.slugs:
+                self.assertEqual(post_detail_url(publish, slug),
+                                 self.reversed_url(publish, slug))
+
+    def test_matches_reverse_with_script_prefix(self):
+        """Test the script prefix of the current request is honoured."""
+        publish = datetime(2023, 5, 6, tzinfo=timezone.utc)
+        set_script_prefix('/mounted/')
+        self.addCleanup(set_script_prefix, '/')
+
+        self.assertEqual(post_detail_url(publish, 'post'),
+                         self.reversed_url(publish, 'post'))
+        self.assertTrue(post_detail_url(publish, 'post')
+                        .startswith('/mounted/blog/'))
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_follows_changed_urlconf(self):
+        """Test the route is resolved again once the URLconf changes."""
+        publish = datetime(2023, 5, 6, tzinfo=timezone.utc)
+
+        self.assertEqual(post_detail_url(publish, 'post'),
+                         '/articles/2023/05/06/post/')
+
+    def test_invalid_slug_raises(self):
+        """Test slugs not accepted by the route fail like `reverse()`."""
+        publish = datetime(2023, 5, 6, tzinfo=timezone.utc)
+
+        with self.assertRaises(NoReverseMatch):
+            post_detail_url(publish, 'not a slug')
@@ -0,0 +1,253 @@
+"""
+Tests for the blog views.
+"""
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import (
+    TestCase,
+    Client,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from taggit.models import Tag
+
+from blog import cache
+from blog.forms import PostForm
+from blog.models import (
+    Post,
+    Comment,
+)
+from blog.templatetags.blog_tags import markdown_filter
+from blog.views import COMMENTS_PER_PAGE
+
+
+def create_posts(author: User, amount: int, tag: str = 'django') -> list:
+    """Create published posts, each with comments and a tag."""
+    posts = []
+    for number in range(amount):
+        post = Post.objects.create(
+            title=f'Post {number}',
+            slug=f'post-{number}',
+            author=author,
+            body=f'Body of the post {number}.',
+            status='published',
+        )
+        post.tags.add(tag)
+        Comment.objects.create(
+            post=post, name='Reader', email='reader@example.com',
+            body='Active comment')
+        Comment.objects.create(
+            post=post, name='Spammer', email='spam@example.com',
+            body='Inactive comment', active=False)
+        posts.append(post)
+
+    return posts
+
+
+class PostListQueryCountTests(TestCase):
+    """Tests for the number of queries run by the post list."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.client = Client()
+        self.author = User.objects.create(
+            username='author', email='author@example.com',
+            first_name='John', last_name='Doe')
+
+    def count_queries(self, url: str) -> int:
+        cache.get_cache().clear()
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_post_list_query_count_does_not_depend_on_page_size(self):
+        """Test rendering more posts does not issue more queries."""
+        create_posts(self.author, 2)
+        small_page = self.count_queries(reverse('blog:post-list'))
+
+        create_posts(self.author, 8, tag='python')
+        full_page = self.count_queries(reverse('blog:post-list'))
+
+        self.assertEqual(small_page, full_page)
+
+    def test_post_list_by_tag_query_count_does_not_depend_on_page_size(self):
+        """Test rendering more tagged posts does not issue more queries."""
+        create_posts(self.author, 2)
+        url = reverse('blog:post-list-by-tag', args=['django'])
+        small_page = self.count_queries(url)
+
+        Post.objects.all().delete()
+        create_posts(self.author, 10)
+        full_page = self.count_queries(url)
+
+        self.assertEqual(small_page, full_page)
+
+    def test_post_list_renders_only_active_comments(self):
+        """Test inactive comments are not rendered on the list page."""
+        create_posts(self.author, 1)
+
+        res = self.client.get(reverse('blog:post-list'))
+
+        self.assertContains(res, 'Active comment')
+        self.assertNotContains(res, 'Inactive comment')
+
+
+class PostListActionTests(TestCase):
+    """Tests for forms posted to the post list."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.client = Client()
+        author = User.objects.create(username='author')
+        self.post = create_posts(author, 1)[0]
+
+    def test_comment_post_does_not_load_tag_choices(self):
+        """Test posting a comment builds no other form."""
+        cache.get_cache().clear()
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.post(reverse('blog:post-list'), {
+                'action': 'comment', 'post-id': self.post.pk,
+                'name': 'Writer', 'email': 'writer@example.com',
+                'body': 'Posted'})
+
+        self.assertEqual(res.status_code, 302)
+        # The post is loaded, the comment inserted and counted, and pages
+        # of the post invalidated, by the ids of its tags.
+        self.assertEqual(len(context.captured_queries), 5)
+        self.assertFalse([query for query in context.captured_queries
+                          if '"taggit_tag"' in query['sql']])
+        self.assertTrue(
+            self.post.comments.filter(body='Posted').exists())
+
+    def test_comment_post_without_valid_post_id_is_not_found(self):
+        """Test a comment on a missing or malformed post id answers 404."""
+        for post_id in ('', 'abc', '0', str(2 ** 64), self.post.pk + 1):
+            res = self.client.post(reverse('blog:post-list'), {
+                'action': 'comment', 'post-id': post_id,
+                'name': 'Writer', 'email': 'writer@example.com',
+                'body': 'Posted'})
+            self.assertEqual(res.status_code, 404, post_id)
+
+    def test_delete_actions_of_stale_ids_are_not_found(self):
+        """Test deleting a post or comment deleted before answers 404."""
+        comment_id = self.post.comments.get(active=True).pk
+        Comment.objects.filter(pk=comment_id).delete()
+
+        for data in ({'action': 'delete-comment',
+                      'to-delete-comment': comment_id},
+                     {'action': 'delete-comment'},
+                     {'action': 'delete-post', 'to-delete-post': 'abc'},
+                     {'action': 'delete-post',
+                      'to-delete-post': self.post.pk + 1}):
+            res = self.client.post(reverse('blog:post-list'), data)
+            self.assertEqual(res.status_code, 404, data)
+
+    def test_search_post_renders_results(self):
+        """Test a posted search is run and its form kept."""
+        res = self.client.post(reverse('blog:post-list'),
+                               {'action': 'search', 'query': 'post'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.context['query'], 'post')
+        self.assertTrue(res.context['forms']['search_form'].is_bound)
+
+    def test_delete_comment_action(self):
+        """Test the delete button of a comment deletes it."""
+        comment = self.post.comments.get(active=True)
+
+        self.client.post(reverse('blog:post-list'), {
+            'action': 'delete-comment', 'to-delete-comment': comment.pk})
+
+        self.assertFalse(Comment.objects.filter(pk=comment.pk).exists())
+
+    def test_tag_choices_are_cached_until_tags_change(self):
+        """Test the post form reads tag choices from the cache."""
+        PostForm()
+
+        with self.assertNumQueries(0):
+            PostForm()
+
+        Tag.objects.create(name='Python', slug='python')
+        self.assertIn(('Python', 'Python (0)'),
+                      PostForm().fields['tags'].choices)
+
+
+@override_settings(BLOG_LISTED_COMMENTS=2)
+class CommentLoadingTests(TestCase):
+    """Tests for the bounded embedding and pages of comments."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.client = Client()
+        author = User.objects.create(username='author')
+        self.post = create_posts(author, 1)[0]
+        for number in range(COMMENTS_PER_PAGE + 2):
+            Comment.objects.create(
+                post=self.post, name='Reader', email='reader@example.com',
+                body=f'Comment {number}')
+        self.url = reverse('blog:post-comments', args=[self.post.pk])
+
+    def test_list_embeds_first_comments(self):
+        """Test the list shows the first comments and a loader of more."""
+        res = self.client.get(reverse('blog:post-list'))
+
+        post = res.context['posts'][0]
+        self.assertEqual([comment.body for comment in post.listed_comments],
+                         ['Active comment', 'Comment 0'])
+        self.assertNotContains(res, 'Comment 1<')
+        self.assertContains(res, f'data-comments-url="{self.url}?cursor=')
+
+    def test_comments_are_walked_by_cursor(self):
+        """Test pages of comments follow each other, oldest first."""
+        first = self.client.get(self.url).json()
+        second = self.client.get(
+            self.url, {'cursor': first['next_cursor']}).json()
+
+        bodies = [comment['body']
+                  for comment in first['comments'] + second['comments']]
+        self.assertEqual(len(first['comments']), COMMENTS_PER_PAGE)
+        self.assertEqual(bodies, ['Active comment'] + [
+            f'Comment {number}' for number in range(COMMENTS_PER_PAGE + 2)])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_comments_fragment(self):
+        """Test the HTML fragment renders the comments of the view."""
+        cursor = self.client.get(self.url).json()['next_cursor']
+
+        res = self.client.get(
+            self.url, {'cursor': cursor, 'view': 'list', 'format': 'html'})
+
+        self.assertContains(res, 'class="comment"', count=3)
+        self.assertNotContains(res, 'data-comments-url')
+
+    def test_detail_shows_first_page(self):
+        """Test the detail page embeds a page of comments only."""
+        res = self.client.get(self.post.get_absolute_url())
+
+        self.assertEqual(len(res.context['comments']), COMMENTS_PER_PAGE)
+        self.assertNotContains(res, 'Inactive comment')
+        self.assertContains(res, 'data-comments-url')
+
+    def test_comments_of_draft(self):
+        """Test comments of unpublished posts are not served."""
+        Post.objects.filter(pk=self.post.pk).update(status='draft')
+
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class MarkdownFilterTests(TestCase):
+    """Tests for the `markdown` template filter."""
+
+    def test_markdown_filter_uses_stored_html(self):
+        """Test the stored HTML is used instead of rendering the body."""
+        post = Post(body='**Body**', body_html='<p>Stored</p>')
+
+        self.assertEqual(markdown_filter(post), '<p>Stored</p>')
+
+    def test_markdown_filter_renders_text(self):
+        """Test plain markdown text is rendered."""
+        self.assertEqual(markdown_filter('*Text*'), '<p><em>Text</em></p>')
@@ -0,0 +1,225 @@
+"""
+Streaming import and export of posts as JSON Lines.
+
+Every line holds one post with the username of its author and the names
+of its tags. Both directions work in batches of a fixed size, so memory
+use does not grow with the number of posts.
+
+Bulk inserts skip `Post.save()` and model signals: bodies are rendered
+and described here, comment counters of new posts are zero anyway, stats
+of tags are counted per batch and caches of the blog are invalidated once
+the import finishes. Similar posts are left to `rebuild_similar_posts`.
+"""
+import json
+import time
+from collections import (
+    Counter,
+    defaultdict,
+)
+from itertools import islice
+from typing import (
+    IO,
+    Iterable,
+    Iterator,
+)
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import (
+    connection,
+    reset_queries,
+    transaction,
+)
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from taggit.models import (
+    Tag,
+    TaggedItem,
+)
+
+from . import (
+    cache,
+    pagecache,
+    search,
+    tagstats,
+)
+from .models import Post
+from .rendering import (
+    describe,
+    render_markdown,
+)
+
+POST_FIELDS = ('title', 'slug', 'body', 'status')
+DATE_FIELDS = ('publish', 'created', 'updated')
+
+
+def _tag_names(post_ids: list, content_type: ContentType) -> dict:
+    """Return sorted names of tags of the given posts by post id."""
+    names = defaultdict(list)
+    tagged_items = TaggedItem.objects \
+        .filter(content_type=content_type, object_id__in=post_ids) \
+        .order_by('tag__name') \
+        .values_list('object_id', 'tag__name')
+    for post_id, name in tagged_items:
+        names[post_id].append(name)
+    return names
+
+
+def export_posts(output: IO, chunk_size: int = 2000,
+                 stdout=None) -> int:
+    """
+    Write every post as a line of JSON and return their number. Rows are
+    read with a server-side cursor, and tags once per chunk of posts.
+    """
+    content_type = ContentType.objects.get_for_model(Post)
+    fields = (*POST_FIELDS, *DATE_FIELDS)
+    rows = Post.objects.order_by('pk') \
+                       .values_list('pk', 'author__username', *fields) \
+                       .iterator(chunk_size=chunk_size)
+    started = time.perf_counter()
+    exported = 0
+
+    while chunk := list(islice(rows, chunk_size)):
+        tags = _tag_names([row[0] for row in chunk], content_type)
+
+        for post_id, author, *values in chunk:
+            record = dict(zip(fields, values))
+            for field in DATE_FIELDS:
+                record[field] = record[field].isoformat()
+            record['author'] = author
+            record['tags'] = tags.get(post_id, [])
+            output.write(json.dumps(record) + '\n')
+
+        exported += len(chunk)
+        reset_queries()
+        if stdout:
+            stdout.write(_progress('Exported', exported, started))
+
+    return exported
+
+
+def _progress(verb: str, count: int, started: float) -> str:
+    elapsed = time.perf_counter() - started
+    return f'{verb} {count} posts in {elapsed:.1f} s ' \
+           f'({count / max(elapsed, 1e-9):.0f} posts/s).'
+
+
+def resolve_authors(usernames: set) -> dict:
+    """Return ids of users by username, creating missing users."""
+    authors = dict(User.objects.filter(username__in=usernames)
+                               .values_list('username', 'pk'))
+    missing = usernames - authors.keys()
+    if missing:
+        User.objects.bulk_create(
+            [User(username=username, password=make_password(None))
+             for username in missing],
+            ignore_conflicts=True)
+        authors.update(User.objects.filter(username__in=missing)
+                                   .values_list('username', 'pk'))
+    return authors
+
+
+def resolve_tags(names: set) -> dict:
+    """Return ids of tags by name, upserting the missing ones at once."""
+    Tag.objects.bulk_create(
+        [Tag(name=name, slug=Tag().slugify(name)) for name in names],
+        ignore_conflicts=True)
+    tags = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+
+    # Names whose slug is taken by another tag get a unique one on save.
+    for name in names - tags.keys():
+        tag = Tag(name=name)
+        tag.save()
+        tags[name] = tag.pk
+
+    return tags
+
+
+def _import_batch(records: list, content_type: ContentType,
+                  render: bool) -> None:
+    authors = resolve_authors({record['author'] for record in records})
+    tags = resolve_tags({name for record in records
+                         for name in record.get('tags', ())})
+    posts = []
+    dates = [{field: parse_datetime(record[field]) for field in DATE_FIELDS
+              if record.get(field)} for record in records]
+
+    for record, post_dates in zip(records, dates):
+        post = Post(author_id=authors[record['author']], **post_dates,
+                    **{field: record[field] for field in POST_FIELDS
+                       if field in record})
+        post.description = describe(post.body)
+        if render:
+            post.body_html = render_markdown(post.body)
+        posts.append(post)
+
+    Post.objects.bulk_create(posts)
+
+    # Inserts set `created` and `updated` to now, so given dates are
+    # restored by a single update, much faster than `bulk_update()`.
+    dated_posts = [(post.pk, post_dates.get('created', post.created),
+                    post_dates.get('updated', post.updated))
+                   for post, post_dates in zip(posts, dates)
+                   if 'created' in post_dates or 'updated' in post_dates]
+    if dated_posts:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE blog_post SET created = dates.created, '
+                'updated = dates.updated '
+                'FROM unnest(%s::bigint[], %s::timestamptz[], '
+                '%s::timestamptz[]) AS dates (id, created, updated) '
+                'WHERE blog_post.id = dates.id',
+                [list(column) for column in zip(*dated_posts)])
+    TaggedItem.objects.bulk_create(
+        [TaggedItem(content_type=content_type, object_id=post.pk,
+                    tag_id=tags[name])
+         for post, record in zip(posts, records)
+         for name in set(record.get('tags', ()))])
+
+    tag_counts = Counter()
+    for post, record in zip(posts, records):
+        for name in set(record.get('tags', ())):
+            tag_counts[tags[name]] += int(post.status == 'published')
+    tagstats.count_posts(tag_counts, timezone.now())
+
+
+def read_records(lines: Iterable[str]) -> Iterator[dict]:
+    """Parse non-empty lines as JSON objects."""
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def import_posts(lines: Iterable[str], batch_size: int = 1000,
+                 render: bool = True, stdout=None) -> int:
+    """
+    Create posts from lines of JSON, every batch in a transaction of its
+    own, and return their number.
+    """
+    content_type = ContentType.objects.get_for_model(Post)
+    records = read_records(lines)
+    started = time.perf_counter()
+    imported = 0
+
+    try:
+        while batch := list(islice(records, batch_size)):
+            with transaction.atomic():
+                _import_batch(batch, content_type, render)
+            imported += len(batch)
+            # Queries logged with DEBUG on would hold every batch.
+            reset_queries()
+            if stdout:
+                stdout.write(_progress('Imported', imported, started))
+    finally:
+        if imported:
+            invalidate_caches()
+
+    return imported
+
+
+def invalidate_caches() -> None:
+    """Invalidate blog caches after posts were inserted in bulk."""
+    cache.invalidate('sidebar', 'tags', pagecache.LIST_NAMESPACE,
+                     pagecache.ALL_TAGS_NAMESPACE)
+    search.invalidate()
@@ -0,0 +1,66 @@
+"""
+URL builders for routes resolved on every listed post.
+
+`reverse()` walks the URL resolver on each call, which adds up on pages
+listing many posts, in feeds and in sitemaps. A builder reverses its
+route once per process with sentinel arguments and then only formats the
+path.
+"""
+import functools
+import re
+from datetime import datetime
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import (
+    get_script_prefix,
+    reverse,
+)
+
+# Sentinels are chosen to be valid for the route converters and to not
+# appear anywhere else in the reversed path.
+_SENTINELS = {
+    'year': '7531',
+    'month': '86',
+    'day': '42',
+    'slug': 'post-slug-sentinel',
+}
+_SLUG_RE = re.compile(r'[-a-zA-Z0-9_]+')
+
+
+@functools.lru_cache(maxsize=None)
+def _post_detail_template() -> str:
+    """Return a format string of the post detail path, without a prefix."""
+    path = reverse('blog:post-detail', args=[
+        _SENTINELS['year'], _SENTINELS['month'], _SENTINELS['day'],
+        _SENTINELS['slug'],
+    ])
+    template = path[len(get_script_prefix()):]
+    template = template.replace('{', '{{').replace('}', '}}')
+
+    for name, sentinel in _SENTINELS.items():
+        template = template.replace(sentinel, f'{{{name}}}', 1)
+
+    return template
+
+
+@receiver(setting_changed)
+def clear_templates(setting, **kwargs):
+    """Drop resolved templates once the URLconf is changed, as in tests."""
+    if setting == 'ROOT_URLCONF':
+        _post_detail_template.cache_clear()
+
+
+def post_detail_url(publish: datetime, slug: str) -> str:
+    """Return the same path as reversing the post detail route."""
+    if not _SLUG_RE.fullmatch(slug):
+        # Let `reverse()` raise for slugs the route does not accept.
+        return reverse('blog:post-detail', args=[
+            publish.year, publish.strftime('%m'), publish.strftime('%d'),
+            slug])
+
+    return get_script_prefix() + _post_detail_template().format(
+        year=publish.year,
+        month=f'{publish.month:02d}',
+        day=f'{publish.day:02d}',
+        slug=slug)
@@ -1,13 +1,45 @@
+from django.conf import settings
 from django.urls import path
 from . import views
+from . import async_views
 from . import feeds
+from .pagecache import (
+    cache_anonymous_page,
+    conditional_page,
+    list_namespaces,
+    post_list_namespaces,
+)
 
 app_name = 'blog'
+read_views = async_views \
+    if getattr(settings, 'BLOG_ASYNC_VIEWS', False) else views
+
+
+def cached_feed(feed, get_namespaces):
+    """Cache a feed like the post list it follows, and validate it."""
+    return conditional_page(get_namespaces)(
+        cache_anonymous_page(get_namespaces)(feed))
+
 
 urlpatterns = [
-    path('', views.post_list, name='post-list'),
-    path('tag/<slug:tag_slug>/', views.post_list, name='post-list-by-tag'),
+    path('', read_views.post_list, name='post-list'),
+    path('tag/<slug:tag_slug>/', read_views.post_list,
+         name='post-list-by-tag'),
     path('<int:year>/<int:month>/<int:day>/<slug:post_slug>/',
-         views.post_detail, name='post-detail'),
-    path('feed/', feeds.LatestPostsFeed(), name='post-feed'),
+         read_views.post_detail, name='post-detail'),
+    path('<int:post_id>/comments/', views.post_comments,
+         name='post-comments'),
+    path('feed/', cached_feed(feeds.LatestPostsFeed(), list_namespaces),
+         name='post-feed'),
+    path('feed/atom/',
+         cached_feed(feeds.AtomLatestPostsFeed(), list_namespaces),
+         name='post-feed-atom'),
+    path('tag/<slug:tag_slug>/feed/',
+         cached_feed(feeds.LatestPostsFeed(), post_list_namespaces),
+         name='post-feed-by-tag'),
+    path('tag/<slug:tag_slug>/feed/atom/',
+         cached_feed(feeds.AtomLatestPostsFeed(), post_list_namespaces),
+         name='post-feed-atom-by-tag'),
+    path('cache-stats/', views.cache_stats, name='cache-stats'),
+    path('request-stats/', views.request_stats, name='request-stats'),
 ]
@@ -1,228 +1,394 @@
-from django.contrib.auth.models import User
-from django.core.mail import send_mail
-from django.core.paginator import (
-    Paginator,
-    EmptyPage,
-    PageNotAnInteger,
-)
-from django.db.models import Count
-from django.http import HttpResponseRedirect
-from django.shortcuts import (
-    render,
-    get_object_or_404,
-)
-from django.shortcuts import reverse
-from django.template.defaultfilters import slugify
-from taggit.models import Tag
-from django.contrib.postgres.search import (
-    SearchVector,
-    SearchQuery,
-    SearchRank,
-)
-from .forms import (
-    EmailPostForm,
-    CommentForm,
-    PostForm,
-    TagForm,
-    SearchForm,
-)
-from .models import (
-    Post,
-    Comment,
-)
-
-
-def post_list(request, tag_slug: str = None):
-    """
-    :param tag_slug: Representing the slug of a tag to filter posts by.
-
-    Context variables passed to the template:
-    - `page`: The current page number of the paginated post list
-    - `posts`: The current page of posts to display
-    - `tag`: The tag object to filter posts by (if any)
-    - `forms`: A dictionary of form objects to include on the page
-    - `query`: The search query string (if any)
-    """
-    object_list = Post.published.all()
-    paginated_by = 10
-    tag = None
-    query = None
-    forms = {
-        'comment_form': CommentForm,
-        'post_form': PostForm,
-        'tag_form': TagForm,
-        'search_form': SearchForm,
-    }
-
-    if request.method == 'POST':
-        to_delete_post = request.POST.get('to-delete-post', None)
-        to_delete_comment = request.POST.get('to-delete-comment', None)
-
-        for form_name, form_class in forms.items():
-            forms[form_name] = form_class(request.POST)
-
-            if forms[form_name].is_valid():
-                if form_name == 'search_form':
-                    """Filter database query by submitted keyword."""
-                    query = forms[form_name].cleaned_data['query']
-                    search_vector_a = SearchVector('title', weight='A')
-                    search_vector_b = SearchVector('body', weight='B')
-                    search_vector = search_vector_a + search_vector_b
-                    search_query = SearchQuery(query)
-                    object_list = Post.objects.annotate(
-                        search=search_vector,
-                        rank=SearchRank(search_vector, search_query)
-                    ).filter(rank__gte=0.3).order_by('-rank')
-
-                elif form_name == 'comment_form':
-                    """Create and add new comment to the post."""
-                    post_id = request.POST.get('post-id', None)
-
-                    if post_id:
-                        post = get_object_or_404(Post, id=post_id)
-                        forms[form_name].save(commit=False)
-                        forms[form_name].post = post
-                        forms[form_name].save()
-                    return HttpResponseRedirect(reverse('blog:post-list'))
-
-                elif form_name == 'tag_form':
-                    """Create a new tag."""
-                    new_tag = forms[form_name].save(commit=False)
-                    new_tag.slug = slugify(new_tag.name)
-                    new_tag.save()
-                    return HttpResponseRedirect(reverse('blog:post-list'))
-
-                elif form_name == 'post_form':
-                    """Create a new post."""
-                    new_post = forms[form_name].save(commit=False)
-                    new_post.slug = slugify(new_post.title)
-                    new_post.author = User.objects.get(pk=1)
-                    new_post.status = 'published'
-                    new_post.save()
-                    forms[form_name].save_m2m()
-                    return HttpResponseRedirect(reverse('blog:post-list'))
-
-        if to_delete_post:
-            """Delete corresponding post."""
-            Post.published.get(pk=to_delete_post).delete()
-            return HttpResponseRedirect(reverse('blog:post-list'))
-
-        if to_delete_comment:
-            """Delete corresponding comment."""
-            Comment.is_active.get(pk=to_delete_comment).delete()
-            return HttpResponseRedirect(reverse('blog:post-list'))
-
-    if tag_slug:
-        tag = get_object_or_404(Tag, slug=tag_slug)
-        object_list = object_list.filter(tags__in=[tag])
-
-    paginator = Paginator(object_list, paginated_by)
-    page = request.GET.get('page')
-
-    try:
-        posts = paginator.page(page)
-    except PageNotAnInteger:
-        posts = paginator.page(1)
-    except EmptyPage:
-        posts = paginator.page(paginator.num_pages)
-
-    context = {
-        'page': page,
-        'posts': posts,
-        'tag': tag,
-        'forms': forms,
-        'query': query
-    }
-
-    return render(request, 'blog/post/list.html', context)
-
-
-def post_detail(request, year: str, month: str, day: str, post_slug: str):
-    """
-    :params year, month, day: Strings representing the year,
-     month and day of the post's publication date.
-    :param post_slug: string representing the slug of the post to display.
-
-    Context variables passed to the template:
-    - `post`: The blog post to display.
-    - `comments`: The comments associated with the post.
-    - `forms`: A dictionary of form objects to include on the page.
-    - `similar_posts`: A list of similar posts based on shared tags.
-    - `sent`: A boolean indicating whether an email was successfully sent.
-    """
-    post = get_object_or_404(Post,
-                             slug=post_slug,
-                             status='published',
-                             publish__year=year,
-                             publish__month=month,
-                             publish__day=day)
-    comments = post.comments.filter(active=True)
-    post_tags_ids = post.tags.values_list('id', flat=True)
-    similar_posts = Post.published.filter(tags__in=post_tags_ids) \
-                        .exclude(id=post.id) \
-                        .annotate(same_tags=Count('tags')) \
-                        .order_by('-same_tags', '-publish')[:4]
-    sent = False
-    forms = {
-        'comment_form': CommentForm,
-        'share_form': EmailPostForm,
-    }
-    context = {
-        'post': post,
-        'comments': comments,
-        'forms': forms,
-        'similar_posts': similar_posts,
-        'sent': sent,
-    }
-
-    if request.method == 'POST':
-        to_delete_comment = request.POST.get('to-delete-comment', None)
-
-        for form_name, form_class in forms.items():
-            forms[form_name] = form_class(request.POST)
-
-            if forms[form_name].is_valid():
-                if form_name == 'comment_form':
-                    """
-                    Create and add new comment to the
-                    actual displayed post.
-                    """
-                    new_comment = forms[form_name].save(commit=False)
-                    new_comment.post = post
-                    new_comment.save()
-
-                    return HttpResponseRedirect(
-                        reverse('blog:post-detail',
-                                args=[year, month, day, post.slug]))
-
-                elif form_name == 'share_form':
-                    """
-                    Send an email message contains a link to the actual
-                    displayed post with short message.
-                    """
-                    data = forms[form_name].cleaned_data
-                    post_url = request.build_absolute_uri(
-                        post.get_absolute_url())
-
-                    subject = f'{data["name"]} ({data["email"]}' \
-                              f' encourage to read "{post.title}"'
-                    message = f'Read post "{post.title}" on page {post_url}' \
-                              f'Comment added by {data["name"]}:' \
-                              f' {data["comments"]}.'
-
-                    send_mail(
-                        subject=subject,
-                        message=message,
-                        from_email='admin@myblog.com',
-                        recipient_list=(data['to']))
-                    context['sent'] = True
-                    forms[form_name] = EmailPostForm()
-
-                    return render(request, 'blog/post/detail.html', context)
-
-        if to_delete_comment:
-            """Delete a corresponding comment."""
-            Comment.is_active.get(pk=to_delete_comment).delete()
-            return render(request, 'blog/post/detail.html', context)
-
-    return render(request, 'blog/post/detail.html', context)
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.paginator import (
+    Paginator,
+    EmptyPage,
+    PageNotAnInteger,
+)
+from django.forms import IntegerField
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+)
+from django.views.decorators.http import require_safe
+from django.shortcuts import (
+    render,
+    get_object_or_404,
+)
+from django.shortcuts import reverse
+from django.template.defaultfilters import slugify
+from taggit.models import Tag
+from . import (
+    cache,
+    profiling,
+)
+from .ingest import (
+    BufferFull,
+    submit_comment,
+)
+from .outbox import enqueue_email
+from .forms import (
+    EmailPostForm,
+    CommentForm,
+    PostForm,
+    TagForm,
+    SearchForm,
+)
+from .models import (
+    Post,
+    Comment,
+)
+from .pagecache import (
+    cache_anonymous_page,
+    conditional_page,
+    post_list_namespaces,
+    post_detail_namespaces,
+)
+from .paginators import KeysetPaginator
+from .search import SearchResults
+from .similarity import get_similar_posts
+from .tagstats import get_post_count
+
+
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+COMMENT_FIELDS = ('id', 'post_id', 'name', 'body', 'created')
+# Ids of posts and comments posted by forms, within the range of their
+# big integer primary keys.
+POSTED_ID_FIELD = IntegerField(min_value=1, max_value=2 ** 63 - 1)
+
+
+def paginate_posts(request, object_list, query: str = None,
+                   count: int = None):
+    """
+    Return the requested page number and the page of posts, cursor based
+    unless searching or requesting a page by its number. Numbered pages
+    are counted by `count`, if known, instead of a COUNT query.
+    """
+    page = request.GET.get('page')
+    use_cursor = getattr(settings, 'BLOG_PAGINATION', 'pages') == 'cursor'
+
+    if use_cursor and query is None and page is None:
+        paginator = KeysetPaginator(object_list, POSTS_PER_PAGE)
+        return page, paginator.page(request.GET.get('cursor'))
+
+    paginator = Paginator(object_list, POSTS_PER_PAGE)
+    if count is not None:
+        paginator.count = count
+
+    try:
+        return page, paginator.page(page)
+    except PageNotAnInteger:
+        return page, paginator.page(1)
+    except EmptyPage:
+        return page, paginator.page(paginator.num_pages)
+
+
+def get_tag(tag_slug: str) -> Tag:
+    """Return the tag of the slug with its stats, or raise Http404."""
+    return get_object_or_404(Tag.objects.select_related('stats'),
+                             slug=tag_slug)
+
+
+def filter_by_tag(object_list, tag: Tag) -> tuple:
+    """
+    Return posts of the tag and their number, read from stats of the tag.
+    Posts of tags without published posts are not queried.
+    """
+    count = get_post_count(tag)
+    if not count:
+        return object_list.none(), 0
+    return object_list.filter(tags__in=[tag]), count
+
+
+def get_posted_object(request, queryset, name: str):
+    """
+    Return the object of the queryset whose id is posted as `name`, or
+    raise Http404 when the id is missing, malformed or unknown.
+    """
+    try:
+        pk = POSTED_ID_FIELD.clean(request.POST.get(name))
+    except ValidationError:
+        raise Http404(f'No valid id posted as "{name}".')
+    return get_object_or_404(queryset, pk=pk)
+
+
+def paginate_comments(post: Post, cursor: str = None):
+    """Return the page of active comments of the post, oldest first."""
+    comments = Comment.is_active.filter(post=post).only(*COMMENT_FIELDS)
+    paginator = KeysetPaginator(comments, COMMENTS_PER_PAGE, key='created')
+    return paginator.page(cursor)
+
+
+LIST_FORMS = {
+    'comment_form': CommentForm,
+    'post_form': PostForm,
+    'tag_form': TagForm,
+    'search_form': SearchForm,
+}
+
+
+def list_forms(**bound_forms) -> dict:
+    """Return forms of the post list page, unbound unless given."""
+    return {name: bound_forms[name] if name in bound_forms else form_class()
+            for name, form_class in LIST_FORMS.items()}
+
+
+def comments_busy(error: BufferFull) -> HttpResponse:
+    """Ask the reader to post a comment again once queued ones are saved."""
+    return HttpResponse(
+        f'Comments cannot be accepted right now: {error} '
+        f'Please try again in a moment.',
+        content_type='text/plain', status=503, headers={'Retry-After': '5'})
+
+
+def save_comment(request, form: CommentForm) -> None:
+    """Create and add new comment to the post."""
+    post = get_posted_object(request, Post, 'post-id')
+    new_comment = form.save(commit=False)
+    new_comment.post = post
+    submit_comment(new_comment)
+
+
+def save_tag(request, form: TagForm) -> None:
+    """Create a new tag."""
+    new_tag = form.save(commit=False)
+    new_tag.slug = slugify(new_tag.name)
+    new_tag.save()
+
+
+def save_post(request, form: PostForm) -> None:
+    """Create a new post."""
+    new_post = form.save(commit=False)
+    new_post.slug = slugify(new_post.title)
+    new_post.author = User.objects.get(pk=1)
+    new_post.status = 'published'
+    new_post.save()
+    form.save_m2m()
+
+
+# Actions of forms posted to the post list: the name of the form in the
+# context, its class and the function saving it (none for searches).
+LIST_FORM_ACTIONS = {
+    'search': ('search_form', SearchForm, None),
+    'comment': ('comment_form', CommentForm, save_comment),
+    'tag': ('tag_form', TagForm, save_tag),
+    'post': ('post_form', PostForm, save_post),
+}
+
+
+@conditional_page(post_list_namespaces, 'sidebar')
+@cache_anonymous_page(post_list_namespaces)
+def post_list(request, tag_slug: str = None):
+    """
+    :param tag_slug: Representing the slug of a tag to filter posts by.
+
+    Context variables passed to the template:
+    - `page`: The current page number of the paginated post list
+    - `posts`: The current page of posts to display. Unless searching or
+      requesting a page by its number, it is a cursor based page when
+      `BLOG_PAGINATION` is set to "cursor".
+    - `tag`: The tag object to filter posts by (if any)
+    - `forms`: A dictionary of form objects to include on the page
+    - `query`: The search query string (if any)
+    """
+    object_list = Post.published.for_listing()
+    tag = None
+    count = None
+    query = None
+    forms = {}
+
+    if request.method == 'POST':
+        action = request.POST.get('action')
+
+        if action in LIST_FORM_ACTIONS:
+            """Build and validate the submitted form only."""
+            form_name, form_class, save = LIST_FORM_ACTIONS[action]
+            form = forms[form_name] = form_class(request.POST)
+
+            if form.is_valid():
+                if save is None:
+                    """Filter database query by submitted keyword."""
+                    query = form.cleaned_data['query']
+                else:
+                    try:
+                        save(request, form)
+                    except BufferFull as error:
+                        return comments_busy(error)
+                    return HttpResponseRedirect(reverse('blog:post-list'))
+
+        elif action == 'delete-post':
+            """Delete corresponding post."""
+            get_posted_object(request, Post.published, 'to-delete-post') \
+                .delete()
+            return HttpResponseRedirect(reverse('blog:post-list'))
+
+        elif action == 'delete-comment':
+            """Delete corresponding comment."""
+            get_posted_object(request, Comment.is_active,
+                              'to-delete-comment').delete()
+            return HttpResponseRedirect(reverse('blog:post-list'))
+
+    elif 'query' in request.GET:
+        """Search through pages of results of a submitted keyword."""
+        forms['search_form'] = SearchForm(request.GET)
+
+        if forms['search_form'].is_valid():
+            query = forms['search_form'].cleaned_data['query']
+
+    if tag_slug:
+        tag = get_tag(tag_slug)
+        object_list, count = filter_by_tag(object_list, tag)
+
+    if query is not None:
+        object_list = SearchResults(query, tag=tag)
+
+    page, posts = paginate_posts(request, object_list, query, count)
+
+    context = {
+        'page': page,
+        'posts': posts,
+        'tag': tag,
+        'forms': list_forms(**forms),
+        'query': query
+    }
+
+    return render(request, 'blog/post/list.html', context)
+
+
+@conditional_page(post_detail_namespaces, 'sidebar')
+@cache_anonymous_page(post_detail_namespaces)
+def post_detail(request, year: str, month: str, day: str, post_slug: str):
+    """
+    :params year, month, day: Strings representing the year,
+     month and day of the post's publication date.
+    :param post_slug: string representing the slug of the post to display.
+
+    Context variables passed to the template:
+    - `post`: The blog post to display.
+    - `comments`: The first page of active comments of the post, the
+      following ones are loaded by `post_comments`.
+    - `forms`: A dictionary of form objects to include on the page.
+    - `similar_posts`: A list of similar posts based on shared tags.
+    - `sent`: A boolean indicating whether an email was successfully sent.
+    """
+    post = get_object_or_404(Post.published.published_on(year, month, day),
+                             slug=post_slug)
+    comments = paginate_comments(post)
+    similar_posts = get_similar_posts(post)
+    sent = False
+    forms = {
+        'comment_form': CommentForm,
+        'share_form': EmailPostForm,
+    }
+    context = {
+        'post': post,
+        'comments': comments,
+        'forms': forms,
+        'similar_posts': similar_posts,
+        'sent': sent,
+    }
+
+    if request.method == 'POST':
+        for form_name, form_class in forms.items():
+            forms[form_name] = form_class(request.POST)
+
+            if forms[form_name].is_valid():
+                if form_name == 'comment_form':
+                    """
+                    Create and add new comment to the
+                    actual displayed post.
+                    """
+                    new_comment = forms[form_name].save(commit=False)
+                    new_comment.post = post
+                    try:
+                        submit_comment(new_comment)
+                    except BufferFull as error:
+                        return comments_busy(error)
+
+                    return HttpResponseRedirect(
+                        reverse('blog:post-detail',
+                                args=[year, month, day, post.slug]))
+
+                elif form_name == 'share_form':
+                    """
+                    Queue an email message contains a link to the actual
+                    displayed post with short message.
+                    """
+                    data = forms[form_name].cleaned_data
+                    post_url = request.build_absolute_uri(
+                        post.get_absolute_url())
+
+                    subject = f'{data["name"]} ({data["email"]}' \
+                              f' encourage to read "{post.title}"'
+                    message = f'Read post "{post.title}" on page {post_url}' \
+                              f'Comment added by {data["name"]}:' \
+                              f' {data["comments"]}.'
+
+                    enqueue_email(
+                        sender=data['email'],
+                        subject=subject,
+                        message=message,
+                        from_email='admin@myblog.com',
+                        recipient=data['to'],
+                        client=request.META.get('REMOTE_ADDR'))
+                    context['sent'] = True
+                    forms[form_name] = EmailPostForm()
+
+                    return render(request, 'blog/post/detail.html', context)
+
+        if 'to-delete-comment' in request.POST:
+            """Delete a corresponding comment of the post."""
+            get_posted_object(request, Comment.is_active.filter(post=post),
+                              'to-delete-comment').delete()
+            return render(request, 'blog/post/detail.html', context)
+
+    return render(request, 'blog/post/detail.html', context)
+
+
+@require_safe
+def post_comments(request, post_id: int):
+    """
+    Return the page of active comments of a post following the `cursor`
+    parameter, as JSON or, given `format=html`, as a fragment of the post
+    list (`view=list`) or detail page to append to the shown comments.
+    """
+    post = get_object_or_404(Post.published.only('id'), pk=post_id)
+    comments = paginate_comments(post, request.GET.get('cursor'))
+
+    if request.GET.get('format') == 'html':
+        return render(request, 'blog/post/comments.html', {
+            'post': post,
+            'comments': comments,
+            'next_cursor': comments.next_cursor,
+            'view': request.GET.get('view', 'detail'),
+        })
+
+    return JsonResponse({
+        'comments': [{
+            'id': comment.id,
+            'name': comment.name,
+            'body': comment.body,
+            'created': comment.created.isoformat(),
+        } for comment in comments],
+        'next_cursor': comments.next_cursor,
+    })
+
+
+@staff_member_required
+def cache_stats(request):
+    """Return hit and miss counters of the blog cache in this process."""
+    return JsonResponse(cache.stats())
+
+
+@staff_member_required
+def request_stats(request):
+    """Return costs of the latest requests profiled by this process."""
+    return JsonResponse({
+        'enabled': getattr(settings, 'BLOG_PROFILING', False),
+        'requests': profiling.history(),
+    })
@@ -1,22 +1,27 @@
 """
 Util functionalities.
 """
+from itertools import count
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
+from django.template.defaultfilters import slugify
 
-from myblog.blog.models import (
+from blog.models import (
     Post,
     Comment,
+    QueuedEmail,
 )
 
 from taggit.models import Tag
 
+# Numbers of users created by `create_user`, unique within the process.
+_user_numbers = count(1)
+
 
 def create_user(superuser: bool = False, *args, **kwargs) -> User:
     """Create and return a user."""
-    last_user = get_user_model().objects.last()
-    new_user_id = 1 if not last_user else last_user.id + 1
-    email = f'test{new_user_id}@example.com'
+    email = f'test{next(_user_numbers)}@example.com'
 
     user = get_user_model().objects.create(
         email=kwargs.pop('email', email),
@@ -36,7 +41,11 @@ def create_user(superuser: bool = False, *args, **kwargs) -> User:
 
 def create_post(title: str = 'Test title', body: str = 'Test body',
                 **extra_fields) -> Post:
-    """Create and return a post."""
+    """Create and return a post, written by a new user unless given."""
+    extra_fields.setdefault('slug', slugify(title))
+    if 'author' not in extra_fields:
+        extra_fields['author'] = create_user()
+
     post = Post.objects.create(
         title=title,
         body=body,
@@ -47,9 +56,10 @@ def create_post(title: str = 'Test title', body: str = 'Test body',
 
 
 def create_comment(name: str = 'Test name', email: str = 'test@example.com',
-                   body: str = 'Test body') -> Comment:
-    """Create and return a comment."""
+                   body: str = 'Test body', post: Post = None) -> Comment:
+    """Create and return a comment, of a new post unless given."""
     comment = Comment.objects.create(
+        post=post or create_post(),
         name=name,
         email=email,
         body=body,
@@ -61,3 +71,17 @@ def create_comment(name: str = 'Test name', email: str = 'test@example.com',
 def create_tag(name: str = 'Test tag') -> Tag:
     """Create and return a tag."""
     return Tag.objects.create(name=name)
+
+
+def create_queued_email(subject: str = 'Test subject',
+                        **extra_fields) -> QueuedEmail:
+    """Create and return an email queued in the outbox."""
+    extra_fields.setdefault('sender', 'test@example.com')
+    extra_fields.setdefault('from_email', 'admin@example.com')
+    extra_fields.setdefault('recipient', 'friend@example.com')
+
+    return QueuedEmail.objects.create(
+        subject=subject,
+        message='Test message',
+        **extra_fields,
+    )
@@ -47,7 +47,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Removes itself unless BLOG_PROFILING is enabled.
+    'blog.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Removes itself unless there are database replicas.
+    'blog.routers.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -60,7 +64,8 @@ ROOT_URLCONF = 'myblog.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django templates timing renders of profiled requests.
+        'BACKEND': 'blog.profiling.ProfilingDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -89,6 +94,67 @@ DATABASES = {
     }
 }
 
+# Read replicas of the default database, as "host[:port]" separated by
+# commas. Reads of blog data are routed to them by `blog.routers`.
+DB_REPLICAS = config(
+    'DB_REPLICAS', default='',
+    cast=lambda value: [address.strip() for address in value.split(',')
+                        if address.strip()])
+for number, address in enumerate(DB_REPLICAS, 1):
+    host, _, port = address.partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port,
+        # Tests read the test database of the primary.
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+BLOG_DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+BLOG_REPLICA_CHECK_INTERVAL = 10
+# Reads of a browser go to the primary for a while after it wrote.
+BLOG_REPLICA_PIN_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='myblog'),
+    }
+}
+
+BLOG_CACHE_ALIAS = 'default'
+BLOG_CACHE_TIMEOUT = config('BLOG_CACHE_TIMEOUT', default=60 * 60, cast=int)
+BLOG_MARKDOWN_CACHE_SIZE = 256
+BLOG_SEARCH_CACHE_SIZE = 128
+BLOG_SEARCH_CACHE_TIMEOUT = 5 * 60
+BLOG_SEARCH_CACHED_RESULTS = 100
+BLOG_SIMILAR_POSTS_LIMIT = 10
+BLOG_PAGE_CACHE_TIMEOUT = 5 * 60
+BLOG_SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+# Either "pages" (numbered pages) or "cursor" (keyset pagination).
+BLOG_PAGINATION = config('BLOG_PAGINATION', default='cursor')
+# Route reads to the async views, enabled by default by `asgi.py`.
+BLOG_ASYNC_VIEWS = config('BLOG_ASYNC_VIEWS', default=False, cast=bool)
+BLOG_ASYNC_WORKERS = 8
+# Record SQL, template and markdown costs of every request.
+BLOG_PROFILING = config('BLOG_PROFILING', default=False, cast=bool)
+BLOG_PROFILING_HISTORY = 200
+BLOG_PROFILING_REPEATED_QUERIES = 5
+# Queue comments and insert them in batches, see `blog/ingest.py`.
+BLOG_COMMENT_BUFFER = config('BLOG_COMMENT_BUFFER', default=False, cast=bool)
+BLOG_COMMENT_BUFFER_SIZE = 5000
+BLOG_COMMENT_BATCH_SIZE = 500
+BLOG_COMMENT_FLUSH_INTERVAL = 0.2
+BLOG_COMMENT_BUFFER_TIMEOUT = 1
+BLOG_COMMENT_FLUSH_ATTEMPTS = 3
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -133,3 +199,9 @@ STATICFILES_DIRS = (str(BASE_DIR.joinpath('static')),)
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Emails shared by readers are queued and sent by `send_queued_emails`.
+BLOG_OUTBOX_RATE_LIMIT = 10
+BLOG_OUTBOX_RATE_WINDOW = 60 * 60
+BLOG_OUTBOX_RETRY_DELAY = 60
+BLOG_OUTBOX_MAX_ATTEMPTS = 5
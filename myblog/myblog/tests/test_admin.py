@@ -7,11 +7,16 @@ from django.test import (
 )
 from django.urls import reverse
 from django.contrib import admin
+from django.contrib.admin.utils import (
+    display_for_field,
+    lookup_field,
+)
 
 from ..common.utils import (
     create_user,
     create_post,
     create_comment,
+    create_queued_email,
 )
 
 
@@ -25,6 +30,7 @@ class AdminSiteTests(TestCase):
         self.user = create_user()
         self.post = create_post()
         self.comment = create_comment()
+        self.queuedemail = create_queued_email()
 
     def test_admin_models_url_patterns(self):
         """
@@ -42,13 +48,16 @@ class AdminSiteTests(TestCase):
 
         for model in admin_models:
             for pattern in model.get_urls():
-                if pattern.name is not None:
-                    model_name = str(model.opts).replace('blog.', '')
-                    model_instance = getattr(self, model_name)
-                    pattern_params = [
-                        'id' if 'id' in param else param
-                        for param in pattern.pattern.converters
-                    ]
+                if pattern.name is None:
+                    # The redirect of bare object ids to their change page.
+                    continue
+
+                model_name = str(model.opts).replace('blog.', '')
+                model_instance = getattr(self, model_name)
+                pattern_params = [
+                    'id' if 'id' in param else param
+                    for param in pattern.pattern.converters
+                ]
 
                 url_params = [getattr(model_instance, param)
                               for param in pattern_params]
@@ -62,8 +71,11 @@ class AdminSiteTests(TestCase):
 
                 if 'list' in pattern.name:
                     for field in model.list_display:
-                        self.assertContains(
-                            res, getattr(model_instance, field)
-                        )
+                        # Values are shown as the changelist displays them.
+                        field_object, _, value = lookup_field(
+                            field, model_instance, model)
+                        self.assertContains(res, display_for_field(
+                            value, field_object,
+                            model.get_empty_value_display()))
 
                 self.assertEqual(res.status_code, 200)
@@ -18,7 +18,11 @@ from django.urls import (
     path,
     include,
 )
-from django.contrib.sitemaps.views import sitemap
+from django.contrib.sitemaps import views as sitemaps_views
+from blog.pagecache import (
+    conditional_page,
+    list_namespaces,
+)
 from blog.sitemaps import PostSitemap
 
 # Sitemaps
@@ -29,6 +33,12 @@ sitemaps = {
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('blog/', include('blog.urls', namespace='blog')),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps},
+    path('sitemap.xml',
+         conditional_page(list_namespaces)(sitemaps_views.index),
+         {'sitemaps': sitemaps},
+         name='django.contrib.sitemaps.views.index'),
+    path('sitemap-<section>.xml',
+         conditional_page(list_namespaces)(sitemaps_views.sitemap),
+         {'sitemaps': sitemaps},
          name='django.contrib.sitemaps.views.sitemap')
 ]
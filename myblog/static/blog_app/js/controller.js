@@ -16,7 +16,25 @@ class Controller {
 
     setupListeners = () => {
         Array.from(document.querySelectorAll('[data-modal-name]')).forEach(btn => btn.addEventListener('click', this.modalInOut));
-        this.viewElements['popupTagBtn'].addEventListener('click', () => { this.viewElements['popupTag'].classList.toggle('show') });
+        this.viewElements['popupTagBtn']?.addEventListener('click', () => { this.viewElements['popupTag'].classList.toggle('show') });
+        document.addEventListener('click', this.loadComments);
+    };
+
+    loadComments = async event => {
+        let button = event.target.closest('[data-comments-url]');
+
+        if (!button) {
+            return;
+        }
+
+        button.disabled = true;
+        let response = await fetch(button.dataset.commentsUrl);
+
+        if (response.ok) {
+            button.outerHTML = await response.text();
+        } else {
+            button.disabled = false;
+        };
     };
 
     modalInOut = event => {